@@ -1,183 +1,76 @@
 #!/usr/bin/env python3
 
 import argparse
-import base64
 import csv
 import json
-import logging
 import os
 import sys
+import threading
 import time
-import requests
-from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from dpxcc import (DEFAULT_CONNECT_TIMEOUT, DEFAULT_POOL_SIZE, DEFAULT_READ_TIMEOUT, DEFAULT_UPLOAD_WORKERS,
+                   AsyncTaskPoller, DeployJournal, EngineClient, FrameworkCatalog, FrameworkIndex, Inventory, LogBuffer,
+                   ManifestError, PageError, UploadCache, UploadPipeline, content_hash, file_reference_gone,
+                   load_manifest, local_lookup_file, manifest_entries, referenced_algorithms, run_ordered,
+                   setup_logging, topological_order)
+from dpxcc.journal import DONE, FAILED
 
 # Configuration Defaults
-DEFAULT_API_VER = "v5.1.27"
-DEFAULT_KEEPALIVE = 300
 DEFAULT_ALGO_FILE = "crt_algorithms.csv"
 DEFAULT_FILEREFID_NAME = "fileReferenceId.csv"
-CONFIG_FILE = "CONFIG"
+DEFAULT_WORKERS = 1
 
 class AlgorithmCreator:
     def __init__(self, args):
         self.args = args
-        self.masking_engine = ""
-        self.api_base_url = ""
-        self.auth_header = {}
-        self.session = requests.Session()
+        self.logger, self.log_file_name = setup_logging(args.log_file, "dpxcc_create_algorithms")
+        self.log_buffer = LogBuffer(self.logger)
+        self.client = EngineClient(args, self.log, pool_size=max(DEFAULT_POOL_SIZE, args.workers + args.upload_workers + 1))
+        self.poller = AsyncTaskPoller(self.client)
+        self.uploads = UploadPipeline(self.upload_file, self.log, args.upload_workers)
+        self.upload_cache = None  # UploadCache, needs the engine from CONFIG
+        self.inventory = Inventory(self.client, self.log, persistent=True) if args.inventory else None
+        self.framework_catalog = FrameworkCatalog(self.client, self.log)
+        self.journal = None  # DeployJournal, needs the engine from CONFIG
+        self.digests = {}  # row index -> content hash of the algorithm
+        self.skipped = {}  # row index -> (algorithmName, fileReferenceId) done by the previous run
         self.file_reference_ids = []  # To store IDs for CSV generation
-        
-        # Setup Logging
-        self.setup_logging()
-
-    def setup_logging(self):
-        log_date = datetime.now().strftime('%d%m%Y_%H%M%S')
-        log_file_name = self.args.log_file if self.args.log_file else f"dpxcc_create_algorithms_{log_date}.log"
-        
-        # Create handlers
-        file_handler = logging.FileHandler(log_file_name)
-        console_handler = logging.StreamHandler(sys.stderr) # Send logs to stderr as requested/parity
-
-        # Format
-        formatter = logging.Formatter('[%(asctime)s] %(message)s', datefmt='%d%m%Y %H:%M:%S')
-        file_handler.setFormatter(formatter)
-        console_handler.setFormatter(formatter)
-
-        self.logger = logging.getLogger()
-        self.logger.setLevel(logging.INFO)
-        self.logger.addHandler(file_handler)
-        self.logger.addHandler(console_handler)
-        
-        self.log_file_name = log_file_name # Store for reference
+        self.compiled = {}  # row index -> manifest entry, with --manifest
+        self.created = {}  # algorithmName -> Event set once its creation has finished
+        self.wait_for = {}  # row index -> algorithm names to wait for before POST
 
     def log(self, message):
-        self.logger.info(message)
-
-    def read_config(self):
-        if not os.path.exists(CONFIG_FILE):
-            self.log(f"Error: {CONFIG_FILE} not found!")
-            sys.exit(1)
-        
-        try:
-            with open(CONFIG_FILE, 'r') as f:
-                lines = f.readlines()
-                encoded_user = lines[0].strip()
-                encoded_pass = lines[1].strip()
-                self.masking_engine = lines[2].strip()
-            
-            username = base64.b64decode(encoded_user).decode('utf-8')
-            password = base64.b64decode(encoded_pass).decode('utf-8')
-            
-            if self.args.https_insecure: # Corresponds to -k, standard curl behavior
-                self.protocol = "https"
-                self.verify_ssl = False
-            else:
-                self.protocol = "http"
-                self.verify_ssl = True
-            
-            self.api_base_url = f"{self.protocol}://{self.masking_engine}/masking/api/{DEFAULT_API_VER}"
-            return username, password
-
-        except Exception as e:
-            self.log(f"Error reading CONFIG: {e}")
-            sys.exit(1)
-
-    def check_connection(self):
-        url = f"{self.protocol}://{self.masking_engine}"
-        self.log(f"Checking connection to {url}...")
-        try:
-            # -m 5 equivalent (timeout)
-            response = requests.get(url, timeout=5, verify=False if self.protocol == "https" else True) # Always verify=False if -k per curl logic?
-            # Bash: curl_cmd="$curl_cmd -k" if HttpsInsecure=true.
-            
-            response.raise_for_status()
-            self.log(f"Connection to {url} successful.")
-        except requests.exceptions.RequestException as e:
-            self.log(f"Error connecting to {url}: {e}")
-            # Bash script has specific error pattern matching. 
-            # I will simplify but keep the spirit: exit on failure.
-            sys.exit(1)
-
-    def login(self, username, password):
-        api_endpoint = f"{self.api_base_url}/login"
-        payload = {"username": username, "password": password}
-        self.log(f"Logging in with {username} ...")
-        
-        try:
-            # Verify=False to mimic -k behavior
-            verify = False if self.args.https_insecure else True
-            
-            response = self.session.post(api_endpoint, json=payload, verify=verify)
-            
-            if response.status_code != 200:
-                self.log(f"Login failed: {response.status_code} - {response.text}")
-                sys.exit(1)
-                
-            data = response.json()
-            if 'Authorization' not in data:
-                self.log(f"Login failed: No Authorization token. Response: {data}")
-                sys.exit(1)
-                
-            self.auth_header = {'Authorization': data['Authorization']}
-            self.session.headers.update(self.auth_header)
-            self.log(f"{username} logged in successfully with token {data['Authorization']}")
-            
-        except Exception as e:
-            self.log(f"Login exception: {e}")
-            sys.exit(1)
-
-    def logout(self):
-        if not self.auth_header:
-            return
-            
-        self.log("Logging out ...")
-        try:
-            api_endpoint = f"{self.api_base_url}/logout"
-            verify = False if self.args.https_insecure else True
-            response = self.session.put(api_endpoint, verify=verify)
-            self.log(f"Response Code: {response.status_code} - Response Body: {response.text}")
-            self.log("Logged out successfully.")
-        except Exception as e:
-            self.log(f"Logout exception: {e}")
+        self.log_buffer.log(message)
 
     def get_frameworks(self):
         self.log("Getting frameworks...")
-        api_endpoint = f"{self.api_base_url}/algorithm/frameworks"
-        params = {"include_schema": "true", "page_number": 1, "page_size": 256}
-        
         try:
-            verify = False if self.args.https_insecure else True
-            response = self.session.get(api_endpoint, params=params, verify=verify)
-            
-            if response.status_code != 200:
-                self.check_response_error("get_frameworks", "algorithm/frameworks", response)
-                
-            data = response.json()
-            if 'responseList' not in data:
-                 self.log(f"Error: responseList not found in get_frameworks. Body: {response.text}")
-                 sys.exit(1)
-                 
+            # Cached per engine with their schemas; only re-downloaded
+            # when the engine's framework list changes.
+            frameworks = self.framework_catalog.algorithms()
             self.log("Got frameworks...")
-            return data['responseList']
-            
+            return frameworks
+
+        except PageError as e:
+            self.check_response_error("get_frameworks", "algorithm/frameworks", e.response)
+            return FrameworkIndex([])
         except Exception as e:
             self.log(f"Get frameworks exception: {e}")
             sys.exit(1)
 
-    def upload_file(self, file_path):
+    def upload_file(self, file_path, use_cache=True):
+        if self.upload_cache and use_cache:
+            file_ref_id = self.upload_cache.lookup(file_path)
+            if file_ref_id:
+                self.log(f"File: {file_path} unchanged since last upload - ID: {file_ref_id}")
+                return file_ref_id
+
         self.log(f"Uploading file {file_path} ...")
-        api_endpoint = f"{self.api_base_url}/file-uploads"
-        params = {"permanent": "false"}
-        
-        # Mimetype assumption from bash script: text/plain
-        # Bash: file=@$FILE_NAME;type=$FILE_TYPE (where FILE_TYPE="text/plain")
         
         try:
-            verify = False if self.args.https_insecure else True
-            
-            with open(file_path, 'rb') as f:
-                files = {'file': (os.path.basename(file_path), f, 'text/plain')}
-                response = self.session.post(api_endpoint, params=params, files=files, verify=verify)
+            # Cached references must outlive this run, temporary uploads do not.
+            response = self.client.upload(file_path, permanent=bool(self.upload_cache))
                 
             if response.status_code != 200:
                 self.check_response_error("upload_files", "file-uploads", response)
@@ -187,13 +80,14 @@ class AlgorithmCreator:
             
             if file_ref_id:
                 self.log(f"File: {data.get('filename')} uploaded - ID: {file_ref_id}")
-                # Track for CSV
+                if self.upload_cache:
+                    self.upload_cache.store(file_path, file_ref_id)
+                # Tracked for CSV by run(), in input order
                 # Bash script greps "fileReferenceId": "delphix-file://..." from logs.
                 # Here we reconstruct the value or use what's returned.
                 # Usually fileReferenceId in API return IS the URI. 
                 # Let's verify bash script output.
                 # "delphix-file://upload/..."
-                self.file_reference_ids.append(f'"{file_ref_id}"') # Add quotes as per bash output
                 return file_ref_id
             else:
                 self.log("File NOT uploaded (No ID returned)")
@@ -202,30 +96,28 @@ class AlgorithmCreator:
         except Exception as e:
             self.log(f"Upload file exception: {e}")
             if not self.args.ignore_errors:
-                self.logout()
+                self.client.logout()
                 sys.exit(1)
             return None
 
-    def check_framework_id(self, algo_json, all_frameworks, expected_framework_name, json_file_path):
+    def check_framework_id(self, algo_json, frameworks, expected_framework_name, json_file_path):
         algo_name = algo_json.get('algorithmName')
         current_fid = algo_json.get('frameworkId')
         current_pid = algo_json.get('pluginId')
         
-        matching_fw = next((f for f in all_frameworks if f.get('frameworkName') == expected_framework_name), None)
-        
         modified = False
         
-        if matching_fw:
-            correct_fid = matching_fw.get('frameworkId')
+        if expected_framework_name in frameworks:
+            correct_fid = frameworks.framework_ids[expected_framework_name]
             
             # Plugin ID is inside 'plugin' object: .plugin.pluginId
-            correct_pid = matching_fw.get('plugin', {}).get('pluginId')
+            correct_pid = frameworks.plugin_ids[expected_framework_name]
             
             # Bash compares as strings/numbers.
             # current_fid might be int or none.
             
             if current_fid != correct_fid or current_pid != correct_pid:
-                self.log(f"Framework ID or Plugin ID mismatch for algorithm {algo_name}. Correcting JSON.")
+                self.log(f"Framework ID or Plugin ID mismatch for algorithm {algo_name}. Using the engine's IDs.")
                 algo_json['frameworkId'] = correct_fid
                 algo_json['pluginId'] = correct_pid
                 modified = True
@@ -234,17 +126,33 @@ class AlgorithmCreator:
             
         return algo_json, modified
 
-    def add_algorithm(self, algo_json):
+    def add_algorithm(self, algo_json, lookup_file=None, digest=None):
         algo_name = algo_json.get('algorithmName')
         self.log(f"Adding Algorithm {algo_name} ...")
         
-        api_endpoint = f"{self.api_base_url}/algorithms"
+        api_endpoint = "algorithms"
         
         try:
-            verify = False if self.args.https_insecure else True
-            response = self.session.post(api_endpoint, json=algo_json, verify=verify)
-            
+            self.journal.sending("algorithms", algo_name, digest)
+            response = self.client.post(api_endpoint, json=algo_json)
+
+            if lookup_file and self.upload_cache:
+                file_ref_id = algo_json['algorithmExtension']['lookupFile']['uri']
+                if file_reference_gone(response, file_ref_id):
+                    # The cached upload was removed from the engine: forget
+                    # it, upload the file again and retry once.
+                    self.log(f"File reference {file_ref_id} no longer exists on the engine.")
+                    self.upload_cache.invalidate(file_ref_id)
+                    file_ref_id = self.upload_file(lookup_file, use_cache=False)
+                    if file_ref_id:
+                        algo_json['algorithmExtension']['lookupFile']['uri'] = file_ref_id
+                        response = self.client.post(api_endpoint, json=algo_json)
+
             if response.status_code != 200:
+                self.journal.answered("algorithms", algo_name)
+                if "already exists" in response.text and self.journal.attempted("algorithms", algo_name, digest):
+                    self.log(f"Algorithm: {algo_name} already exists, created by the interrupted run.")
+                    return True
                 self.check_response_error("add_algorithm", "algorithms", response)
             
             data = response.json()
@@ -252,46 +160,50 @@ class AlgorithmCreator:
             
             if async_task_id:
                 self.log(f"Algorithm: {algo_name} submitted for creation with asyncTaskId: {async_task_id}.")
-                self.check_async_task_status(async_task_id)
+                if self.check_async_task_status(async_task_id, algo_name):
+                    if self.inventory:
+                        self.inventory.put("algorithms", algo_json)
+                    return True
             else:
+                self.journal.answered("algorithms", algo_name)
                 self.log(f"Algorithm: {algo_name} NOT submitted for creation.")
                 
         except Exception as e:
              self.log(f"Add algorithm exception: {e}")
              if not self.args.ignore_errors:
-                 self.logout()
+                 self.client.logout()
                  sys.exit(1)
+        return False
 
-    def check_async_task_status(self, async_task_id):
+    def check_async_task_status(self, async_task_id, algo_name=None):
         self.log(f"Checking status of async task {async_task_id} ...")
-        api_endpoint = f"{self.api_base_url}/async-tasks/{async_task_id}"
-        
-        while True:
-            try:
-                verify = False if self.args.https_insecure else True
-                response = self.session.get(api_endpoint, verify=verify)
-                
-                if response.status_code != 200:
-                    self.check_response_error("check_async_task_status", f"async-tasks/{async_task_id}", response)
-                
-                data = response.json()
-                status = data.get('status')
-                
-                if status == 'SUCCEEDED':
-                    self.log(f"Async task {async_task_id} succeeded.")
-                    break
-                elif status == 'FAILED':
-                    self.log(f"Async task {async_task_id} failed.")
-                    self.log(f"Response Body: {json.dumps(data)}")
-                    self.logout()
-                    sys.exit(1)
-                else:
-                    self.log(f"Async task {async_task_id} is still in progress with status: {status}. Waiting 5 seconds...")
-                    time.sleep(5)
-            except Exception as e:
-                 self.log(f"Async wait exception: {e}")
-                 self.logout()
-                 sys.exit(1)
+        started = time.monotonic()
+
+        try:
+            response = self.poller.wait(async_task_id)
+            if algo_name:
+                # The outcome of the creation is known, whatever it is
+                self.journal.answered("algorithms", algo_name)
+
+            if response.status_code != 200:
+                self.check_response_error("check_async_task_status", f"async-tasks/{async_task_id}", response)
+                return
+
+            data = response.json()
+            status = data.get('status')
+
+            if status == 'SUCCEEDED':
+                self.log(f"Async task {async_task_id} succeeded in {time.monotonic() - started:.1f} seconds.")
+                return True
+            else:
+                self.log(f"Async task {async_task_id} failed.")
+                self.log(f"Response Body: {json.dumps(data)}")
+                self.client.logout()
+                sys.exit(1)
+        except Exception as e:
+             self.log(f"Async wait exception: {e}")
+             self.client.logout()
+             sys.exit(1)
 
     def check_response_error(self, func_name, api_name, response):
         # Logic matches bash check_response_error
@@ -306,7 +218,7 @@ class AlgorithmCreator:
             except:
                 pass
                 
-            self.logout()
+            self.client.logout()
             sys.exit(1)
         else:
              self.log(f"{func_name}() -> Function: {func_name}() - Api: {api_name} - Response Code: {response.status_code} - Response Body: {response.text}")
@@ -321,81 +233,213 @@ class AlgorithmCreator:
         except Exception as e:
              self.log(f"Error creating CSV: {e}")
 
+    def read_algorithms_file(self):
+        rows = []
+        with open(self.args.algorithms_file, 'r') as csvfile:
+            # Bash script reads line by line, removes quotes, then splits by ;
+            # We need to replicate this aggressive parsing.
+            for line in csvfile:
+                clean_line = line.replace('"', '').strip()
+                if not clean_line or clean_line.startswith('#'):
+                    continue
+
+                parts = clean_line.split(';')
+                if len(parts) < 2:
+                    continue
+
+                rows.append((len(rows), parts[0], parts[1]))
+        return rows
+
+    def scan_algorithms(self, rows):
+        # Quiet first pass over the JSON files: errors are reported later by
+        # process_algorithm, in CSV order.
+        algorithms = {}
+        for index, json_name, _ in rows:
+            try:
+                with open(json_name, 'r') as jf:
+                    algorithms[index] = json.load(jf)
+            except (OSError, ValueError):
+                continue
+        return algorithms
+
+    def plan_submission(self, rows, algorithms):
+        # Algorithms can reference each other ({"name": ...} inside
+        # algorithmExtension, e.g. FullName -> FirstName/LastName), so with
+        # several workers the referenced ones are submitted first and the
+        # dependants wait for them before their own POST.
+        if self.args.workers <= 1:
+            return None
+
+        names = [algorithms.get(index, {}).get('algorithmName') for index, _, _ in rows]
+        dependencies = {index: referenced_algorithms(algo_json.get('algorithmExtension'))
+                        for index, algo_json in algorithms.items()}
+
+        order = topological_order(names, dependencies)
+        position = {index: pos for pos, index in enumerate(order)}
+        name_index = {name: index for index, name in enumerate(names) if name}
+        for name in name_index:
+            self.created[name] = threading.Event()
+        for index, deps in dependencies.items():
+            # Only wait for what was submitted earlier; the pool starts tasks
+            # in submission order, so this can never deadlock.
+            self.wait_for[index] = [dep for dep in deps
+                                    if dep in name_index and position[name_index[dep]] < position[index]]
+        self.log(f"Submitting {len(rows)} algorithms with {self.args.workers} workers.")
+        return order
+
+    def read_manifest(self):
+        # Rows and payloads compiled by dpxcc_catalog.py compile: frameworks
+        # and lookup file references are already resolved for this engine.
+        try:
+            manifest = load_manifest(self.args.manifest, self.client.masking_engine)
+        except ManifestError as e:
+            self.log(f"Error: {e}. Run dpxcc_catalog.py compile again.")
+            self.client.logout()
+            sys.exit(1)
+
+        rows = []
+        for entry in manifest_entries(manifest, "algorithms", self.args.manifest):
+            self.compiled[len(rows)] = entry
+            rows.append((len(rows), entry['source'], entry['framework']))
+        self.log(f"{len(rows)} algorithms read from {self.args.manifest}")
+        return rows
+
+    def load_compiled(self, entry):
+        algo_json = json.loads(json.dumps(entry['payload']))
+        file_ref_id = ((algo_json.get('algorithmExtension') or {}).get('lookupFile') or {}).get('uri')
+        if file_ref_id in entry['lookupFiles']:
+            return algo_json, entry['lookupFiles'][file_ref_id], file_ref_id
+        return algo_json, None, None
+
+    def process_algorithm(self, row, frameworks):
+        index, json_name, framework_name = row
+        algo_name = None
+        try:
+            if index in self.skipped:
+                algo_name, file_ref_id = self.skipped[index]
+                self.log(f"Algorithm: {algo_name} already created by the previous run ({json_name}).")
+                return file_ref_id
+
+            if index in self.compiled:
+                algo_json, file_uri, uploaded_id = self.load_compiled(self.compiled[index])
+                algo_name = algo_json.get('algorithmName')
+                self.log(f"Processing algorithm: {algo_name} ({json_name})")
+                return self.submit_algorithm(index, algo_json, file_uri, uploaded_id)
+
+            if not os.path.exists(json_name):
+                if not self.args.ignore_errors:
+                    self.log(f"Input json file {json_name} is missing")
+                    self.client.logout()
+                    sys.exit(1)
+                return None
+
+            self.log(f"Processing file: {json_name}")
+
+            with open(json_name, 'r') as jf:
+                try:
+                    algo_json = json.load(jf)
+                except json.JSONDecodeError:
+                     self.log(f"JSON Decode Error in {json_name}")
+                     return None
+            algo_name = algo_json.get('algorithmName')
+
+            # File Upload Logic: the upload was queued by run(), wait for it
+            file_uri = local_lookup_file(algo_json)
+            uploaded_id = None
+
+            if file_uri:
+                 uploaded_id = self.uploads.result(file_uri)
+                 if uploaded_id:
+                     # Only in the payload: the JSON file keeps the file name
+                     algo_json['algorithmExtension']['lookupFile']['uri'] = uploaded_id
+
+            # Framework Check
+            algo_json, _ = self.check_framework_id(algo_json, frameworks, framework_name, json_name)
+
+            return self.submit_algorithm(index, algo_json, file_uri, uploaded_id)
+        finally:
+            if algo_name in self.created:
+                self.created[algo_name].set()
+
+    def submit_algorithm(self, index, algo_json, file_uri, uploaded_id):
+        for dep in self.wait_for.get(index, []):
+            self.created[dep].wait()
+
+        status = FAILED
+        try:
+            if self.add_algorithm(algo_json, file_uri if uploaded_id else None, self.digests.get(index)):
+                status = DONE
+        finally:
+            if uploaded_id:
+                # May have been replaced by add_algorithm if it went stale
+                uploaded_id = algo_json['algorithmExtension']['lookupFile']['uri']
+            # Also when add_algorithm exits: --resume then retries it
+            algo_name = algo_json.get('algorithmName')
+            if status == DONE:
+                self.journal.record("algorithms", algo_name, DONE, self.digests.get(index), algo_name,
+                                    fileReferenceId=uploaded_id)
+            else:
+                self.journal.failed("algorithms", algo_name, self.digests.get(index), algo_name,
+                                    fileReferenceId=uploaded_id)
+        return uploaded_id
+
+    def skip_completed(self, algorithms):
+        # --resume: algorithms created by the previous run, unchanged since,
+        # are neither uploaded nor sent again. Their rows stay (dependants
+        # and the --file-reference-id CSV need them) but return at once.
+        for index, algo_json in algorithms.items():
+            algo_name = algo_json.get('algorithmName')
+            if algo_name and self.journal.completed("algorithms", algo_name, self.digests[index]):
+                self.skipped[index] = (algo_name, self.journal.get("algorithms", algo_name).get('fileReferenceId'))
+        if self.skipped:
+            self.log(f"Skipping {len(self.skipped)} algorithms already created by the previous run.")
+
     def run(self):
-        username, password = self.read_config()
-        self.check_connection()
+        username, password = self.client.read_config()
+        self.client.check_connection()
         
-        if not os.path.exists(self.args.algorithms_file) and not self.args.ignore_errors:
+        if not self.args.manifest and not os.path.exists(self.args.algorithms_file) and not self.args.ignore_errors:
              self.log(f"Input CSV file {self.args.algorithms_file} missing")
              sys.exit(1)
 
-        self.login(username, password)
-        frameworks = self.get_frameworks()
+        self.client.login(username, password)
+        if not self.args.no_upload_cache:
+            self.upload_cache = UploadCache(self.client.masking_engine)
+        self.journal = DeployJournal(self.client.masking_engine, "dpxcc_create_algorithms", self.log, self.args.resume)
+        frameworks = None if self.args.manifest else self.get_frameworks()
         
         try:
-            with open(self.args.algorithms_file, 'r') as csvfile:
-                # Bash script reads line by line, removes quotes, then splits by ;
-                # We need to replicate this aggressive parsing.
-                for line in csvfile:
-                    clean_line = line.replace('"', '').strip()
-                    if not clean_line or clean_line.startswith('#'):
-                        continue
-                        
-                    parts = clean_line.split(';')
-                    if len(parts) < 2:
-                        continue
-                        
-                    json_name = parts[0]
-                    framework_name = parts[1]
-                    
-                    if not os.path.exists(json_name):
-                        if not self.args.ignore_errors:
-                            self.log(f"Input json file {json_name} is missing")
-                            self.logout()
-                            sys.exit(1)
-                        continue
-
-                    self.log(f"Processing file: {json_name}")
-                    
-                    with open(json_name, 'r') as jf:
-                        try:
-                            algo_json = json.load(jf)
-                        except json.JSONDecodeError:
-                             self.log(f"JSON Decode Error in {json_name}")
-                             continue
-                    
-                    # File Upload Logic
-                    # Path: .algorithmExtension.lookupFile.uri
-                    # Bash uses jq -r -> returns empty string or value.
-                    file_uri = algo_json.get('algorithmExtension', {}).get('lookupFile', {}).get('uri')
-                    
-                    modified_json = False
-                    
-                    if file_uri and file_uri != "0" and not file_uri.startswith("jar://") and not file_uri.startswith("delphix-file://"):
-                         # Assuming local file if not special URI
-                         uploaded_id = self.upload_file(file_uri)
-                         if uploaded_id:
-                             # Update JSON
-                             if 'algorithmExtension' in algo_json and 'lookupFile' in algo_json['algorithmExtension']:
-                                  algo_json['algorithmExtension']['lookupFile']['uri'] = uploaded_id
-                                  modified_json = True
-                    
-                    # Framework Check
-                    algo_json, fw_modified = self.check_framework_id(algo_json, frameworks, framework_name, json_name)
-                    if fw_modified:
-                        modified_json = True
-                        
-                    # Persistence (Replicating the feature we added + File Upload persistence consistency)
-                    if modified_json:
-                        self.log(f"Persisting changes to {json_name}")
-                        with open(json_name, 'w') as jf:
-                            json.dump(algo_json, jf, indent=2) # Pretty print
-                            
-                    self.add_algorithm(algo_json)
-                    
+            if self.args.manifest:
+                rows = self.read_manifest()
+                algorithms = {index: entry['payload'] for index, entry in self.compiled.items()}
+            else:
+                rows = self.read_algorithms_file()
+                algorithms = self.scan_algorithms(rows)
+            # Hash of the algorithm as defined (JSON file or manifest payload)
+            self.digests = {index: content_hash(algo_json) for index, algo_json in algorithms.items()}
+            if self.args.resume:
+                self.skip_completed(algorithms)
+            order = self.plan_submission(rows, algorithms)
+
+            # Lookup files go up on their own pool while algorithms are
+            # being created; each algorithm only waits for its own file.
+            self.uploads.start([file_uri for file_uri in (local_lookup_file(algo_json)
+                                                          for index, algo_json in algorithms.items()
+                                                          if index not in self.skipped)
+                                if file_uri and os.path.exists(file_uri)])
+
+            for row, file_ref_id in run_ordered(lambda row: self.process_algorithm(row, frameworks), rows,
+                                                self.args.workers, self.log_buffer, order):
+                if file_ref_id and f'"{file_ref_id}"' not in self.file_reference_ids:
+                    self.file_reference_ids.append(f'"{file_ref_id}"') # Add quotes as per bash output
+
         finally:
+            self.uploads.shutdown()
+            self.poller.stop()
             self.create_file_reference_csv()
-            self.logout()
+            if self.inventory:
+                self.inventory.close()
+            self.client.logout()
 
 def main():
     parser = argparse.ArgumentParser(description="Create Algorithms from CSV list")
@@ -408,6 +452,16 @@ def main():
     # session.trust_env = False if bypass is true.
     
     parser.add_argument('-k', '--https-insecure', action='store_true', help="Make Https Insecure (Switch to HTTPS and ignore certs)")
+    parser.add_argument('-w', '--workers', type=int, default=DEFAULT_WORKERS, help="Number of Algorithms created in parallel")
+    parser.add_argument('-u', '--upload-workers', type=int, default=DEFAULT_UPLOAD_WORKERS, help="Number of lookup files uploaded in parallel")
+    parser.add_argument('--token-cache', action='store_true', help="Reuse the engine token between runs (CONFIG.tokens)")
+    parser.add_argument('--connect-timeout', type=float, default=DEFAULT_CONNECT_TIMEOUT, help="Seconds to wait for a connection to the engine")
+    parser.add_argument('--read-timeout', type=float, default=DEFAULT_READ_TIMEOUT, help="Seconds to wait for the answer to a call (lookup file uploads wait at least 300)")
+    parser.add_argument('--hedge', action='store_true', help="Send a read (list, framework, async task status) again if it has not answered within its usual 95th percentile time")
+    parser.add_argument('--inventory', action='store_true', help="Keep the local inventory of the engine up to date with the objects changed here")
+    parser.add_argument('-m', '--manifest', help="Manifest written by dpxcc_catalog.py compile, read instead of the CSV and JSON files")
+    parser.add_argument('--no-upload-cache', action='store_true', help="Always upload lookup files, even if unchanged since the last upload")
+    parser.add_argument('--resume', action='store_true', help="Skip the Algorithms the previous run created (journal), only send the failed and remaining ones")
     
     args = parser.parse_args()
     
@@ -1,144 +1,51 @@
 #!/usr/bin/env python3
 
 import argparse
-import base64
 import json
-import logging
 import os
 import sys
-import requests
-from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from dpxcc import DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT, DeployJournal, EngineClient, Inventory, setup_logging
+from dpxcc.journal import DONE, FAILED
 
 # Configuration Defaults
-DEFAULT_API_VER = "v5.1.27"
 DEFAULT_ALGO_FILE = "crt_algorithms.csv"
-CONFIG_FILE = "CONFIG"
 
 class AlgorithmDeleter:
     def __init__(self, args):
         self.args = args
-        self.masking_engine = ""
-        self.api_base_url = ""
-        self.auth_header = {}
-        self.session = requests.Session()
-        self.setup_logging()
-
-    def setup_logging(self):
-        log_date = datetime.now().strftime('%d%m%Y_%H%M%S')
-        log_file_name = self.args.log_file if self.args.log_file else f"dpxcc_delete_algorithms_{log_date}.log"
-        
-        file_handler = logging.FileHandler(log_file_name)
-        console_handler = logging.StreamHandler(sys.stderr)
-
-        formatter = logging.Formatter('[%(asctime)s] %(message)s', datefmt='%d%m%Y %H:%M:%S')
-        file_handler.setFormatter(formatter)
-        console_handler.setFormatter(formatter)
-
-        self.logger = logging.getLogger()
-        self.logger.setLevel(logging.INFO)
-        self.logger.addHandler(file_handler)
-        self.logger.addHandler(console_handler)
+        self.logger, self.log_file_name = setup_logging(args.log_file, "dpxcc_delete_algorithms")
+        self.client = EngineClient(args, self.log)
+        self.inventory = Inventory(self.client, self.log, persistent=True) if args.inventory else None
+        self.journal = None  # DeployJournal, needs the engine from CONFIG
 
     def log(self, message):
         self.logger.info(message)
 
-    def read_config(self):
-        if not os.path.exists(CONFIG_FILE):
-            self.log(f"Error: {CONFIG_FILE} not found!")
-            sys.exit(1)
-        
-        try:
-            with open(CONFIG_FILE, 'r') as f:
-                lines = f.readlines()
-                encoded_user = lines[0].strip()
-                encoded_pass = lines[1].strip()
-                self.masking_engine = lines[2].strip()
-            
-            username = base64.b64decode(encoded_user).decode('utf-8')
-            password = base64.b64decode(encoded_pass).decode('utf-8')
-            
-            if self.args.https_insecure:
-                self.protocol = "https"
-                self.verify_ssl = False
-            else:
-                self.protocol = "http"
-                self.verify_ssl = True
-            
-            self.api_base_url = f"{self.protocol}://{self.masking_engine}/masking/api/{DEFAULT_API_VER}"
-            return username, password
-
-        except Exception as e:
-            self.log(f"Error reading CONFIG: {e}")
-            sys.exit(1)
-
-    def check_connection(self):
-        url = f"{self.protocol}://{self.masking_engine}"
-        self.log(f"Checking connection to {url}...")
-        try:
-            response = requests.get(url, timeout=5, verify=self.verify_ssl)
-            response.raise_for_status()
-            self.log(f"Connection to {url} successful.")
-        except requests.exceptions.RequestException as e:
-            self.log(f"Error connecting to {url}: {e}")
-            sys.exit(1)
-
-    def login(self, username, password):
-        api_endpoint = f"{self.api_base_url}/login"
-        payload = {"username": username, "password": password}
-        self.log(f"Logging in with {username} ...")
-        
-        try:
-            response = self.session.post(api_endpoint, json=payload, verify=self.verify_ssl)
-            
-            if response.status_code != 200:
-                self.log(f"Login failed: {response.status_code} - {response.text}")
-                sys.exit(1)
-                
-            data = response.json()
-            if 'Authorization' not in data:
-                self.log(f"Login failed: No Authorization token. Response: {data}")
-                sys.exit(1)
-                
-            self.auth_header = {'Authorization': data['Authorization']}
-            self.session.headers.update(self.auth_header)
-            self.log(f"{username} logged in successfully with token {data['Authorization']}")
-            
-        except Exception as e:
-            self.log(f"Login exception: {e}")
-            sys.exit(1)
-
-    def logout(self):
-        if not self.auth_header:
-            return
-        self.log("Logging out ...")
-        try:
-            api_endpoint = f"{self.api_base_url}/logout"
-            response = self.session.put(api_endpoint, verify=self.verify_ssl)
-            self.log(f"Response Code: {response.status_code} - Response Body: {response.text}")
-            self.log("Logged out successfully.")
-        except Exception as e:
-            self.log(f"Logout exception: {e}")
-
     def delete_algorithm(self, algo_name):
         self.log(f"Deleting Algorithm {algo_name} ...")
         
         # Try deleting by name directly as requested
-        api_endpoint = f"{self.api_base_url}/algorithms/{algo_name}"
+        api_endpoint = f"algorithms/{algo_name}"
         
         try:
-            response = self.session.delete(api_endpoint, verify=self.verify_ssl)
+            response = self.client.delete(api_endpoint)
             
             if response.status_code == 204: # No Content = Success in many APIs
                  self.log(f"Algorithm: {algo_name} deleted (204 No Content).")
-                 return
+                 self.forget(algo_name)
+                 return True
 
             if response.status_code == 200: # Some APIs return 200 OK
                  self.log(f"Algorithm: {algo_name} deleted (200 OK).")
-                 return
+                 self.forget(algo_name)
+                 return True
 
             if response.status_code == 404:
                  self.log(f"Algorithm: {algo_name} not found.")
-                 return
+                 self.forget(algo_name)
+                 return True
 
             # If failed, check response error
             self.check_response_error("delete_algorithm", f"algorithms/{algo_name}", response)
@@ -146,19 +53,36 @@ class AlgorithmDeleter:
         except Exception as e:
              self.log(f"Delete algorithm exception: {e}")
              if not self.args.ignore_errors:
-                 self.logout()
+                 self.client.logout()
                  sys.exit(1)
+        return False
+
+    def process_algorithm(self, algo_name):
+        if self.args.resume and self.journal.completed("algorithms", algo_name):
+            self.log(f"Algorithm: {algo_name} already deleted by the previous run.")
+            return
+        done = False
+        try:
+            done = self.delete_algorithm(algo_name)
+        finally:
+            # Also when delete_algorithm exits: --resume then retries it
+            self.journal.record("algorithms", algo_name, DONE if done else FAILED)
+
+    def forget(self, algo_name):
+        if self.inventory:
+            self.inventory.remove("algorithms", algo_name)
 
     def check_response_error(self, func_name, api_name, response):
         self.log(f"{func_name}() -> Function: {func_name}() - Api: {api_name} - Response Code: {response.status_code} - Response Body: {response.text}")
         if not self.args.ignore_errors:
-            self.logout()
+            self.client.logout()
             sys.exit(1)
 
     def run(self):
-        username, password = self.read_config()
-        self.check_connection()
-        self.login(username, password)
+        username, password = self.client.read_config()
+        self.client.check_connection()
+        self.client.login(username, password)
+        self.journal = DeployJournal(self.client.masking_engine, "dpxcc_delete_algorithms", self.log, self.args.resume)
         
         if not os.path.exists(self.args.algorithms_file) and not self.args.ignore_errors:
              self.log(f"Input CSV file {self.args.algorithms_file} missing")
@@ -176,6 +100,11 @@ class AlgorithmDeleter:
                         continue
                         
                     json_name = parts[0]
+
+                    # dlt_algorithms.csv lists names: no JSON to read
+                    if not json_name.lower().endswith(".json"):
+                        self.process_algorithm(json_name)
+                        continue
                     
                     if not os.path.exists(json_name):
                         self.log(f"Warning: JSON file {json_name} not found locally. Cannot determine Algorithm Name to delete.")
@@ -187,7 +116,7 @@ class AlgorithmDeleter:
                             algo_name = algo_json.get('algorithmName')
                             
                             if algo_name:
-                                self.delete_algorithm(algo_name)
+                                self.process_algorithm(algo_name)
                             else:
                                 self.log(f"No algorithmName found in {json_name}")
                                 
@@ -196,14 +125,22 @@ class AlgorithmDeleter:
                          continue
                     
         finally:
-            self.logout()
+            if self.inventory:
+                self.inventory.close()
+            self.client.logout()
 
 def main():
     parser = argparse.ArgumentParser(description="Delete Algorithms from CSV list")
-    parser.add_argument('-a', '--algorithms-file', default=DEFAULT_ALGO_FILE, help="File containing Algorithms")
+    parser.add_argument('-a', '--algorithms-file', default=DEFAULT_ALGO_FILE, help="File containing Algorithms (JSON files as in crt_algorithms.csv, or names as in dlt_algorithms.csv)")
     parser.add_argument('-i', '--ignore-errors', action='store_true', help="Ignore errors")
     parser.add_argument('-o', '--log-file', help="Log file name")
     parser.add_argument('-k', '--https-insecure', action='store_true', help="Make Https Insecure")
+    parser.add_argument('--token-cache', action='store_true', help="Reuse the engine token between runs (CONFIG.tokens)")
+    parser.add_argument('--connect-timeout', type=float, default=DEFAULT_CONNECT_TIMEOUT, help="Seconds to wait for a connection to the engine")
+    parser.add_argument('--read-timeout', type=float, default=DEFAULT_READ_TIMEOUT, help="Seconds to wait for the answer to a call (lookup file uploads wait at least 300)")
+    parser.add_argument('--hedge', action='store_true', help="Send a read (list, framework, async task status) again if it has not answered within its usual 95th percentile time")
+    parser.add_argument('--inventory', action='store_true', help="Keep the local inventory of the engine up to date with the objects changed here")
+    parser.add_argument('--resume', action='store_true', help="Skip the Algorithms the previous run deleted (journal), only retry the failed and remaining ones")
     
     args = parser.parse_args()
     
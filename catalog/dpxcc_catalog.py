@@ -0,0 +1,602 @@
+#!/usr/bin/env python3
+
+import argparse
+import copy
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from dpxcc import (CATALOG_KINDS, CONFIG_FILE, DEFAULT_BUNDLE, DEFAULT_CONNECT_TIMEOUT, DEFAULT_ENGINES_FILE,
+                   DEFAULT_MANIFEST, DEFAULT_POOL_SIZE, DEFAULT_READ_TIMEOUT, AsyncTaskPoller, BundleError,
+                   CatalogChange, EngineClient, FileReferences, FrameworkCatalog, Inventory, LogBuffer, ManifestError,
+                   PageError, Paginator, RunSummary, UploadCache, build_bundle, build_manifest, catalog_frameworks,
+                   fetch_engine_catalog, file_reference_gone, format_table, load_bundle, load_local_catalog,
+                   load_manifest, plan_catalog, read_deletions, read_engines_file, referenced_algorithms,
+                   resolve_frameworks, run_graph, run_ordered, save_bundle, save_manifest, select_syncable,
+                   setup_logging, topological_order)
+from dpxcc.bundle import EXPORT_API, IMPORT_API, SYNCABLE_API
+from dpxcc.catalog import ID_KEYS
+from dpxcc.manifest import manifest_catalog
+
+# Configuration Defaults
+DEFAULT_ROOT = os.pardir
+DEFAULT_WORKERS = 1
+
+class CatalogDeployer:
+    def __init__(self, args, logger=None, config_file=CONFIG_FILE, name=None):
+        self.args = args
+        if logger is None:
+            self.logger, self.log_file_name = setup_logging(args.log_file, "dpxcc_catalog")
+        else:
+            self.logger = logger
+        self.prefix = f"[{name}] " if name else ""  # engine name when deploying to several
+        self.log_buffer = LogBuffer(self.logger)
+        self.client = EngineClient(args, self.log, pool_size=max(DEFAULT_POOL_SIZE, args.workers),
+                                   config_file=config_file)
+        self.poller = AsyncTaskPoller(self.client)
+        self.framework_catalog = FrameworkCatalog(self.client, self.log)
+        self.kinds = [kind for kind in CATALOG_KINDS if kind in args.types.split(',')]
+        self.upload_cache = None  # UploadCache, needs the engine from CONFIG
+        self.file_refs = None
+        self.inventory = None  # Inventory, for teardown
+        self.engine = {}
+        self.frameworks = {}
+        self.summary = RunSummary("changes", headers=("Type", "Name", "Status", "Seconds"))
+        self.upload_locks = {}  # lookup file -> Lock, one upload per file
+        self.upload_locks_lock = threading.Lock()
+
+    def log(self, message):
+        self.log_buffer.log(f"{self.prefix}{message}")
+
+    def check_response_error(self, func_name, api_name, response):
+        self.log(f"{func_name}() -> Function: {func_name}() - Api: {api_name} - Response Code: {response.status_code} - Response Body: {response.text}")
+        if not self.args.ignore_errors:
+            self.client.logout()
+            sys.exit(1)
+
+    def fetch_engine_state(self):
+        self.log("Fetching engine catalog ...")
+        started = time.monotonic()
+        try:
+            self.engine = fetch_engine_catalog(self.client, self.kinds)
+        except PageError as e:
+            self.log(f"Error fetching {e.api} {e}")
+            self.client.logout()
+            sys.exit(1)
+        except Exception as e:
+            self.log(f"Exception fetching engine catalog: {e}")
+            self.client.logout()
+            sys.exit(1)
+        counts = ", ".join(f"{len(self.engine[kind])} {kind}" for kind in self.kinds)
+        self.log(f"Engine catalog: {counts} ({time.monotonic() - started:.1f} seconds).")
+
+    def load_frameworks(self):
+        try:
+            self.frameworks = catalog_frameworks(self.framework_catalog, self.kinds)
+        except PageError as e:
+            self.log(f"Error fetching {e.api} {e}")
+            self.client.logout()
+            sys.exit(1)
+
+    def read_catalog(self):
+        # The JSON files, with frameworks resolved for this engine
+        objects, deletions, problems = load_local_catalog(self.args.root, self.kinds)
+        for problem in problems:
+            self.log(f"Warning: {problem}")
+            if not self.args.ignore_errors:
+                self.client.logout()
+                sys.exit(1)
+
+        self.load_frameworks()
+        for items in objects.values():
+            for obj in items.values():
+                resolve_frameworks(obj, self.frameworks)
+        return objects, deletions
+
+    def read_manifest(self):
+        try:
+            manifest = load_manifest(self.args.manifest, self.client.masking_engine)
+        except ManifestError as e:
+            self.log(f"Error: {e}. Run dpxcc_catalog.py compile again.")
+            self.client.logout()
+            sys.exit(1)
+        objects, deletions = manifest_catalog(manifest, self.args.manifest)
+        self.log(f"Catalog read from {self.args.manifest} "
+                 f"({sum(len(objects.get(kind, {})) for kind in self.kinds)} objects).")
+        return ({kind: objects.get(kind, {}) for kind in self.kinds},
+                {kind: deletions.get(kind, []) for kind in self.kinds})
+
+    def plan(self):
+        objects, deletions = self.read_manifest() if self.args.manifest else self.read_catalog()
+        self.fetch_engine_state()
+        changes = plan_catalog(objects, deletions, self.engine, self.file_refs, prune=self.args.prune)
+        self.log_plan(changes)
+        return changes
+
+    def compile(self):
+        manifest_path = self.args.manifest or DEFAULT_MANIFEST
+        started = time.monotonic()
+        objects, deletions = self.read_catalog()
+        for items in objects.values():
+            for obj in items.values():
+                if not obj.resolved and obj.kind in ("algorithms", "classifiers"):
+                    self.log(f"Warning: Framework {obj.framework} of {obj.kind} {obj.name} not found on the engine.")
+                self.attach_file_references(obj)
+
+        manifest = build_manifest(self.args.root, objects, deletions, self.client.masking_engine,
+                                  self.client.api_version, self.file_refs, manifest_path)
+        save_manifest(manifest_path, manifest)
+        counts = ", ".join(f"{len(objects[kind])} {kind}" for kind in self.kinds)
+        self.log(f"Manifest {manifest_path} written: {counts} ({time.monotonic() - started:.1f} seconds).")
+
+    def log_plan(self, changes):
+        rows = [(change.kind, change.name, change.action, ", ".join(change.fields))
+                for change in changes if change.action != "unchanged" or self.args.verbose]
+        if rows:
+            for line in format_table(("Type", "Name", "Action", "Changed fields"), rows):
+                self.log(line)
+
+        counts = {action: sum(1 for change in changes if change.action == action)
+                  for action in ("create", "update", "unchanged", "delete")}
+        self.log(f"Plan: {counts['create']} to create, {counts['update']} to update, "
+                 f"{counts['unchanged']} unchanged, {counts['delete']} to delete.")
+
+    def upload_file(self, file_path):
+        self.log(f"Uploading file {file_path} ...")
+        try:
+            response = self.client.upload(file_path, permanent=True)
+            if response.status_code != 200:
+                self.check_response_error("upload_file", "file-uploads", response)
+                return None
+            file_ref_id = response.json().get('fileReferenceId')
+            if file_ref_id:
+                self.log(f"File: {file_path} uploaded - ID: {file_ref_id}")
+                self.upload_cache.store(file_path, file_ref_id)
+            return file_ref_id
+        except Exception as e:
+            self.log(f"Upload file exception: {e}")
+            if not self.args.ignore_errors:
+                self.client.logout()
+                sys.exit(1)
+            return None
+
+    def attach_file_references(self, obj, stale_refs=()):
+        # Point every lookup file of the payload at an uploaded copy of the
+        # local file, uploading it if the engine has no copy of its contents.
+        for container, key in obj.file_references():
+            file_path = self.file_refs.path(container[key])
+            if not file_path:
+                continue
+            if container[key] in stale_refs:
+                self.log(f"File reference {container[key]} no longer exists on the engine.")
+                self.upload_cache.invalidate(container[key])
+            with self.upload_lock(file_path):
+                file_ref_id = self.file_refs.lookup(file_path) or self.upload_file(file_path)
+            if file_ref_id:
+                container[key] = file_ref_id
+
+    def upload_lock(self, file_path):
+        # Objects sharing a lookup file must not upload it twice
+        with self.upload_locks_lock:
+            return self.upload_locks.setdefault(os.path.abspath(file_path), threading.Lock())
+
+    def build_payload(self, obj):
+        if obj.kind != "profile-sets":
+            return obj.payload
+
+        classifier_ids = []
+        missing = []
+        for name in obj.payload.get('classifierNames', []):
+            clf = self.engine.get("classifiers", {}).get(name)
+            if clf and clf.get('classifierId'):
+                classifier_ids.append(clf['classifierId'])
+            else:
+                missing.append(name)
+        if missing:
+            # A partial list would remove the missing classifiers from the profile set
+            self.log(f"Error: Classifier {', '.join(missing)} not found on the engine for Profile Set {obj.name}, "
+                     f"not submitted.")
+            return None
+        return {
+            "profileSetName": obj.name,
+            "classifierIds": classifier_ids,
+            "description": obj.payload.get('description', ''),
+        }
+
+    def object_endpoint(self, kind, name, remote):
+        id_key = ID_KEYS[kind]
+        return f"{kind}/{remote[id_key] if id_key else name}"
+
+    def wait_for_async_task(self, async_task_id):
+        self.log(f"Checking status of async task {async_task_id} ...")
+        response = self.poller.wait(async_task_id)
+        if response.status_code != 200:
+            self.check_response_error("wait_for_async_task", f"async-tasks/{async_task_id}", response)
+            return False
+        data = response.json()
+        if data.get('status') != 'SUCCEEDED':
+            self.log(f"Async task {async_task_id} failed.")
+            self.log(f"Response Body: {json.dumps(data)}")
+            if not self.args.ignore_errors:
+                self.client.logout()
+                sys.exit(1)
+            return False
+        return True
+
+    def submit(self, change):
+        obj = change.local
+        if change.action == "create":
+            method, api_endpoint = "POST", change.kind
+        else:
+            method, api_endpoint = "PUT", self.object_endpoint(change.kind, change.name, change.remote)
+        self.log(f"{'Creating' if change.action == 'create' else 'Updating'} {change.kind} {change.name} ...")
+
+        try:
+            self.attach_file_references(obj)
+            payload = self.build_payload(obj)
+            if payload is None:
+                if not self.args.ignore_errors:
+                    self.client.logout()
+                    sys.exit(1)
+                return "failed"
+            response = self.client.request(method, api_endpoint, json=payload)
+
+            stale_refs = {container[key] for container, key in obj.file_references()
+                          if file_reference_gone(response, container[key])}
+            if stale_refs:
+                self.attach_file_references(obj, stale_refs)
+                response = self.client.request(method, api_endpoint, json=self.build_payload(obj))
+
+            if response.status_code != 200:
+                self.check_response_error("submit", api_endpoint, response)
+                return "failed"
+
+            data = response.json() if response.text else {}
+            if data.get('asyncTaskId') and not self.wait_for_async_task(data['asyncTaskId']):
+                return "failed"
+            id_key = ID_KEYS[change.kind]
+            if id_key and id_key in data:
+                # New classifiers get an id that profile sets need
+                self.engine[change.kind][change.name] = data
+            self.log(f"{change.kind} {change.name} {change.action}d.")
+            return f"{change.action}d"
+
+        except Exception as e:
+            self.log(f"Submit exception: {e}")
+            if not self.args.ignore_errors:
+                self.client.logout()
+                sys.exit(1)
+            return "failed"
+
+    def delete(self, change):
+        api_endpoint = self.object_endpoint(change.kind, change.name, change.remote)
+        self.log(f"Deleting {change.kind} {change.name} ...")
+        try:
+            response = self.client.delete(api_endpoint)
+            if response.status_code in (200, 204, 404):
+                # 404: already gone, which is what we wanted
+                self.log(f"{change.kind} {change.name} {'not found' if response.status_code == 404 else 'deleted'}.")
+                if self.inventory:
+                    self.inventory.remove(change.kind, change.name)
+                return "not found" if response.status_code == 404 else "deleted"
+            self.check_response_error("delete", api_endpoint, response)
+        except Exception as e:
+            self.log(f"Delete exception: {e}")
+            if not self.args.ignore_errors:
+                self.client.logout()
+                sys.exit(1)
+        return "failed"
+
+    def apply_order(self, changes):
+        # Kinds in creation order; within algorithms, referenced ones first
+        # (e.g. FullName after FirstName/LastName), as the create script does.
+        ordered = []
+        for kind in self.kinds:
+            pending = [change for change in changes if change.kind == kind and change.action in ("create", "update")]
+            if kind == "algorithms":
+                names = [change.name for change in pending]
+                dependencies = {index: referenced_algorithms(change.local.payload.get('algorithmExtension'))
+                                for index, change in enumerate(pending)}
+                pending = [pending[index] for index in topological_order(names, dependencies)]
+            ordered.extend(pending)
+        ordered.extend(change for change in changes if change.action == "delete")
+        return ordered
+
+    def references(self, change):
+        # (kind, name) of the objects a payload needs on the engine
+        payload = change.local.payload
+        if change.kind == "algorithms":
+            return [("algorithms", name) for name in referenced_algorithms(payload.get('algorithmExtension'))]
+        if change.kind == "domains":
+            return [("algorithms", payload[key]) for key in ('defaultAlgorithmCode', 'defaultTokenizationCode')
+                    if payload.get(key)]
+        if change.kind == "classifiers":
+            return [("domains", payload['domainName'])] if payload.get('domainName') else []
+        return [("classifiers", name) for name in payload.get('classifierNames', [])]
+
+    def dependency_graph(self, submissions):
+        # Only objects created/updated in this run are waited for; the
+        # rest already exist on the engine (or will fail there).
+        position = {(change.kind, change.name): index for index, change in enumerate(submissions)}
+        return {index: {position[ref] for ref in self.references(change) if ref in position}
+                for index, change in enumerate(submissions)}
+
+    def apply_change(self, change):
+        started = time.monotonic()
+        status = self.delete(change) if change.action == "delete" else self.submit(change)
+        return status, time.monotonic() - started
+
+    def apply(self, changes):
+        ordered = self.apply_order(changes)
+        if not ordered:
+            self.log("Nothing to apply.")
+            return
+
+        submissions = [change for change in ordered if change.action != "delete"]
+        deletions = [change for change in ordered if change.action == "delete"]
+        self.log(f"Applying {len(ordered)} changes with {self.args.workers} workers ...")
+
+        # Each object starts as soon as what it references is in place, so
+        # e.g. classifiers of a ready domain go while other algorithms are
+        # still in their async tasks.
+        started = time.monotonic()
+        results = run_graph(self.apply_change, submissions, self.dependency_graph(submissions), self.args.workers,
+                            self.log_buffer, succeeded=lambda result: result is not None and result[0] != "failed")
+        for change, result in results:
+            if result is None:
+                self.log(f"{change.kind} {change.name} skipped: an object it references failed.")
+                self.summary.add(change.kind, change.name, "skipped")
+            else:
+                self.summary.add(change.kind, change.name, *result)
+
+        self.delete_tiers(deletions)
+        self.log(f"Applied in {time.monotonic() - started:.1f} seconds.")
+
+    def delete_tiers(self, deletions):
+        # Whatever references an object goes first: profile sets, then
+        # classifiers, domains and algorithms. Each tier runs in parallel.
+        for kind in reversed(self.kinds):
+            tier = [change for change in deletions if change.kind == kind]
+            if not tier:
+                continue
+            self.log(f"Deleting {len(tier)} {kind} with {self.args.workers} workers ...")
+            for change, result in run_ordered(self.apply_change, tier, self.args.workers, self.log_buffer):
+                self.summary.add(change.kind, change.name, *result)
+
+    def teardown(self):
+        deletions = self.read_manifest()[1] if self.args.manifest else read_deletions(self.args.root, self.kinds)
+        self.inventory = Inventory(self.client, self.log, persistent=self.args.inventory)
+
+        # One listing per kind resolves every name (and id) to delete
+        changes = []
+        for kind in self.kinds:
+            if not deletions.get(kind):
+                continue
+            try:
+                self.inventory.refresh(kind)
+            except PageError as e:
+                self.check_response_error("teardown", kind, e.response)
+                continue
+            for name in dict.fromkeys(deletions[kind]):
+                remote = self.inventory.get(kind, name, refresh_missing=False)
+                if remote is None:
+                    self.log(f"{kind} {name} not found on the engine.")
+                    self.summary.add(kind, name, "not found")
+                else:
+                    changes.append(CatalogChange(kind, name, "delete", remote=remote))
+
+        if not changes:
+            self.log("Nothing to delete.")
+            return
+        started = time.monotonic()
+        self.delete_tiers(changes)
+        self.log(f"Deleted in {time.monotonic() - started:.1f} seconds.")
+
+    def export_bundle(self):
+        # The catalog's objects as they are on this engine, in one export
+        # document that import_bundle() sends to other engines in one call.
+        bundle_path = self.args.bundle or DEFAULT_BUNDLE
+        started = time.monotonic()
+        objects = self.read_manifest()[0] if self.args.manifest else self.read_catalog()[0]
+        names = {kind: list(objects[kind]) for kind in self.kinds}
+        self.fetch_engine_state()
+        try:
+            syncables = list(Paginator(self.client, SYNCABLE_API))
+        except PageError as e:
+            self.check_response_error("export_bundle", SYNCABLE_API, e.response)
+            return
+
+        selected, found = select_syncable(syncables, names, self.engine)
+        missing = [(kind, name) for kind in self.kinds for name in names[kind] if name not in found[kind]]
+        for kind, name in missing:
+            self.log(f"Warning: {kind} {name} is not a syncable object of the engine, not exported.")
+            self.summary.add(kind, name, "not exported")
+        if missing and not self.args.ignore_errors:
+            self.log("Create the missing objects on this engine (apply) before exporting.")
+            self.client.logout()
+            sys.exit(1)
+        if not selected:
+            self.log("Nothing to export.")
+            return
+
+        self.log(f"Exporting {len(selected)} objects ...")
+        # Read only, and it carries the lookup files: retried, with the upload timeout
+        response = self.client.post(EXPORT_API, json=selected, timeout=self.client.upload_timeout, retry=True)
+        if response.status_code != 200:
+            self.check_response_error("export_bundle", EXPORT_API, response)
+            return
+
+        save_bundle(bundle_path, build_bundle(response.json(), self.client.masking_engine,
+                                              self.client.api_version, found))
+        for kind in self.kinds:
+            for name in found[kind]:
+                self.summary.add(kind, name, "exported")
+        counts = ", ".join(f"{len(found[kind])} {kind}" for kind in self.kinds)
+        self.log(f"Bundle {bundle_path} written: {counts} ({time.monotonic() - started:.1f} seconds).")
+
+    def import_bundle(self):
+        bundle_path = self.args.bundle or DEFAULT_BUNDLE
+        try:
+            bundle = load_bundle(bundle_path)
+        except BundleError as e:
+            self.log(f"Error: {e}. Run dpxcc_catalog.py export first.")
+            self.client.logout()
+            sys.exit(1)
+
+        # The document is signed by the exporting engine and goes as a
+        # whole, whatever -t says; all of its kinds are verified.
+        objects = bundle.get('objects', {})
+        self.kinds = [kind for kind in CATALOG_KINDS if objects.get(kind)]
+        started = time.monotonic()
+        self.log(f"Importing {sum(len(objects[kind]) for kind in self.kinds)} objects from {bundle_path} "
+                 f"(exported from {bundle.get('engine')}) ...")
+        response = self.client.post(IMPORT_API, params={"force_overwrite": "true"}, json=bundle['document'],
+                                    timeout=self.client.upload_timeout)
+        if response.status_code != 200:
+            self.check_response_error("import_bundle", IMPORT_API, response)
+            return
+        data = response.json() if response.text else {}
+        if data.get('asyncTaskId'):
+            self.wait_for_async_task(data['asyncTaskId'])
+
+        # One listing per kind tells what the import left on the engine
+        self.fetch_engine_state()
+        missing = 0
+        for kind in self.kinds:
+            for name in objects[kind]:
+                if name in self.engine[kind]:
+                    self.summary.add(kind, name, "imported")
+                else:
+                    self.log(f"{kind} {name} not found on the engine after the import.")
+                    self.summary.add(kind, name, "failed")
+                    missing += 1
+        self.log(f"Imported in {time.monotonic() - started:.1f} seconds"
+                 f"{f', {missing} objects missing' if missing else ''}.")
+        if missing and not self.args.ignore_errors:
+            sys.exit(1)
+
+    def run(self):
+        username, password = self.client.read_config()
+        self.client.check_connection()
+        self.client.login(username, password)
+        self.upload_cache = UploadCache(self.client.masking_engine)
+        self.file_refs = FileReferences(self.upload_cache, os.path.join(self.args.root, "algorithms"))
+
+        try:
+            if self.args.action == "compile":
+                self.compile()
+            elif self.args.action == "teardown":
+                self.teardown()
+            elif self.args.action == "export":
+                self.export_bundle()
+            elif self.args.action == "import":
+                self.import_bundle()
+            else:
+                changes = self.plan()
+                if self.args.action == "apply":
+                    self.apply(changes)
+        finally:
+            self.poller.stop()
+            self.summary.log_table(self.log)
+            if self.inventory:
+                self.inventory.close()
+            self.client.logout()
+
+class FleetDeployer:
+    """Runs the same action against every engine of an engines file.
+
+    Each engine gets its own CatalogDeployer, so its own connection pool,
+    workers, framework IDs and file references; all of them run at once.
+    """
+
+    def __init__(self, args):
+        self.args = args
+        self.logger, self.log_file_name = setup_logging(args.log_file, "dpxcc_catalog")
+        self.log_buffer = LogBuffer(self.logger)
+
+    def log(self, message):
+        self.log_buffer.log(message)
+
+    def deploy(self, target):
+        engine_args = copy.copy(self.args)
+        engine_args.workers = target.workers or self.args.workers
+        started = time.monotonic()
+        deployer = None
+        try:
+            deployer = CatalogDeployer(engine_args, self.logger, target.config_file, target.name)
+            deployer.run()
+            counts = deployer.summary.counts()
+            status = "failed" if counts.get("failed") else "ok"
+        except SystemExit:
+            # A deployer stops on the first error unless -i; the others go on
+            counts = deployer.summary.counts() if deployer else {}
+            status = "failed"
+        except Exception as e:
+            self.log(f"[{target.name}] Exception: {e}")
+            counts = deployer.summary.counts() if deployer else {}
+            status = "failed"
+        engine = deployer.client.masking_engine if deployer else ""
+        return engine, status, counts, time.monotonic() - started
+
+    def run(self):
+        try:
+            targets = read_engines_file(self.args.engines)
+        except (OSError, ValueError) as e:
+            self.log(f"Error reading {self.args.engines}: {e}")
+            sys.exit(1)
+        if not targets:
+            self.log(f"No engines in {self.args.engines}")
+            sys.exit(1)
+
+        self.log(f"{self.args.action} on {len(targets)} engines: {', '.join(target.name for target in targets)}")
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=len(targets), thread_name_prefix="dpxcc-engine") as executor:
+            results = list(executor.map(self.deploy, targets))
+        elapsed = time.monotonic() - started
+
+        statuses = sorted({status for _, _, counts, _ in results for status in counts})
+        rows = [(target.name, engine, status, *(counts.get(key, 0) for key in statuses), f"{seconds:.1f}")
+                for target, (engine, status, counts, seconds) in zip(targets, results)]
+        self.log(f"Summary of {len(targets)} engines:")
+        for line in format_table(("Engine", "Host", "Result", *statuses, "Seconds"), rows):
+            self.log(line)
+        self.log(f"Done in {elapsed:.1f} seconds (engines one after another: "
+                 f"{sum(result[3] for result in results):.1f} seconds).")
+        if any(result[1] != "ok" for result in results):
+            sys.exit(1)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the local catalog (algorithms, domains, classifiers, profile sets) with the engine and apply the differences")
+    parser.add_argument('action', choices=("compile", "plan", "apply", "teardown", "export", "import"), help="compile: resolve the JSON files for the engine into a manifest; plan: only show the differences; apply: also create/update (and with --prune delete) what differs; teardown: delete everything listed in dlt_*.csv; export: write the catalog's objects of this engine to a bundle; import: load a bundle into the engine in one call")
+    parser.add_argument('-e', '--engines', help=f"Engines file (e.g. {DEFAULT_ENGINES_FILE}) to run the action on every engine it lists, at the same time, instead of the one in CONFIG")
+    parser.add_argument('-m', '--manifest', help=f"Manifest written by compile (default {DEFAULT_MANIFEST}); plan and apply read it instead of the JSON files")
+    parser.add_argument('-b', '--bundle', help=f"Bundle file written by export and read by import (default {DEFAULT_BUNDLE})")
+    parser.add_argument('-r', '--root', default=DEFAULT_ROOT, help="Repository root holding the algorithms, domains, classifiers and profileset folders")
+    parser.add_argument('-t', '--types', default=",".join(CATALOG_KINDS), help="Comma separated object types to handle")
+    parser.add_argument('-p', '--prune', action='store_true', help="Also delete objects listed in dlt_*.csv that are not in crt_*.csv")
+    parser.add_argument('-w', '--workers', type=int, default=DEFAULT_WORKERS, help="Number of objects created/updated/deleted in parallel, in dependency order")
+    parser.add_argument('-v', '--verbose', action='store_true', help="List unchanged objects in the plan too")
+    parser.add_argument('-i', '--ignore-errors', action='store_true', help="Ignore errors")
+    parser.add_argument('-o', '--log-file', help="Log file name")
+    parser.add_argument('-k', '--https-insecure', action='store_true', help="Make Https Insecure")
+    parser.add_argument('--inventory', action='store_true', help="teardown: keep the local inventory of the engine up to date with the deleted objects")
+    parser.add_argument('--token-cache', action='store_true', help="Reuse the engine token between runs (CONFIG.tokens)")
+    parser.add_argument('--connect-timeout', type=float, default=DEFAULT_CONNECT_TIMEOUT, help="Seconds to wait for a connection to the engine")
+    parser.add_argument('--read-timeout', type=float, default=DEFAULT_READ_TIMEOUT, help="Seconds to wait for the answer to a call (lookup file uploads wait at least 300)")
+    parser.add_argument('--hedge', action='store_true', help="Send a read (list, framework, async task status) again if it has not answered within its usual 95th percentile time")
+
+    args = parser.parse_args()
+    if args.engines and (args.manifest or args.action == "compile"):
+        parser.error("a manifest is compiled for one engine: compile and --manifest cannot be used with --engines")
+    if args.engines and args.action == "export":
+        parser.error("a bundle is exported from one engine: export cannot be used with --engines")
+
+    deployer = FleetDeployer(args) if args.engines else CatalogDeployer(args)
+    deployer.run()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from dpxcc import (CATALOG_KINDS, CONFIG_FILE, cached_frameworks, cached_names, format_table, setup_logging,
+                   validate_catalog)
+from dpxcc.validation import ERROR, WARNING
+
+# Configuration Defaults
+DEFAULT_ROOT = os.pardir
+
+class CatalogValidator:
+    def __init__(self, args):
+        self.args = args
+        self.logger, self.log_file_name = setup_logging(args.log_file, "dpxcc_validate")
+        self.kinds = [kind for kind in CATALOG_KINDS if kind in args.types.split(',')]
+
+    def log(self, message):
+        self.logger.info(message)
+
+    def masking_engine(self):
+        # Only the engine name from CONFIG is needed: nothing is sent to it
+        if self.args.engine:
+            return self.args.engine
+        if not os.path.exists(CONFIG_FILE):
+            return None
+        try:
+            with open(CONFIG_FILE, 'r') as f:
+                return f.readlines()[2].strip()
+        except (OSError, IndexError):
+            return None
+
+    def load_engine_state(self):
+        masking_engine = self.masking_engine()
+        if not masking_engine:
+            self.log("Warning: No engine given (-e or CONFIG), framework and engine reference checks skipped.")
+            return None, None, {}
+
+        algorithm_frameworks = cached_frameworks(masking_engine, "algorithm/frameworks")
+        classifier_frameworks = cached_frameworks(masking_engine, "classifiers/frameworks")
+        if algorithm_frameworks is None:
+            self.log(f"Warning: No cached algorithm frameworks for {masking_engine}, run dpxcc_create_algorithms.py "
+                     f"or dpxcc_catalog.py plan once to cache them. Algorithm extensions not checked.")
+        else:
+            algorithm_frameworks = {fw.get('frameworkName'): fw for fw in algorithm_frameworks}
+        if classifier_frameworks is not None:
+            classifier_frameworks = {fw.get('frameworkName') for fw in classifier_frameworks}
+
+        known = {kind: cached_names(masking_engine, kind) for kind in CATALOG_KINDS}
+        if all(names is None for names in known.values()):
+            self.log(f"No inventory of {masking_engine}: references to objects outside the local catalog "
+                     f"are reported as warnings.")
+        return algorithm_frameworks, classifier_frameworks, known
+
+    def run(self):
+        algorithm_frameworks, classifier_frameworks, known = self.load_engine_state()
+
+        self.log(f"Validating {', '.join(self.kinds)} under {os.path.abspath(self.args.root)} ...")
+        started = time.monotonic()
+        checked, issues = validate_catalog(self.args.root, self.kinds, algorithm_frameworks, classifier_frameworks,
+                                           known, self.args.workers)
+
+        shown = [issue for issue in issues if issue.level == ERROR or not self.args.quiet]
+        if shown:
+            for line in format_table(("Level", "File", "Name", "Problem"), [issue.row() for issue in shown]):
+                self.log(line)
+
+        errors = sum(1 for issue in issues if issue.level == ERROR)
+        warnings = sum(1 for issue in issues if issue.level == WARNING)
+        self.log(f"{checked} files checked in {time.monotonic() - started:.1f} seconds: "
+                 f"{errors} errors, {warnings} warnings.")
+        if errors:
+            sys.exit(1)
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate the algorithm, domain, classifier and profile set JSON files listed in the crt_*.csv files without connecting to the engine")
+    parser.add_argument('-r', '--root', default=DEFAULT_ROOT, help="Repository root holding the algorithms, domains, classifiers and profileset folders")
+    parser.add_argument('-t', '--types', default=",".join(CATALOG_KINDS), help="Comma separated object types to validate")
+    parser.add_argument('-e', '--engine', help="Engine whose cached frameworks and inventory are used (default: from CONFIG)")
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count(), help="Number of processes reading the files")
+    parser.add_argument('-q', '--quiet', action='store_true', help="Only list errors, not warnings")
+    parser.add_argument('-o', '--log-file', help="Log file name")
+
+    args = parser.parse_args()
+
+    validator = CatalogValidator(args)
+    validator.run()
+
+if __name__ == "__main__":
+    main()
@@ -1,146 +1,50 @@
 #!/usr/bin/env python3
 
 import argparse
-import base64
 import csv
 import json
-import logging
 import os
 import sys
 import time
-import requests
-from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from dpxcc import (DEFAULT_CONNECT_TIMEOUT, DEFAULT_POOL_SIZE, DEFAULT_READ_TIMEOUT, DeployJournal, EngineClient,
+                   FrameworkCatalog, Inventory, LogBuffer, ManifestError, PageError, RunSummary, UploadCache,
+                   content_hash, file_reference_gone, load_manifest, manifest_entries, run_ordered, setup_logging)
+from dpxcc.journal import DONE
 
 # Configuration Defaults
-DEFAULT_API_VER = "v5.1.27"
-DEFAULT_KEEPALIVE = 300
 DEFAULT_CLASSIFIER_FILE = "crt_classifiers.csv"
-CONFIG_FILE = "CONFIG"
+DEFAULT_LOOKUP_DIR = os.path.join(os.pardir, "algorithms")
+DEFAULT_WORKERS = 1
 
 class ClassifierCreator:
     def __init__(self, args):
         self.args = args
-        self.masking_engine = ""
-        self.api_base_url = ""
-        self.auth_header = {}
-        self.session = requests.Session()
+        self.logger, self.log_file_name = setup_logging(args.log_file, "dpxcc_create_classifiers")
+        self.log_buffer = LogBuffer(self.logger)
+        self.client = EngineClient(args, self.log, pool_size=max(DEFAULT_POOL_SIZE, args.workers))
+        self.summary = RunSummary("classifiers")
+        self.inventory = Inventory(self.client, self.log, persistent=True) if args.inventory else None
+        self.framework_catalog = FrameworkCatalog(self.client, self.log)
         self.framework_map = {}
         self.file_ref_map = {}
-        
-        self.setup_logging()
-
-    def setup_logging(self):
-        log_date = datetime.now().strftime('%d%m%Y_%H%M%S')
-        log_file_name = self.args.log_file if self.args.log_file else f"dpxcc_create_classifiers_{log_date}.log"
-        
-        file_handler = logging.FileHandler(log_file_name)
-        console_handler = logging.StreamHandler(sys.stderr)
-
-        formatter = logging.Formatter('[%(asctime)s] %(message)s', datefmt='%d%m%Y %H:%M:%S')
-        file_handler.setFormatter(formatter)
-        console_handler.setFormatter(formatter)
-
-        self.logger = logging.getLogger()
-        self.logger.setLevel(logging.INFO)
-        self.logger.addHandler(file_handler)
-        self.logger.addHandler(console_handler)
+        self.upload_cache = None  # UploadCache, needs the engine from CONFIG
+        self.compiled = {}  # source file -> manifest entries, with --manifest
+        self.journal = None  # DeployJournal, needs the engine from CONFIG
 
     def log(self, message):
-        self.logger.info(message)
-
-    def read_config(self):
-        if not os.path.exists(CONFIG_FILE):
-            self.log(f"Error: {CONFIG_FILE} not found!")
-            sys.exit(1)
-        
-        try:
-            with open(CONFIG_FILE, 'r') as f:
-                lines = f.readlines()
-                encoded_user = lines[0].strip()
-                encoded_pass = lines[1].strip()
-                self.masking_engine = lines[2].strip()
-            
-            username = base64.b64decode(encoded_user).decode('utf-8')
-            password = base64.b64decode(encoded_pass).decode('utf-8')
-            
-            self.protocol = "https" if self.args.https_insecure else "http"
-            self.api_base_url = f"{self.protocol}://{self.masking_engine}/masking/api/{DEFAULT_API_VER}"
-            return username, password
-
-        except Exception as e:
-            self.log(f"Error reading CONFIG: {e}")
-            sys.exit(1)
-
-    def check_connection(self):
-        url = f"{self.protocol}://{self.masking_engine}"
-        self.log(f"Checking connection to {url}...")
-        try:
-            verify = False if self.protocol == "https" else True
-            response = requests.get(url, timeout=5, verify=verify)
-            response.raise_for_status()
-            self.log(f"Connection to {url} successful.")
-        except requests.exceptions.RequestException as e:
-            self.log(f"Error connecting to {url}: {e}")
-            sys.exit(1)
-
-    def login(self, username, password):
-        api_endpoint = f"{self.api_base_url}/login"
-        payload = {"username": username, "password": password}
-        self.log(f"Logging in with {username} ...")
-        
-        try:
-            verify = False if self.args.https_insecure else True
-            response = self.session.post(api_endpoint, json=payload, verify=verify)
-            
-            if response.status_code != 200:
-                self.log(f"Login failed: {response.status_code} - {response.text}")
-                sys.exit(1)
-                
-            data = response.json()
-            if 'Authorization' not in data:
-                self.log(f"Login failed: No Authorization token. Response: {data}")
-                sys.exit(1)
-                
-            self.auth_header = {'Authorization': data['Authorization']}
-            self.session.headers.update(self.auth_header)
-            self.log(f"{username} logged in successfully with token {data['Authorization']}")
-            
-        except Exception as e:
-            self.log(f"Login exception: {e}")
-            sys.exit(1)
-
-    def logout(self):
-        if not self.auth_header:
-            return
-        self.log("Logging out ...")
-        try:
-            api_endpoint = f"{self.api_base_url}/logout"
-            verify = False if self.args.https_insecure else True
-            response = self.session.put(api_endpoint, verify=verify)
-            self.log(f"Response Code: {response.status_code} - Response Body: {response.text}")
-            self.log("Logged out successfully.")
-        except Exception as e:
-            self.log(f"Logout exception: {e}")
+        self.log_buffer.log(message)
 
     def get_framework_map(self):
         self.log("Fetching classifier frameworks from API...")
-        api_endpoint = f"{self.api_base_url}/classifiers/frameworks"
-        params = {"include_schema": "false"}
-        
         try:
-            verify = False if self.args.https_insecure else True
-            response = self.session.get(api_endpoint, params=params, verify=verify)
-            
-            if response.status_code != 200:
-                self.check_response_error("get_framework_map", "classifiers/frameworks", response)
-                
-            data = response.json()
-            response_list = data.get('responseList', [])
-            
-            # Create map {frameworkName: frameworkId}
-            self.framework_map = {fw['frameworkName']: fw['frameworkId'] for fw in response_list}
+            # Create map {frameworkName: frameworkId}, cached per engine
+            self.framework_map = self.framework_catalog.classifiers().framework_ids
             self.log("Framework map populated successfully.")
             
+        except PageError as e:
+            self.check_response_error("get_framework_map", "classifiers/frameworks", e.response)
         except Exception as e:
             self.log(f"Get frameworks exception: {e}")
             sys.exit(1)
@@ -164,6 +68,62 @@ class ClassifierCreator:
         except Exception as e:
             self.log(f"Error loading file references: {e}")
 
+    def upload_file(self, file_path):
+        self.log(f"Uploading file {file_path} ...")
+
+        try:
+            response = self.client.upload(file_path, permanent=True)
+
+            if response.status_code != 200:
+                self.check_response_error("upload_file", "file-uploads", response)
+                return None
+
+            file_ref_id = response.json().get('fileReferenceId')
+            if file_ref_id:
+                self.log(f"File: {file_path} uploaded - ID: {file_ref_id}")
+                self.upload_cache.store(file_path, file_ref_id)
+            else:
+                self.log("File NOT uploaded (No ID returned)")
+            return file_ref_id
+
+        except Exception as e:
+            self.log(f"Upload file exception: {e}")
+            if not self.args.ignore_errors:
+                self.client.logout()
+                sys.exit(1)
+            return None
+
+    def resolve_file_reference(self, file_val):
+        filename = os.path.basename(file_val)
+        local_file = os.path.join(self.args.lookup_dir, filename)
+
+        # Same contents as a file already uploaded (by this script or by
+        # dpxcc_create_algorithms.py): reuse its reference.
+        if self.upload_cache and os.path.isfile(local_file):
+            file_ref_id = self.upload_cache.lookup(local_file)
+            if file_ref_id:
+                return file_ref_id
+            file_ref_id = self.upload_file(local_file)
+            if file_ref_id:
+                return file_ref_id
+
+        return self.file_ref_map.get(filename)
+
+    def refresh_file_references(self, properties, stale_refs):
+        # Cached uploads the engine no longer has are uploaded again.
+        modified = False
+        for vl in properties.get('valueLists', []):
+            file_val = vl.get('file')
+            if file_val not in stale_refs:
+                continue
+            self.log(f"File reference {file_val} no longer exists on the engine.")
+            self.upload_cache.invalidate(file_val)
+            new_uri = self.resolve_file_reference(file_val)
+            if new_uri and new_uri != file_val:
+                vl['file'] = new_uri
+                modified = True
+        return modified
+
     def sync_file_references(self, clf_json):
         # Search for "file" in valueLists to sync references
         # JSON structure: "properties": { "valueLists": [ { "file": "..." } ] }
@@ -177,10 +137,9 @@ class ClassifierCreator:
             for vl in value_lists:
                 file_val = vl.get('file')
                 if file_val:
-                    # Check if filename is in our map
                     current_filename = os.path.basename(file_val)
-                    if current_filename in self.file_ref_map:
-                        new_uri = self.file_ref_map[current_filename]
+                    new_uri = self.resolve_file_reference(file_val)
+                    if new_uri:
                         if file_val != new_uri:
                             self.log(f"Updating reference for {current_filename} to {new_uri}")
                             vl['file'] = new_uri
@@ -205,131 +164,226 @@ class ClassifierCreator:
         
         return clf_json, modified
 
-    def add_classifier(self, clf_payload):
+    def add_classifier(self, clf_payload, digest=None):
         clf_name = clf_payload.get('classifierName')
         self.log(f"Adding Classifier {clf_name} ...")
         
-        api_endpoint = f"{self.api_base_url}/classifiers"
+        api_endpoint = "classifiers"
         
         try:
-            verify = False if self.args.https_insecure else True
-            response = self.session.post(api_endpoint, json=clf_payload, verify=verify)
+            self.journal.sending("classifiers", clf_name, digest)
+            response = self.client.post(api_endpoint, json=clf_payload)
+
+            if self.upload_cache:
+                properties = clf_payload.get('classifierConfiguration') or {}
+                stale_refs = {vl.get('file') for vl in properties.get('valueLists', [])
+                              if file_reference_gone(response, vl.get('file'))}
+                if stale_refs and self.refresh_file_references(properties, stale_refs):
+                    response = self.client.post(api_endpoint, json=clf_payload)
+            self.journal.answered("classifiers", clf_name)
             
             # Check for "Classifier already exists"
             if response.status_code != 200:
                 error_msg = response.text
+                if "Classifier already exists" in error_msg and self.journal.attempted("classifiers", clf_name, digest):
+                    self.log(f"Classifier: {clf_name} already exists, created by the interrupted run.")
+                    self.journal.record("classifiers", clf_name, DONE, digest)
+                    return "exists"
                 if self.args.ignore_errors and "Classifier already exists" in error_msg:
                     self.log(f"Classifier: {clf_name} already exists. Ignoring.")
-                    return
+                    self.journal.record("classifiers", clf_name, DONE, digest)
+                    return "exists"
                 
                 self.check_response_error("add_classifier", "classifiers", response)
+                return "failed"
             
             data = response.json()
             if data.get('classifierName'):
                 self.log(f"Classifier: {clf_name} submitted for creation.")
+                if self.inventory:
+                    self.inventory.put("classifiers", data)
+                self.journal.record("classifiers", clf_name, DONE, digest, data.get('classifierId'))
+                return "created"
             else:
                 self.log(f"Classifier: {clf_name} NOT submitted for creation.")
                 
         except Exception as e:
             self.log(f"Add classifier exception: {e}")
             if not self.args.ignore_errors:
-                 self.logout()
+                 self.client.logout()
                  sys.exit(1)
+        return "failed"
+
+    def read_classifiers_file(self):
+        json_names = []
+        with open(self.args.classifiers_file, 'r') as csvfile:
+            for line in csvfile:
+                clean_line = line.replace('"', '').strip()
+                if not clean_line or clean_line.startswith('#'):
+                    continue
+                    
+                parts = clean_line.split(';')
+                if len(parts) < 1:
+                    continue
+                    
+                json_names.append(parts[0])
+        return json_names
+
+    def process_file(self, json_name):
+        # One C_*.json file is one unit of work: its classifiers are synced
+        # and submitted together. The file itself is never rewritten, the
+        # engine's IDs and file references only go into the payloads.
+        # Returns (classifierName, status, seconds) rows.
+        if json_name in self.compiled:
+            # Already resolved by dpxcc_catalog.py compile
+            self.log(f"Processing file: {json_name}")
+            payloads = [json.loads(json.dumps(entry['payload'])) for entry in self.compiled[json_name]]
+            payloads, done = self.skip_completed(payloads, 'classifierName')
+            return done + self.submit_classifiers(payloads, [content_hash(payload) for payload in payloads])
+
+        if not os.path.exists(json_name):
+             self.log(f"Input json file {json_name} is missing")
+             if not self.args.ignore_errors:
+                 self.client.logout()
+                 sys.exit(1)
+             return [(None, "skipped", None)]
+
+        # Validation implicitly handled by json.load
+        try:
+            with open(json_name, 'r') as jf:
+                clf_json = json.load(jf)
+        except json.JSONDecodeError:
+            self.log(f"ERROR: {json_name}\njson file format is NOT valid!")
+            if not self.args.ignore_errors:
+                sys.exit(1)
+            return [(None, "skipped", None)]
+        
+        self.log(f"Processing file: {json_name}")
+        clf_json, done = self.skip_completed(clf_json, 'name')
+        # Hashed as defined in the file, before the engine's IDs are set
+        digests = [content_hash(item) for item in clf_json]
+        
+        # 1. Sync File Refs
+        clf_json, _ = self.sync_file_references(clf_json)
+        
+        # 2. Sync Framework IDs
+        clf_json, mod_fw = self.sync_framework_id(clf_json)
+        if mod_fw:
+            self.log(f"Framework IDs updated for {json_name}")
+
+        # Create Classifiers
+        # Iterate array of objects in JSON
+        payloads = []
+        for item in clf_json:
+            # Construct payload (map fields)
+            payloads.append({
+                "classifierName": item.get('name'),
+                "description": item.get('description'),
+                "frameworkId": item.get('frameworkId'),
+                "domainName": item.get('domain'),
+                "classifierConfiguration": item.get('properties')
+            })
+        return done + self.submit_classifiers(payloads, digests)
+
+    def skip_completed(self, definitions, name_key):
+        # --resume: classifiers created by the previous run, unchanged since,
+        # are left out before their lookup files are resolved or uploaded.
+        if not self.args.resume:
+            return definitions, []
+        remaining, done = [], []
+        for definition in definitions:
+            name = definition.get(name_key)
+            if self.journal.completed("classifiers", name, content_hash(definition)):
+                self.log(f"Classifier: {name} already created by the previous run.")
+                done.append((name, "done before", None))
+            else:
+                remaining.append(definition)
+        return remaining, done
+
+    def submit_classifiers(self, payloads, digests):
+        results = []
+        for payload, digest in zip(payloads, digests):
+            started = time.monotonic()
+            status = "failed"
+            try:
+                status = self.add_classifier(payload, digest)
+            finally:
+                # Also when add_classifier exits: --resume then retries it
+                if status not in ("created", "exists"):
+                    self.journal.failed("classifiers", payload['classifierName'], digest)
+            results.append((payload['classifierName'], status, time.monotonic() - started))
+        return results
+
+    def read_manifest(self):
+        try:
+            manifest = load_manifest(self.args.manifest, self.client.masking_engine)
+        except ManifestError as e:
+            self.log(f"Error: {e}. Run dpxcc_catalog.py compile again.")
+            self.client.logout()
+            sys.exit(1)
+
+        # Grouped by source file, in CSV order
+        for entry in manifest_entries(manifest, "classifiers", self.args.manifest):
+            self.compiled.setdefault(entry['source'], []).append(entry)
+        self.log(f"{sum(map(len, self.compiled.values()))} classifiers read from {self.args.manifest}")
+        return list(self.compiled)
 
     def run(self):
-        username, password = self.read_config()
-        self.check_connection()
-        self.login(username, password)
+        username, password = self.client.read_config()
+        self.client.check_connection()
+        self.client.login(username, password)
+        if not self.args.no_upload_cache:
+            self.upload_cache = UploadCache(self.client.masking_engine)
+        self.journal = DeployJournal(self.client.masking_engine, "dpxcc_create_classifiers", self.log, self.args.resume)
         
-        # Pre-load data
-        self.get_framework_map()
+        # Pre-load data (a manifest has frameworks and references resolved)
+        if not self.args.manifest:
+            self.get_framework_map()
         self.load_file_references()
         
-        if not os.path.exists(self.args.classifiers_file) and not self.args.ignore_errors:
+        if not self.args.manifest and not os.path.exists(self.args.classifiers_file) and not self.args.ignore_errors:
              self.log(f"Input CSV file {self.args.classifiers_file} missing")
              sys.exit(1)
 
         try:
-            with open(self.args.classifiers_file, 'r') as csvfile:
-                for line in csvfile:
-                    clean_line = line.replace('"', '').strip()
-                    if not clean_line or clean_line.startswith('#'):
-                        continue
-                        
-                    parts = clean_line.split(';')
-                    if len(parts) < 1:
-                        continue
-                        
-                    json_name = parts[0]
-                    
-                    if not os.path.exists(json_name):
-                         self.log(f"Input json file {json_name} is missing")
-                         if not self.args.ignore_errors:
-                             self.logout()
-                             sys.exit(1)
-                         continue
-
-                    # Validation implicitly handled by json.load
-                    try:
-                        with open(json_name, 'r') as jf:
-                            clf_json = json.load(jf)
-                    except json.JSONDecodeError:
-                        self.log(f"ERROR: {json_name}\njson file format is NOT valid!")
-                        if not self.args.ignore_errors:
-                            sys.exit(1)
-                        continue
-                    
-                    self.log(f"Processing file: {json_name}")
-                    
-                    # Sync Logic
-                    is_modified = False
-                    
-                    # 1. Sync File Refs
-                    clf_json, mod_files = self.sync_file_references(clf_json)
-                    if mod_files: is_modified = True
-                    
-                    # 2. Sync Framework IDs
-                    clf_json, mod_fw = self.sync_framework_id(clf_json)
-                    if mod_fw:
-                        self.log(f"Framework IDs updated for {json_name}")
-                        is_modified = True
-                    
-                    if is_modified:
-                        self.log(f"Persisting changes to {json_name}")
-                        with open(json_name, 'w') as jf:
-                            json.dump(clf_json, jf, indent=2)
-
-                    # Create Classifiers
-                    # Iterate array of objects in JSON
-                    for item in clf_json:
-                        # Construct payload (map fields)
-                        # Construct payload (map fields)
-                        payload = {
-                            "classifierName": item.get('name'),
-                            "description": item.get('description'),
-                            "frameworkId": item.get('frameworkId'),
-                            "domainName": item.get('domain'),
-                            "classifierConfiguration": item.get('properties')
-                        }
-                        self.add_classifier(payload)
+            json_names = self.read_manifest() if self.args.manifest else self.read_classifiers_file()
+            if self.args.workers > 1:
+                self.log(f"Submitting {len(json_names)} classifier files with {self.args.workers} workers.")
+
+            for json_name, results in run_ordered(self.process_file, json_names, self.args.workers, self.log_buffer):
+                for clf_name, status, elapsed in results:
+                    self.summary.add(json_name, clf_name, status, elapsed)
 
         finally:
-            self.logout()
+            self.summary.log_table(self.log)
+            if self.inventory:
+                self.inventory.close()
+            self.client.logout()
 
     def check_response_error(self, func_name, api_name, response):
         self.log(f"{func_name}() -> Function: {func_name}() - Api: {api_name} - Response Code: {response.status_code} - Response Body: {response.text}")
         if not self.args.ignore_errors:
-            self.logout()
+            self.client.logout()
             sys.exit(1)
 
 def main():
     parser = argparse.ArgumentParser(description="Create Classifiers from CSV list")
     parser.add_argument('-c', '--classifiers-file', default=DEFAULT_CLASSIFIER_FILE, help="File containing Classifiers")
-    parser.add_argument('-f', '--file-reference-id', help="File Reference Id CSV")
+    parser.add_argument('-f', '--file-reference-id', help="File Reference Id CSV (used for lookup files not found in --lookup-dir)")
+    parser.add_argument('-l', '--lookup-dir', default=DEFAULT_LOOKUP_DIR, help="Directory with the lookup files referenced by the Classifiers")
     parser.add_argument('-i', '--ignore-errors', action='store_true', help="Ignore errors")
     parser.add_argument('-o', '--log-file', help="Log file name")
     parser.add_argument('-x', '--proxy-bypass', default="true", help="Proxy ByPass (ignored)")
     parser.add_argument('-k', '--https-insecure', action='store_true', help="Make Https Insecure")
+    parser.add_argument('-w', '--workers', type=int, default=DEFAULT_WORKERS, help="Number of Classifier files submitted in parallel")
+    parser.add_argument('--token-cache', action='store_true', help="Reuse the engine token between runs (CONFIG.tokens)")
+    parser.add_argument('--connect-timeout', type=float, default=DEFAULT_CONNECT_TIMEOUT, help="Seconds to wait for a connection to the engine")
+    parser.add_argument('--read-timeout', type=float, default=DEFAULT_READ_TIMEOUT, help="Seconds to wait for the answer to a call (lookup file uploads wait at least 300)")
+    parser.add_argument('--hedge', action='store_true', help="Send a read (list, framework, async task status) again if it has not answered within its usual 95th percentile time")
+    parser.add_argument('--inventory', action='store_true', help="Keep the local inventory of the engine up to date with the Classifiers created here")
+    parser.add_argument('-m', '--manifest', help="Manifest written by dpxcc_catalog.py compile, read instead of the CSV and JSON files")
+    parser.add_argument('--no-upload-cache', action='store_true', help="Do not upload lookup files, only use --file-reference-id")
+    parser.add_argument('--resume', action='store_true', help="Skip the Classifiers the previous run created (journal), only send the failed and remaining ones")
     
     args = parser.parse_args()
     
@@ -1,204 +1,156 @@
 #!/usr/bin/env python3
 
 import argparse
-import base64
 import csv
 import json
-import logging
 import os
 import sys
-import requests
-from datetime import datetime
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from dpxcc import (DEFAULT_CONNECT_TIMEOUT, DEFAULT_POOL_SIZE, DEFAULT_READ_TIMEOUT, DeployJournal, EngineClient,
+                   Inventory, LogBuffer, RunSummary, content_hash, run_ordered, setup_logging)
+from dpxcc.journal import DONE
 
 # Configuration Defaults
-DEFAULT_API_VER = "v5.1.27"
 DEFAULT_DOMAIN_FILE = "crt_domains.csv"
-CONFIG_FILE = "CONFIG"
+DEFAULT_WORKERS = 1
 
 class DomainCreator:
     def __init__(self, args):
         self.args = args
-        self.masking_engine = ""
-        self.api_base_url = ""
-        self.auth_header = {}
-        self.session = requests.Session()
-        self.setup_logging()
-
-    def setup_logging(self):
-        log_date = datetime.now().strftime('%d%m%Y_%H%M%S')
-        log_file_name = self.args.log_file if self.args.log_file else f"dpxcc_create_domains_{log_date}.log"
-        
-        file_handler = logging.FileHandler(log_file_name)
-        console_handler = logging.StreamHandler(sys.stderr)
-
-        formatter = logging.Formatter('[%(asctime)s] %(message)s', datefmt='%d%m%Y %H:%M:%S')
-        file_handler.setFormatter(formatter)
-        console_handler.setFormatter(formatter)
-
-        self.logger = logging.getLogger()
-        self.logger.setLevel(logging.INFO)
-        self.logger.addHandler(file_handler)
-        self.logger.addHandler(console_handler)
+        self.logger, self.log_file_name = setup_logging(args.log_file, "dpxcc_create_domains")
+        self.log_buffer = LogBuffer(self.logger)
+        self.client = EngineClient(args, self.log, pool_size=max(DEFAULT_POOL_SIZE, args.workers))
+        self.summary = RunSummary("domains")
+        self.inventory = Inventory(self.client, self.log, persistent=True) if args.inventory else None
+        self.journal = None  # DeployJournal, needs the engine from CONFIG
 
     def log(self, message):
-        self.logger.info(message)
-
-    def read_config(self):
-        if not os.path.exists(CONFIG_FILE):
-            self.log(f"Error: {CONFIG_FILE} not found!")
-            sys.exit(1)
-        
-        try:
-            with open(CONFIG_FILE, 'r') as f:
-                lines = f.readlines()
-                encoded_user = lines[0].strip()
-                encoded_pass = lines[1].strip()
-                self.masking_engine = lines[2].strip()
-            
-            username = base64.b64decode(encoded_user).decode('utf-8')
-            password = base64.b64decode(encoded_pass).decode('utf-8')
-            
-            self.protocol = "https" if self.args.https_insecure else "http"
-            self.api_base_url = f"{self.protocol}://{self.masking_engine}/masking/api/{DEFAULT_API_VER}"
-            return username, password
-
-        except Exception as e:
-            self.log(f"Error reading CONFIG: {e}")
-            sys.exit(1)
-
-    def check_connection(self):
-        url = f"{self.protocol}://{self.masking_engine}"
-        self.log(f"Checking connection to {url}...")
-        try:
-            verify = False if self.protocol == "https" else True
-            response = requests.get(url, timeout=5, verify=verify)
-            response.raise_for_status()
-            self.log(f"Connection to {url} successful.")
-        except requests.exceptions.RequestException as e:
-            self.log(f"Error connecting to {url}: {e}")
-            sys.exit(1)
+        self.log_buffer.log(message)
 
-    def login(self, username, password):
-        api_endpoint = f"{self.api_base_url}/login"
-        payload = {"username": username, "password": password}
-        self.log(f"Logging in with {username} ...")
-        
-        try:
-            verify = False if self.args.https_insecure else True
-            response = self.session.post(api_endpoint, json=payload, verify=verify)
-            
-            if response.status_code != 200:
-                self.log(f"Login failed: {response.status_code} - {response.text}")
-                sys.exit(1)
-                
-            data = response.json()
-            if 'Authorization' not in data:
-                self.log(f"Login failed: No Authorization token. Response: {data}")
-                sys.exit(1)
-                
-            self.auth_header = {'Authorization': data['Authorization']}
-            self.session.headers.update(self.auth_header)
-            self.log(f"{username} logged in successfully with token {data['Authorization']}")
-            
-        except Exception as e:
-            self.log(f"Login exception: {e}")
-            sys.exit(1)
-
-    def logout(self):
-        if not self.auth_header:
-            return
-        self.log("Logging out ...")
-        try:
-            api_endpoint = f"{self.api_base_url}/logout"
-            verify = False if self.args.https_insecure else True
-            response = self.session.put(api_endpoint, verify=verify)
-            self.log(f"Response Code: {response.status_code} - Response Body: {response.text}")
-            self.log("Logged out successfully.")
-        except Exception as e:
-            self.log(f"Logout exception: {e}")
-
-    def add_domain(self, domain_json):
+    def add_domain(self, domain_json, digest=None):
         domain_name = domain_json.get('domainName')
         self.log(f"Adding Domain {domain_name} ...")
         
-        api_endpoint = f"{self.api_base_url}/domains"
+        api_endpoint = "domains"
         
         try:
-            verify = False if self.args.https_insecure else True
-            response = self.session.post(api_endpoint, json=domain_json, verify=verify)
-            
+            self.journal.sending("domains", domain_name, digest)
+            response = self.client.post(api_endpoint, json=domain_json)
+            self.journal.answered("domains", domain_name)
+
             if response.status_code != 200:
+                if "already exists" in response.text and self.journal.attempted("domains", domain_name, digest):
+                    self.log(f"Domain: {domain_name} already exists, created by the interrupted run.")
+                    return "exists"
                 self.check_response_error("add_domain", "domains", response)
+                return "failed"
             
             data = response.json()
             if data.get('domainName'):
                 self.log(f"Domain: {data.get('domainName')} added.")
+                if self.inventory:
+                    self.inventory.put("domains", data)
+                return "created"
             else:
                 self.log("Domain NOT added.")
                 
         except Exception as e:
              self.log(f"Add domain exception: {e}")
              if not self.args.ignore_errors:
-                 self.logout()
+                 self.client.logout()
                  sys.exit(1)
+        return "failed"
 
     def check_response_error(self, func_name, api_name, response):
         self.log(f"{func_name}() -> Function: {func_name}() - Api: {api_name} - Response Code: {response.status_code} - Response Body: {response.text}")
         if not self.args.ignore_errors:
-            self.logout()
+            self.client.logout()
             sys.exit(1)
 
+    def read_domains_file(self):
+        json_names = []
+        with open(self.args.domains_file, 'r') as csvfile:
+            for line in csvfile:
+                clean_line = line.replace('"', '').strip()
+                if not clean_line or clean_line.startswith('#'):
+                    continue
+                    
+                parts = clean_line.split(';')
+                if len(parts) < 1:
+                    continue
+                
+                json_names.append(parts[0])
+        return json_names
+
+    def process_file(self, json_name):
+        # Returns (domainName, status, seconds) for the summary
+        if not os.path.exists(json_name):
+             self.log(f"Input json file {json_name} is missing")
+             if not self.args.ignore_errors:
+                 self.client.logout()
+                 sys.exit(1)
+             return None, "skipped", None
+             
+        # Validation by json.load
+        try:
+            with open(json_name, 'r') as jf:
+                domain_json = json.load(jf)
+        except json.JSONDecodeError:
+            self.log(f"ERROR: {json_name}\njson file format is NOT valid!")
+            if not self.args.ignore_errors:
+                sys.exit(1)
+            return None, "skipped", None
+        
+        self.log(f"Processing file: {json_name}")
+        domain_name = domain_json.get('domainName')
+        digest = content_hash(domain_json)
+        if self.args.resume and self.journal.completed("domains", domain_name, digest):
+            self.log(f"Domain: {domain_name} already created by the previous run.")
+            return domain_name, "done before", None
+        
+        # Logic: Check if defaultTokenizationCode is empty/null and remove it
+        tok_code = domain_json.get('defaultTokenizationCode')
+        if not tok_code: # Empty string or None
+            if 'defaultTokenizationCode' in domain_json:
+                del domain_json['defaultTokenizationCode']
+        
+        started = time.monotonic()
+        status = "failed"
+        try:
+            status = self.add_domain(domain_json, digest)
+        finally:
+            if status in ("created", "exists"):
+                self.journal.record("domains", domain_name, DONE, digest, domain_name)
+            else:
+                self.journal.failed("domains", domain_name, digest, domain_name)
+        return domain_name, status, time.monotonic() - started
+
     def run(self):
-        username, password = self.read_config()
-        self.check_connection()
-        self.login(username, password)
+        username, password = self.client.read_config()
+        self.client.check_connection()
+        self.client.login(username, password)
+        self.journal = DeployJournal(self.client.masking_engine, "dpxcc_create_domains", self.log, self.args.resume)
         
         if not os.path.exists(self.args.domains_file) and not self.args.ignore_errors:
              self.log(f"Input CSV file {self.args.domains_file} missing")
              sys.exit(1)
 
         try:
-            with open(self.args.domains_file, 'r') as csvfile:
-                for line in csvfile:
-                    clean_line = line.replace('"', '').strip()
-                    if not clean_line or clean_line.startswith('#'):
-                        continue
-                        
-                    parts = clean_line.split(';')
-                    if len(parts) < 1:
-                        continue
-                    
-                    json_name = parts[0]
-                    
-                    if not os.path.exists(json_name):
-                         self.log(f"Input json file {json_name} is missing")
-                         if not self.args.ignore_errors:
-                             self.logout()
-                             sys.exit(1)
-                         continue
-                         
-                    # Validation by json.load
-                    try:
-                        with open(json_name, 'r') as jf:
-                            domain_json = json.load(jf)
-                    except json.JSONDecodeError:
-                        self.log(f"ERROR: {json_name}\njson file format is NOT valid!")
-                        if not self.args.ignore_errors:
-                            sys.exit(1)
-                        continue
-                    
-                    self.log(f"Processing file: {json_name}")
-                    
-                    # Logic: Check if defaultTokenizationCode is empty/null and remove it
-                    tok_code = domain_json.get('defaultTokenizationCode')
-                    if not tok_code: # Empty string or None
-                        if 'defaultTokenizationCode' in domain_json:
-                            del domain_json['defaultTokenizationCode']
-                    
-                    self.add_domain(domain_json)
+            json_names = self.read_domains_file()
+            if self.args.workers > 1:
+                self.log(f"Submitting {len(json_names)} domain files with {self.args.workers} workers.")
+
+            for json_name, (domain_name, status, elapsed) in run_ordered(self.process_file, json_names,
+                                                                         self.args.workers, self.log_buffer):
+                self.summary.add(json_name, domain_name, status, elapsed)
 
         finally:
-            self.logout()
+            self.summary.log_table(self.log)
+            if self.inventory:
+                self.inventory.close()
+            self.client.logout()
 
 def main():
     parser = argparse.ArgumentParser(description="Create Domains from CSV list")
@@ -207,6 +159,13 @@ def main():
     parser.add_argument('-o', '--log-file', help="Log file name")
     parser.add_argument('-x', '--proxy-bypass', default="true", help="Proxy ByPass (ignored)")
     parser.add_argument('-k', '--https-insecure', action='store_true', help="Make Https Insecure")
+    parser.add_argument('-w', '--workers', type=int, default=DEFAULT_WORKERS, help="Number of Domains created in parallel")
+    parser.add_argument('--token-cache', action='store_true', help="Reuse the engine token between runs (CONFIG.tokens)")
+    parser.add_argument('--connect-timeout', type=float, default=DEFAULT_CONNECT_TIMEOUT, help="Seconds to wait for a connection to the engine")
+    parser.add_argument('--read-timeout', type=float, default=DEFAULT_READ_TIMEOUT, help="Seconds to wait for the answer to a call (lookup file uploads wait at least 300)")
+    parser.add_argument('--hedge', action='store_true', help="Send a read (list, framework, async task status) again if it has not answered within its usual 95th percentile time")
+    parser.add_argument('--inventory', action='store_true', help="Keep the local inventory of the engine up to date with the objects changed here")
+    parser.add_argument('--resume', action='store_true', help="Skip the Domains the previous run created (journal), only send the failed and remaining ones")
     
     args = parser.parse_args()
     
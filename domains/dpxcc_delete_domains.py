@@ -1,163 +1,87 @@
 #!/usr/bin/env python3
 
 import argparse
-import base64
 import json
-import logging
 import os
 import sys
-import requests
-from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from dpxcc import DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT, DeployJournal, EngineClient, Inventory, setup_logging
+from dpxcc.journal import DONE, FAILED
 
 # Configuration Defaults
-DEFAULT_API_VER = "v5.1.27"
 DEFAULT_DOMAIN_FILE = "crt_domains.csv"
-CONFIG_FILE = "CONFIG"
 
 class DomainDeleter:
     def __init__(self, args):
         self.args = args
-        self.masking_engine = ""
-        self.api_base_url = ""
-        self.auth_header = {}
-        self.session = requests.Session()
-        self.setup_logging()
-
-    def setup_logging(self):
-        log_date = datetime.now().strftime('%d%m%Y_%H%M%S')
-        log_file_name = self.args.log_file if self.args.log_file else f"dpxcc_delete_domains_{log_date}.log"
-        
-        file_handler = logging.FileHandler(log_file_name)
-        console_handler = logging.StreamHandler(sys.stderr)
-
-        formatter = logging.Formatter('[%(asctime)s] %(message)s', datefmt='%d%m%Y %H:%M:%S')
-        file_handler.setFormatter(formatter)
-        console_handler.setFormatter(formatter)
-
-        self.logger = logging.getLogger()
-        self.logger.setLevel(logging.INFO)
-        self.logger.addHandler(file_handler)
-        self.logger.addHandler(console_handler)
+        self.logger, self.log_file_name = setup_logging(args.log_file, "dpxcc_delete_domains")
+        self.client = EngineClient(args, self.log)
+        self.inventory = Inventory(self.client, self.log, persistent=True) if args.inventory else None
+        self.journal = None  # DeployJournal, needs the engine from CONFIG
 
     def log(self, message):
         self.logger.info(message)
 
-    def read_config(self):
-        if not os.path.exists(CONFIG_FILE):
-            self.log(f"Error: {CONFIG_FILE} not found!")
-            sys.exit(1)
-        
-        try:
-            with open(CONFIG_FILE, 'r') as f:
-                lines = f.readlines()
-                encoded_user = lines[0].strip()
-                encoded_pass = lines[1].strip()
-                self.masking_engine = lines[2].strip()
-            
-            username = base64.b64decode(encoded_user).decode('utf-8')
-            password = base64.b64decode(encoded_pass).decode('utf-8')
-            
-            if self.args.https_insecure:
-                self.protocol = "https"
-                self.verify_ssl = False
-            else:
-                self.protocol = "http"
-                self.verify_ssl = True
-            
-            self.api_base_url = f"{self.protocol}://{self.masking_engine}/masking/api/{DEFAULT_API_VER}"
-            return username, password
-
-        except Exception as e:
-            self.log(f"Error reading CONFIG: {e}")
-            sys.exit(1)
-
-    def check_connection(self):
-        url = f"{self.protocol}://{self.masking_engine}"
-        self.log(f"Checking connection to {url}...")
-        try:
-            response = requests.get(url, timeout=5, verify=self.verify_ssl)
-            response.raise_for_status()
-            self.log(f"Connection to {url} successful.")
-        except requests.exceptions.RequestException as e:
-            self.log(f"Error connecting to {url}: {e}")
-            sys.exit(1)
-
-    def login(self, username, password):
-        api_endpoint = f"{self.api_base_url}/login"
-        payload = {"username": username, "password": password}
-        self.log(f"Logging in with {username} ...")
-        
-        try:
-            response = self.session.post(api_endpoint, json=payload, verify=self.verify_ssl)
-            
-            if response.status_code != 200:
-                self.log(f"Login failed: {response.status_code} - {response.text}")
-                sys.exit(1)
-                
-            data = response.json()
-            if 'Authorization' not in data:
-                self.log(f"Login failed: No Authorization token. Response: {data}")
-                sys.exit(1)
-                
-            self.auth_header = {'Authorization': data['Authorization']}
-            self.session.headers.update(self.auth_header)
-            self.log(f"{username} logged in successfully with token {data['Authorization']}")
-            
-        except Exception as e:
-            self.log(f"Login exception: {e}")
-            sys.exit(1)
-
-    def logout(self):
-        if not self.auth_header:
-            return
-        self.log("Logging out ...")
-        try:
-            api_endpoint = f"{self.api_base_url}/logout"
-            response = self.session.put(api_endpoint, verify=self.verify_ssl)
-            self.log(f"Response Code: {response.status_code} - Response Body: {response.text}")
-            self.log("Logged out successfully.")
-        except Exception as e:
-            self.log(f"Logout exception: {e}")
-
     def delete_domain(self, domain_name):
         self.log(f"Deleting Domain {domain_name} ...")
         
         # DELETE /domains/{domainName}
-        api_endpoint = f"{self.api_base_url}/domains/{domain_name}"
+        api_endpoint = f"domains/{domain_name}"
         
         try:
-            response = self.session.delete(api_endpoint, verify=self.verify_ssl)
+            response = self.client.delete(api_endpoint)
             
             if response.status_code == 204: 
                  self.log(f"Domain: {domain_name} deleted (204 No Content).")
-                 return
+                 self.forget(domain_name)
+                 return True
 
             if response.status_code == 200:
                  self.log(f"Domain: {domain_name} deleted (200 OK).")
-                 return
+                 self.forget(domain_name)
+                 return True
 
             if response.status_code == 404:
                  self.log(f"Domain: {domain_name} not found.")
-                 return
+                 self.forget(domain_name)
+                 return True
 
             self.check_response_error("delete_domain", f"domains/{domain_name}", response)
 
         except Exception as e:
              self.log(f"Delete domain exception: {e}")
              if not self.args.ignore_errors:
-                 self.logout()
+                 self.client.logout()
                  sys.exit(1)
+        return False
+
+    def process_domain(self, domain_name):
+        if self.args.resume and self.journal.completed("domains", domain_name):
+            self.log(f"Domain: {domain_name} already deleted by the previous run.")
+            return
+        done = False
+        try:
+            done = self.delete_domain(domain_name)
+        finally:
+            # Also when delete_domain exits: --resume then retries it
+            self.journal.record("domains", domain_name, DONE if done else FAILED)
+
+    def forget(self, domain_name):
+        if self.inventory:
+            self.inventory.remove("domains", domain_name)
 
     def check_response_error(self, func_name, api_name, response):
         self.log(f"{func_name}() -> Function: {func_name}() - Api: {api_name} - Response Code: {response.status_code} - Response Body: {response.text}")
         if not self.args.ignore_errors:
-            self.logout()
+            self.client.logout()
             sys.exit(1)
 
     def run(self):
-        username, password = self.read_config()
-        self.check_connection()
-        self.login(username, password)
+        username, password = self.client.read_config()
+        self.client.check_connection()
+        self.client.login(username, password)
+        self.journal = DeployJournal(self.client.masking_engine, "dpxcc_delete_domains", self.log, self.args.resume)
         
         if not os.path.exists(self.args.domains_file) and not self.args.ignore_errors:
              self.log(f"Input CSV file {self.args.domains_file} missing")
@@ -186,7 +110,7 @@ class DomainDeleter:
                             domain_name = domain_json.get('domainName')
                             
                             if domain_name:
-                                self.delete_domain(domain_name)
+                                self.process_domain(domain_name)
                             else:
                                 self.log(f"No domainName found in {json_name}")
                                 
@@ -195,7 +119,9 @@ class DomainDeleter:
                          continue
                     
         finally:
-            self.logout()
+            if self.inventory:
+                self.inventory.close()
+            self.client.logout()
 
 def main():
     parser = argparse.ArgumentParser(description="Delete Domains from CSV list")
@@ -203,6 +129,12 @@ def main():
     parser.add_argument('-i', '--ignore-errors', action='store_true', help="Ignore errors")
     parser.add_argument('-o', '--log-file', help="Log file name")
     parser.add_argument('-k', '--https-insecure', action='store_true', help="Make Https Insecure")
+    parser.add_argument('--token-cache', action='store_true', help="Reuse the engine token between runs (CONFIG.tokens)")
+    parser.add_argument('--connect-timeout', type=float, default=DEFAULT_CONNECT_TIMEOUT, help="Seconds to wait for a connection to the engine")
+    parser.add_argument('--read-timeout', type=float, default=DEFAULT_READ_TIMEOUT, help="Seconds to wait for the answer to a call (lookup file uploads wait at least 300)")
+    parser.add_argument('--hedge', action='store_true', help="Send a read (list, framework, async task status) again if it has not answered within its usual 95th percentile time")
+    parser.add_argument('--inventory', action='store_true', help="Keep the local inventory of the engine up to date with the objects changed here")
+    parser.add_argument('--resume', action='store_true', help="Skip the Domains the previous run deleted (journal), only retry the failed and remaining ones")
     
     args = parser.parse_args()
     
@@ -0,0 +1,170 @@
+"""Shared helpers for the dpxcc_*.py Delphix Continuous Compliance scripts."""
+
+from .client import (
+    CONFIG_FILE,
+    DEFAULT_API_VER,
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_KEEPALIVE,
+    DEFAULT_POOL_SIZE,
+    DEFAULT_READ_TIMEOUT,
+    UPLOAD_READ_TIMEOUT,
+    EngineClient,
+    setup_logging,
+)
+from .aioclient import AsyncEngineClient, AsyncIncrementalReader, AsyncPaginator, async_available
+from .asynctasks import AsyncTaskPoller
+from .bundle import DEFAULT_BUNDLE, BundleError, build_bundle, load_bundle, save_bundle, select_syncable
+from .catalog import (
+    CATALOG_KINDS,
+    CatalogChange,
+    CatalogObject,
+    FileReferences,
+    catalog_frameworks,
+    fetch_engine_catalog,
+    load_local_catalog,
+    local_lookup_file,
+    plan_catalog,
+    read_deletions,
+    referenced_algorithms,
+    resolve_frameworks,
+)
+from .concurrency import LogBuffer, run_graph, run_ordered, topological_order
+from .dataset import ExecutionDataset
+from .engines import DEFAULT_ENGINES_FILE, EngineTarget, read_engines_file
+from .export import (
+    DEFAULT_OUTPUT_TYPE,
+    OUTPUT_TYPES,
+    ExportError,
+    RecordWriter,
+    default_output_file,
+    open_writer,
+    output_type_of,
+)
+from .frameworks import FrameworkCatalog, FrameworkIndex, cached_frameworks
+from .inventory import Inventory, cached_names
+from .journal import DeployJournal, content_hash
+from .listexport import (
+    EXECUTION_COMPONENTS,
+    EXECUTION_EVENTS,
+    EXECUTIONS,
+    ListExport,
+    ListExporter,
+    export_main,
+    export_parser,
+    parse_export_args,
+)
+from .manifest import (
+    DEFAULT_MANIFEST,
+    ManifestError,
+    build_manifest,
+    load_manifest,
+    manifest_entries,
+    save_manifest,
+)
+from .monitor import MonitoredExecution, Progress
+from .pagination import DEFAULT_PAGE_SIZE, DEFAULT_PAGE_WORKERS, PageError, Paginator
+from .filecache import UploadCache, file_reference_gone
+from .storage import cache_dir, cache_path
+from .summary import RunSummary, format_table
+from .throttle import DEFAULT_RETRIES, AdaptiveLimiter
+from .tokencache import TokenCache
+from .validation import ValidationIssue, validate_catalog
+from .watermarks import IncrementalReader, Watermark, load_watermark, restore_output, save_watermark, watermark_key
+from .uploads import DEFAULT_UPLOAD_WORKERS, MultipartUpload, UploadPipeline
+
+__all__ = [
+    "AdaptiveLimiter",
+    "AsyncEngineClient",
+    "AsyncIncrementalReader",
+    "AsyncPaginator",
+    "AsyncTaskPoller",
+    "BundleError",
+    "CATALOG_KINDS",
+    "CONFIG_FILE",
+    "CatalogChange",
+    "CatalogObject",
+    "DeployJournal",
+    "DEFAULT_API_VER",
+    "DEFAULT_BUNDLE",
+    "DEFAULT_CONNECT_TIMEOUT",
+    "DEFAULT_ENGINES_FILE",
+    "DEFAULT_KEEPALIVE",
+    "DEFAULT_MANIFEST",
+    "DEFAULT_OUTPUT_TYPE",
+    "DEFAULT_PAGE_SIZE",
+    "DEFAULT_PAGE_WORKERS",
+    "DEFAULT_POOL_SIZE",
+    "DEFAULT_READ_TIMEOUT",
+    "DEFAULT_RETRIES",
+    "DEFAULT_UPLOAD_WORKERS",
+    "UPLOAD_READ_TIMEOUT",
+    "UploadCache",
+    "UploadPipeline",
+    "EngineClient",
+    "EngineTarget",
+    "EXECUTION_COMPONENTS",
+    "EXECUTION_EVENTS",
+    "EXECUTIONS",
+    "ExecutionDataset",
+    "ExportError",
+    "FileReferences",
+    "FrameworkCatalog",
+    "FrameworkIndex",
+    "IncrementalReader",
+    "Inventory",
+    "ListExport",
+    "ListExporter",
+    "LogBuffer",
+    "ManifestError",
+    "MonitoredExecution",
+    "MultipartUpload",
+    "OUTPUT_TYPES",
+    "PageError",
+    "Paginator",
+    "Progress",
+    "RecordWriter",
+    "RunSummary",
+    "TokenCache",
+    "ValidationIssue",
+    "Watermark",
+    "async_available",
+    "build_bundle",
+    "build_manifest",
+    "cache_dir",
+    "cache_path",
+    "cached_frameworks",
+    "cached_names",
+    "catalog_frameworks",
+    "content_hash",
+    "default_output_file",
+    "export_main",
+    "export_parser",
+    "fetch_engine_catalog",
+    "format_table",
+    "file_reference_gone",
+    "load_bundle",
+    "load_local_catalog",
+    "load_manifest",
+    "load_watermark",
+    "local_lookup_file",
+    "manifest_entries",
+    "open_writer",
+    "output_type_of",
+    "parse_export_args",
+    "plan_catalog",
+    "read_deletions",
+    "read_engines_file",
+    "referenced_algorithms",
+    "resolve_frameworks",
+    "restore_output",
+    "run_graph",
+    "run_ordered",
+    "save_bundle",
+    "save_manifest",
+    "save_watermark",
+    "select_syncable",
+    "setup_logging",
+    "topological_order",
+    "validate_catalog",
+    "watermark_key",
+]
@@ -0,0 +1,466 @@
+#!/usr/bin/env python3
+
+import asyncio
+import itertools
+import json
+import sys
+import time
+from collections import deque
+
+try:
+    import aiohttp
+except ImportError:  # optional, only needed for the asyncio client
+    aiohttp = None
+
+from .client import (CONFIG_FILE, DEFAULT_API_VER, DEFAULT_CONNECT_TIMEOUT, DEFAULT_KEEPALIVE, DEFAULT_READ_TIMEOUT,
+                     HEDGE_BUDGET, HEDGE_MIN_DELAY, HEDGE_PERCENTILE, body_size, endpoint_key, read_config_file)
+from .pagination import PAGES_AHEAD, PageError, Paginator, next_page_size, page_total, tuned_lock, tuned_page_sizes
+from .throttle import (DEFAULT_RETRIES, IDEMPOTENT_METHODS, LATENCY_MAX_BODY, REJECTED_STATUS, RETRY_STATUS,
+                       AdaptiveLimiter, retry_delay)
+from .tokencache import TokenCache
+from .watermarks import IncrementalReader
+
+# Connections kept open to each engine: every call of the event loop to
+# that engine goes through them
+DEFAULT_ASYNC_CONNECTIONS = 8
+
+
+def async_available():
+    return aiohttp is not None
+
+
+def never_sent(error):
+    # Refused or timed out while connecting: the engine never got the call
+    connect_timeout = getattr(aiohttp, 'ConnectionTimeoutError', None)  # aiohttp 3.10 and later
+    return (isinstance(error, aiohttp.ClientConnectorError)
+            or (connect_timeout is not None and isinstance(error, connect_timeout)))
+
+
+class EngineResponse:
+    """The parts of a requests.Response the scripts use (status_code, text,
+    headers, json()), read in full from an aiohttp response."""
+
+    def __init__(self, status_code, headers, text):
+        self.status_code = status_code
+        self.headers = headers
+        self.text = text
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class AsyncLimiter(AdaptiveLimiter):
+    """AdaptiveLimiter for coroutines: acquire_async() waits for room
+    without blocking the event loop. Waiters are woken in order, only as
+    many as there is room for, so thousands of queued calls cost nothing
+    while they wait."""
+
+    def __init__(self, max_limit, log, **kwargs):
+        super().__init__(max_limit, log, **kwargs)
+        self.waiters = deque()
+
+    async def acquire_async(self):
+        while True:
+            started = self.try_acquire()
+            if started is not None:
+                return started
+            waiter = asyncio.get_running_loop().create_future()
+            self.waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                # The room it was woken for goes to the next waiter
+                self.wake()
+                raise
+
+    def release(self, started, endpoint, overloaded=False, reason=None, timed=True):
+        super().release(started, endpoint, overloaded, reason, timed)
+        self.wake()
+
+    def wake(self):
+        room = int(self.limit) - self.in_flight
+        while room > 0 and self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                room -= 1
+
+
+class AsyncEngineClient:
+    """EngineClient for asyncio: the same login, token cache, retries,
+    adaptive concurrency limit and hedging, with coroutines instead of
+    threads.
+
+    Calls are awaited, so one event loop can have thousands of them pending
+    against many engines. Each engine gets one aiohttp session with at most
+    `connections` pooled keep-alive connections, and the AsyncLimiter
+    decides how many of its calls are in flight. Responses are
+    EngineResponse objects, read in full. Needs the aiohttp package.
+    """
+
+    def __init__(self, args, log, connections=DEFAULT_ASYNC_CONNECTIONS, config_file=CONFIG_FILE):
+        if aiohttp is None:
+            raise RuntimeError("the asyncio client needs the aiohttp package (pip install aiohttp)")
+        self.args = args
+        self.log = log
+        self.config_file = config_file
+        self.masking_engine = ""
+        self.protocol = "http"
+        self.verify_ssl = True
+        self.api_version = DEFAULT_API_VER
+        self.api_base_url = ""
+        self.auth_header = {}
+        self.username = None
+        self.password = None
+        self.auth_lock = asyncio.Lock()
+        self.token_cache = TokenCache(config_file) if getattr(args, 'token_cache', False) else None
+        connect_timeout = getattr(args, 'connect_timeout', None) or DEFAULT_CONNECT_TIMEOUT
+        read_timeout = getattr(args, 'read_timeout', None) or DEFAULT_READ_TIMEOUT
+        self.timeout = aiohttp.ClientTimeout(total=None, sock_connect=connect_timeout, sock_read=read_timeout)
+        self.connections = max(1, connections)
+        self.session = None
+        self.limiter = AsyncLimiter(self.connections, log)
+        self.retries = DEFAULT_RETRIES
+        self.retried = 0
+        self.hedge = getattr(args, 'hedge', False)
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def read_config(self):
+        username, password, masking_engine = read_config_file(self.config_file, self.log)
+        self.set_engine(masking_engine)
+        return username, password
+
+    def set_engine(self, masking_engine):
+        self.masking_engine = masking_engine
+        if self.args.https_insecure:
+            self.protocol = "https"
+            self.verify_ssl = False
+        else:
+            self.protocol = "http"
+            self.verify_ssl = True
+        self.api_base_url = f"{self.protocol}://{self.masking_engine}/masking/api/{self.api_version}"
+
+    def open_session(self):
+        # Inside the event loop: aiohttp sessions belong to the running loop
+        if self.session is None:
+            connector = aiohttp.TCPConnector(limit=self.connections, keepalive_timeout=DEFAULT_KEEPALIVE,
+                                             ssl=None if self.verify_ssl else False)
+            self.session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self.session
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def check_connection(self):
+        url = f"{self.protocol}://{self.masking_engine}"
+        self.log(f"Checking connection to {url}...")
+        try:
+            async with self.open_session().get(url) as response:
+                response.raise_for_status()
+            self.log(f"Connection to {url} successful.")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.log(f"Error connecting to {url}: {e}")
+            sys.exit(1)
+
+    def url(self, api):
+        return f"{self.api_base_url}/{api}"
+
+    async def request(self, method, api, timeout=None, retry=None, **kwargs):
+        """One API call, retried like EngineClient.request(): GET, PUT and
+        DELETE on 429/502/503/504, timeouts and connection errors; other
+        calls only with retry=True, except when the engine never got them."""
+        retry = method in IDEMPOTENT_METHODS if retry is None else retry
+        endpoint = endpoint_key(method, api)
+        attempt = 0
+        reauthenticated = False
+        while True:
+            token = self.auth_header.get('Authorization')
+            try:
+                if self.hedge and method == "GET":
+                    response = await self.send_hedged(method, api, endpoint, timeout, kwargs)
+                else:
+                    response = await self.send(method, api, endpoint, timeout, kwargs)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if attempt >= self.retries or not (retry or never_sent(e)):
+                    raise
+                attempt += 1
+                await self.wait_retry(method, api, attempt, type(e).__name__)
+                continue
+
+            if (response.status_code == 401 and self.username and api not in ("login", "logout")
+                    and not reauthenticated):
+                await self.reauthenticate(token)
+                reauthenticated = True
+                continue
+
+            if (response.status_code in RETRY_STATUS and (retry or response.status_code in REJECTED_STATUS)
+                    and attempt < self.retries):
+                attempt += 1
+                await self.wait_retry(method, api, attempt, f"{response.status_code}", response)
+                continue
+            return response
+
+    async def send(self, method, api, endpoint, timeout, kwargs, started=None):
+        timed = body_size(kwargs) <= LATENCY_MAX_BODY
+        if started is None:
+            started = await self.limiter.acquire_async()
+        headers = dict(self.auth_header, **(kwargs.get('headers') or {}))
+        options = dict(kwargs, headers=headers)
+        try:
+            async with self.open_session().request(method, self.url(api), timeout=timeout or self.timeout,
+                                                   **options) as answer:
+                response = EngineResponse(answer.status, answer.headers, await answer.text())
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+            self.limiter.release(started, endpoint, overloaded=True, reason=f"{endpoint}: {type(e).__name__}")
+            raise
+        except (Exception, asyncio.CancelledError):
+            self.limiter.release(started, endpoint)
+            raise
+        self.limiter.release(started, endpoint, overloaded=response.status_code in RETRY_STATUS,
+                             reason=f"{endpoint}: {response.status_code}", timed=timed)
+        return response
+
+    async def send_hedged(self, method, api, endpoint, timeout, kwargs):
+        """send() for reads, sent a second time if the first has not
+        answered within the 95th percentile latency of the endpoint, as in
+        EngineClient.send_hedged(). The slower copy is cancelled."""
+        delay = self.limiter.percentile(endpoint, HEDGE_PERCENTILE)
+        if delay is None:
+            return await self.send(method, api, endpoint, timeout, kwargs)
+
+        # Timed from when the call is actually sent, not queued by the limiter
+        first = asyncio.ensure_future(self.send(method, api, endpoint, timeout, kwargs,
+                                                await self.limiter.acquire_async()))
+        pending = {first}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=max(delay, HEDGE_MIN_DELAY))
+            if not done:
+                started = None
+                if self.hedged < HEDGE_BUDGET * self.limiter.calls:
+                    started = self.limiter.try_acquire(self.limiter.max_limit)
+                if started is not None:
+                    self.hedged += 1
+                    pending.add(asyncio.ensure_future(self.send(method, api, endpoint, timeout, kwargs, started)))
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def wait_retry(self, method, api, attempt, reason, response=None):
+        delay = retry_delay(attempt, response)
+        self.retried += 1
+        self.log(f"{method} {api}: {reason}, retry {attempt}/{self.retries} in {delay:.1f} seconds.")
+        await asyncio.sleep(delay)
+
+    async def get(self, api, **kwargs):
+        return await self.request("GET", api, **kwargs)
+
+    async def post(self, api, **kwargs):
+        return await self.request("POST", api, **kwargs)
+
+    async def put(self, api, **kwargs):
+        return await self.request("PUT", api, **kwargs)
+
+    async def delete(self, api, **kwargs):
+        return await self.request("DELETE", api, **kwargs)
+
+    async def login(self, username, password):
+        self.username = username
+        self.password = password
+
+        if self.token_cache:
+            token = self.token_cache.get(self.masking_engine, username)
+            if token:
+                self.auth_header = {'Authorization': token}
+                self.log(f"{username} reusing cached token {token}")
+                return
+
+        await self.authenticate()
+
+    async def authenticate(self):
+        payload = {"username": self.username, "password": self.password}
+        self.log(f"Logging in with {self.username} ...")
+
+        try:
+            async with self.open_session().post(self.url("login"), json=payload) as answer:
+                status, text = answer.status, await answer.text()
+
+            if status != 200:
+                self.log(f"Login failed: {status} - {text}")
+                sys.exit(1)
+
+            data = json.loads(text)
+            if 'Authorization' not in data:
+                self.log(f"Login failed: No Authorization token. Response: {data}")
+                sys.exit(1)
+
+            self.auth_header = {'Authorization': data['Authorization']}
+            if self.token_cache:
+                self.token_cache.put(self.masking_engine, self.username, data['Authorization'])
+            self.log(f"{self.username} logged in successfully with token {data['Authorization']}")
+
+        except Exception as e:
+            self.log(f"Login exception: {e}")
+            sys.exit(1)
+
+    async def reauthenticate(self, stale_token):
+        async with self.auth_lock:
+            # Another coroutine may already have replaced the stale token.
+            if self.auth_header.get('Authorization') != stale_token:
+                return
+            self.log(f"Token {stale_token} rejected by the engine (401). Logging in again ...")
+            if self.token_cache:
+                self.token_cache.drop(self.masking_engine, self.username)
+            await self.authenticate()
+
+    async def logout(self):
+        # No re-login on 401 once the run is shutting down.
+        self.username = None
+        if not self.auth_header:
+            await self.close()
+            return
+        hedged = f", {self.hedged} hedged ({self.hedge_wins} answered first)" if self.hedge else ""
+        self.log(f"Engine {self.masking_engine}: {self.limiter.summary()}, {self.retried} retried{hedged}.")
+
+        if self.token_cache:
+            # The token stays valid for the next script of the pipeline.
+            self.log(f"Keeping token cached in {self.token_cache.path}.")
+            self.auth_header = {}
+            await self.close()
+            return
+
+        self.log("Logging out ...")
+        try:
+            response = await self.put("logout")
+            self.log(f"Response Code: {response.status_code} - Response Body: {response.text}")
+            self.log("Logged out successfully.")
+        except Exception as e:
+            self.log(f"Logout exception: {e}")
+        finally:
+            self.auth_header = {}
+            await self.close()
+
+
+class AsyncPaginator(Paginator):
+    """Paginator over an AsyncEngineClient, read with `async for`: the same
+    page sizes and read-ahead window, with tasks instead of threads."""
+
+    async def fetch(self, page_number, page_size):
+        params = dict(self.params, page_number=page_number, page_size=page_size)
+        started = time.monotonic()
+        response = await self.client.get(self.api, params=params)
+        elapsed = time.monotonic() - started
+        if response.status_code != 200:
+            raise PageError(self.api, page_number, response)
+        data = response.json()
+        return data, data.get('responseList') or [], elapsed
+
+    async def __aiter__(self):
+        first_size = self.page_size
+        data, items, elapsed = await self.fetch(1, first_size)
+        for item in items:
+            yield item
+
+        self.total = page_total(data)
+        page_size = next_page_size(first_size, elapsed, self.max_page_size)
+        with tuned_lock:
+            tuned_page_sizes[self.tuning_key] = page_size
+
+        if self.total is None:
+            # No total reported: read on until a short page, one at a time.
+            page_number = 1
+            while len(items) == first_size:
+                page_number += 1
+                data, items, _ = await self.fetch(page_number, first_size)
+                for item in items:
+                    yield item
+            return
+
+        if self.total <= first_size or len(items) < first_size:
+            return
+
+        requests = iter(self.remaining_pages(first_size, page_size))
+        tasks = deque(asyncio.ensure_future(self.fetch(number, size))
+                      for number, size in itertools.islice(requests, self.workers * PAGES_AHEAD))
+        try:
+            while tasks:
+                _, items, _ = await tasks.popleft()
+                for number, size in itertools.islice(requests, 1):
+                    tasks.append(asyncio.ensure_future(self.fetch(number, size)))
+                for item in items:
+                    yield item
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+class AsyncIncrementalReader(IncrementalReader):
+    """IncrementalReader over an AsyncEngineClient, read with `async for`:
+    the same search for the first new page, awaited page by page."""
+
+    async def fetch(self, page_number):
+        params = dict(self.params, page_number=page_number, page_size=self.page_size)
+        response = await self.client.get(self.api, params=params)
+        if response.status_code != 200:
+            raise PageError(self.api, page_number, response)
+        data = response.json()
+        if page_number == 1:
+            self.total = page_total(data)
+        return data.get('responseList') or []
+
+    async def page(self, page_number):
+        if page_number not in self.pages:
+            items = await self.fetch(page_number)
+            if not self.in_order(items):
+                return None
+            self.pages[page_number] = items
+        return self.pages[page_number]
+
+    async def start_page(self):
+        steps = self.search()
+        try:
+            page_number = next(steps)
+            while True:
+                page_number = steps.send(await self.page(page_number))
+        except StopIteration as stop:
+            return stop.value
+
+    async def records(self):
+        if self.after_id is None:
+            async for record in AsyncPaginator(self.client, self.api, self.params, workers=self.workers):
+                yield record
+            return
+
+        start = await self.start_page()
+        if start is None:
+            self.full_scan = True
+            self.pages.clear()
+            async for record in AsyncPaginator(self.client, self.api, self.params, workers=self.workers):
+                if self.wanted(record):
+                    yield record
+            return
+        if not start:
+            return
+        for page_number in range(start, self.last_page() + 1):
+            items = self.pages.pop(page_number, None)
+            for record in filter(self.wanted, items if items is not None else await self.fetch(page_number)):
+                yield record
+
+    async def __aiter__(self):
+        async for record in self.records():
+            self.watermark.add(record, self.id_key, self.time_key)
+            yield record
+        # Open records that were not listed again are gone
+        self.watermark.open_ids -= self.reopen_ids
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+
+import threading
+import time
+from concurrent.futures import Future
+
+# Polling Defaults
+POLL_INITIAL_INTERVAL = 0.2
+POLL_BACKOFF_FACTOR = 2
+POLL_MAX_INTERVAL = 5
+TERMINAL_STATUSES = ("SUCCEEDED", "FAILED", "CANCELLED")
+
+
+class AsyncTaskPoller:
+    """Tracks every in-flight /async-tasks/{id} of a run from one thread.
+
+    Each task is checked quickly at first and then with exponential backoff
+    up to POLL_MAX_INTERVAL, so a task that completes in 200 ms is noticed
+    in about that time while long ones cost few requests. submit() returns a
+    Future resolved with the last response: either a 200 whose status is
+    terminal, or the first non-200 response, left for the caller to report.
+    """
+
+    def __init__(self, client, initial_interval=POLL_INITIAL_INTERVAL,
+                 backoff_factor=POLL_BACKOFF_FACTOR, max_interval=POLL_MAX_INTERVAL):
+        self.client = client
+        self.initial_interval = initial_interval
+        self.backoff_factor = backoff_factor
+        self.max_interval = max_interval
+        self.tasks = {}  # asyncTaskId -> [future, next_poll, interval]
+        self.condition = threading.Condition()
+        self.thread = None
+        self.stopped = False
+
+    def submit(self, async_task_id):
+        future = Future()
+        with self.condition:
+            if self.stopped:
+                raise RuntimeError("AsyncTaskPoller is stopped")
+            self.tasks[async_task_id] = [future, time.monotonic() + self.initial_interval, self.initial_interval]
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.poll_loop, name="dpxcc-async-tasks", daemon=True)
+                self.thread.start()
+            self.condition.notify()
+        return future
+
+    def wait(self, async_task_id):
+        return self.submit(async_task_id).result()
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+        if self.thread is not None:
+            self.thread.join()
+
+    def poll_loop(self):
+        while True:
+            with self.condition:
+                while not self.stopped and not self.due_tasks():
+                    self.condition.wait(self.time_to_next_poll())
+                if self.stopped:
+                    for future, _, _ in self.tasks.values():
+                        future.cancel()
+                    self.tasks.clear()
+                    return
+                due = self.due_tasks()
+
+            for async_task_id in due:
+                self.poll(async_task_id)
+
+    def due_tasks(self):
+        now = time.monotonic()
+        return [task_id for task_id, task in self.tasks.items() if task[1] <= now]
+
+    def time_to_next_poll(self):
+        if not self.tasks:
+            return None
+        return max(0, min(task[1] for task in self.tasks.values()) - time.monotonic())
+
+    def poll(self, async_task_id):
+        task = self.tasks[async_task_id]
+        future = task[0]
+        try:
+            response = self.client.get(f"async-tasks/{async_task_id}")
+            done = response.status_code != 200 or response.json().get('status') in TERMINAL_STATUSES
+        except Exception as e:
+            with self.condition:
+                del self.tasks[async_task_id]
+            future.set_exception(e)
+            return
+
+        with self.condition:
+            if done:
+                del self.tasks[async_task_id]
+            else:
+                task[2] = min(task[2] * self.backoff_factor, self.max_interval)
+                task[1] = time.monotonic() + task[2]
+        if done:
+            future.set_result(response)
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+
+import time
+
+from .catalog import ID_KEYS, NAME_KEYS
+from .storage import load_json, save_json
+
+BUNDLE_VERSION = 1
+DEFAULT_BUNDLE = "bundle.json"
+
+SYNCABLE_API = "syncable-objects"
+EXPORT_API = "export"
+IMPORT_API = "import-async"
+
+# objectType of the syncable objects identified by a bare "id"
+SYNCABLE_TYPES = {
+    "USER_ALGORITHM": "algorithms",
+    "DOMAIN": "domains",
+    "CLASSIFIER": "classifiers",
+    "PROFILE_SET": "profile-sets",
+}
+
+
+class BundleError(Exception):
+    """A bundle that cannot be imported (missing, not a bundle, outdated)."""
+
+
+def syncable_name(syncable, ids):
+    """(kind, name) of a syncable object of the catalog kinds, else None.
+
+    Algorithms and domains are identified by name; classifiers and profile
+    sets may be identified by id only, which ids (kind -> {id: name}, from
+    fetch_engine_catalog()) turns back into a name.
+    """
+    identifier = syncable.get('objectIdentifier') or {}
+    for kind, name_key in NAME_KEYS.items():
+        if name_key in identifier:
+            return kind, identifier[name_key]
+    for kind, id_key in ID_KEYS.items():
+        if id_key and id_key in identifier:
+            return kind, ids.get(kind, {}).get(identifier[id_key])
+    kind = SYNCABLE_TYPES.get(syncable.get('objectType'))
+    if kind and 'id' in identifier:
+        return kind, ids.get(kind, {}).get(identifier['id'])
+    return None
+
+
+def select_syncable(syncables, names, engine):
+    """Syncable objects named in names (kind -> names), and kind -> names
+    of those found. engine is the engine catalog (fetch_engine_catalog())."""
+    ids = {kind: {item.get(id_key): name for name, item in engine.get(kind, {}).items()}
+           for kind, id_key in ID_KEYS.items() if id_key}
+    selected, found = [], {kind: [] for kind in names}
+    for syncable in syncables:
+        match = syncable_name(syncable, ids)
+        if match and match[0] in names and match[1] in names[match[0]] and match[1] not in found[match[0]]:
+            selected.append(syncable)
+            found[match[0]].append(match[1])
+    return selected, found
+
+
+def build_bundle(document, masking_engine, api_version, objects):
+    """Bundle file: the engine's export document as is (signed, so it is
+    imported unchanged) and the names it holds, to verify the import."""
+    return {
+        "version": BUNDLE_VERSION,
+        "engine": masking_engine,
+        "apiVersion": api_version,
+        "exported": time.time(),
+        "objects": {kind: list(names) for kind, names in objects.items()},
+        "document": document,
+    }
+
+
+def save_bundle(path, bundle):
+    save_json(path, bundle, mode=0o600, separators=(',', ':'))
+
+
+def load_bundle(path):
+    """Bundle written by save_bundle(); raises BundleError otherwise."""
+    bundle = load_json(path)
+    if not isinstance(bundle, dict) or 'document' not in bundle:
+        raise BundleError(f"{path} not found or not a bundle")
+    if bundle.get('version') != BUNDLE_VERSION:
+        raise BundleError(f"{path} has version {bundle.get('version')}, expected {BUNDLE_VERSION}")
+    return bundle
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+
+import json
+import os
+
+from .pagination import Paginator
+
+# Object kinds in creation order (deletes run in reverse)
+CATALOG_KINDS = ("algorithms", "domains", "classifiers", "profile-sets")
+
+# kind -> (directory, create CSV, delete CSV), as laid out in this repository
+CATALOG_SOURCES = {
+    "algorithms": ("algorithms", "crt_algorithms.csv", "dlt_algorithms.csv"),
+    "domains": ("domains", "crt_domains.csv", "dlt_domains.csv"),
+    "classifiers": ("classifiers", "crt_classifiers.csv", "dlt_classifiers.csv"),
+    "profile-sets": ("profileset", "crt_profile_sets.csv", "dlt_profile_sets.csv"),
+}
+NAME_KEYS = {
+    "algorithms": "algorithmName",
+    "domains": "domainName",
+    "classifiers": "classifierName",
+    "profile-sets": "profileSetName",
+}
+# Algorithms and domains are addressed by name, the rest by id
+ID_KEYS = {
+    "algorithms": None,
+    "domains": None,
+    "classifiers": "classifierId",
+    "profile-sets": "profileSetId",
+}
+# Local fields that do not map one to one onto the engine's
+IGNORED_FIELDS = {"algorithms": {"frameworkId", "pluginId"}, "classifiers": {"frameworkId"}}
+
+
+def read_csv_rows(csv_path):
+    # Same parsing as the bash scripts: drop quotes, split on ';'
+    rows = []
+    with open(csv_path, 'r') as csvfile:
+        for line in csvfile:
+            clean_line = line.replace('"', '').strip()
+            if not clean_line or clean_line.startswith('#'):
+                continue
+            rows.append(clean_line.split(';'))
+    return rows
+
+
+def referenced_algorithms(extension):
+    # Algorithm references look like {"name": "<algorithmName>"}
+    names = []
+    if isinstance(extension, dict):
+        if set(extension) == {'name'} and isinstance(extension['name'], str):
+            return [extension['name']]
+        for value in extension.values():
+            names.extend(referenced_algorithms(value))
+    elif isinstance(extension, list):
+        for value in extension:
+            names.extend(referenced_algorithms(value))
+    return names
+
+
+def local_lookup_file(algo_json):
+    # Path: .algorithmExtension.lookupFile.uri
+    # Bash uses jq -r -> returns empty string or value.
+    extension = algo_json.get('algorithmExtension') or {}
+    file_uri = (extension.get('lookupFile') or {}).get('uri')
+    if file_uri and file_uri != "0" and not file_uri.startswith("jar://") and not file_uri.startswith("delphix-file://"):
+        # Assuming local file if not special URI
+        return file_uri
+    return None
+
+
+def lookup_file_path(file_uri, lookup_dir):
+    """Local copy of a lookup file, whether the JSON still names the file
+    (NOMBRE.txt) or already holds an uploaded reference to it."""
+    if not file_uri or file_uri == "0" or file_uri.startswith("jar://"):
+        return None
+    path = os.path.join(lookup_dir, os.path.basename(file_uri))
+    return path if os.path.isfile(path) else None
+
+
+def classifier_payload(item):
+    # C_*.json item -> POST /classifiers body (as dpxcc_create_classifiers.py)
+    return {
+        "classifierName": item.get('name'),
+        "description": item.get('description'),
+        "frameworkId": item.get('frameworkId'),
+        "domainName": item.get('domain'),
+        "classifierConfiguration": item.get('properties'),
+    }
+
+
+def domain_payload(domain_json):
+    payload = dict(domain_json)
+    if not payload.get('defaultTokenizationCode'):
+        payload.pop('defaultTokenizationCode', None)
+    return payload
+
+
+class CatalogObject:
+    """One object of the local catalog (an algorithm, a domain, ...)."""
+
+    def __init__(self, kind, name, payload, source, framework=None):
+        self.kind = kind
+        self.name = name
+        self.payload = payload
+        self.source = source  # JSON file it came from
+        self.framework = framework  # frameworkName (algorithms) or type (classifiers)
+        self.resolved = False  # frameworkId/pluginId set from the engine's frameworks
+
+    def file_references(self):
+        # (container, key) pairs holding lookup file URIs in the payload
+        refs = []
+        if self.kind == "algorithms":
+            lookup = (self.payload.get('algorithmExtension') or {}).get('lookupFile')
+            if isinstance(lookup, dict) and lookup.get('uri'):
+                refs.append((lookup, 'uri'))
+        elif self.kind == "classifiers":
+            for vl in (self.payload.get('classifierConfiguration') or {}).get('valueLists', []):
+                if vl.get('file'):
+                    refs.append((vl, 'file'))
+        return refs
+
+
+class CatalogChange:
+    def __init__(self, kind, name, action, fields=None, local=None, remote=None):
+        self.kind = kind
+        self.name = name
+        self.action = action  # create, update, unchanged, delete
+        self.fields = fields or []
+        self.local = local
+        self.remote = remote
+
+
+def read_deletions(root, kinds=CATALOG_KINDS):
+    """Names listed in the dlt_*.csv files, kind -> [name]."""
+    deletions = {kind: [] for kind in kinds}
+    for kind in kinds:
+        directory, _, delete_csv = CATALOG_SOURCES[kind]
+        delete_path = os.path.join(root, directory, delete_csv)
+        if os.path.exists(delete_path):
+            deletions[kind] = [parts[0] for parts in read_csv_rows(delete_path)]
+    return deletions
+
+
+def load_local_catalog(root, kinds=CATALOG_KINDS):
+    """Objects listed in the crt_*.csv files and names in the dlt_*.csv files.
+
+    Returns (objects, deletions, problems): objects maps kind -> {name:
+    CatalogObject} in CSV order, deletions maps kind -> [name], and
+    problems lists missing or invalid files.
+    """
+    objects = {kind: {} for kind in kinds}
+    deletions = read_deletions(root, kinds)
+    problems = []
+
+    for kind in kinds:
+        directory, create_csv, _ = CATALOG_SOURCES[kind]
+        base = os.path.join(root, directory)
+        create_path = os.path.join(base, create_csv)
+
+        if not os.path.exists(create_path):
+            continue
+
+        for parts in read_csv_rows(create_path):
+            json_path = os.path.join(base, parts[0])
+            try:
+                with open(json_path, 'r') as jf:
+                    data = json.load(jf)
+            except (OSError, ValueError) as e:
+                problems.append(f"{json_path}: {e}")
+                continue
+
+            if kind == "algorithms":
+                framework = parts[1] if len(parts) > 1 else None
+                items = [CatalogObject(kind, data.get('algorithmName'), data, json_path, framework)]
+            elif kind == "domains":
+                items = [CatalogObject(kind, data.get('domainName'), domain_payload(data), json_path)]
+            elif kind == "classifiers":
+                items = [CatalogObject(kind, item.get('name'), classifier_payload(item), json_path, item.get('type'))
+                         for item in data]
+            else:
+                items = [CatalogObject(kind, data.get('profileSetName'), data, json_path)]
+
+            for item in items:
+                if not item.name:
+                    problems.append(f"{json_path}: object without a name")
+                else:
+                    objects[kind][item.name] = item
+
+    return objects, deletions, problems
+
+
+def fetch_engine_catalog(client, kinds=CATALOG_KINDS):
+    """Current engine objects, kind -> {name: object}.
+
+    Classifiers are listed with profile sets even when they are not one of
+    kinds: profile sets refer to them by id, the catalog by name."""
+    kinds = list(kinds)
+    if "profile-sets" in kinds and "classifiers" not in kinds:
+        kinds.append("classifiers")
+    engine = {kind: {} for kind in kinds}
+    for kind in kinds:
+        for item in Paginator(client, kind):
+            name = item.get(NAME_KEYS[kind])
+            if name:
+                engine[kind][name] = item
+    return engine
+
+
+def catalog_frameworks(framework_catalog, kinds=CATALOG_KINDS):
+    """Frameworks as resolve_frameworks() expects them: "algorithms" ->
+    {frameworkName: framework} and "classifiers" -> {frameworkName:
+    frameworkId}, from a FrameworkCatalog."""
+    frameworks = {"algorithms": {}, "classifiers": {}}
+    if "algorithms" in kinds:
+        frameworks["algorithms"] = framework_catalog.algorithms().by_name
+    if "classifiers" in kinds:
+        frameworks["classifiers"] = framework_catalog.classifiers().framework_ids
+    return frameworks
+
+
+def resolve_frameworks(obj, frameworks):
+    """Set the engine's frameworkId/pluginId on a local object's payload.
+
+    The ids in the JSON files belong to whichever engine they were exported
+    from; the framework name (algorithms) or type (classifiers) is what
+    identifies the framework on this one.
+    """
+    if obj.kind == "algorithms":
+        fw = frameworks["algorithms"].get(obj.framework)
+        if fw:
+            obj.payload['frameworkId'] = fw.get('frameworkId')
+            obj.payload['pluginId'] = (fw.get('plugin') or {}).get('pluginId')
+            obj.resolved = True
+    elif obj.kind == "classifiers":
+        framework_id = frameworks["classifiers"].get(obj.framework)
+        if framework_id is not None:
+            obj.payload['frameworkId'] = framework_id
+            obj.resolved = True
+
+
+class FileReferences:
+    """Maps lookup file URIs in the local catalog to engine references.
+
+    A URI is matched to a local file by name in lookup_dir, and the file to
+    the fileReferenceId uploaded for its contents (UploadCache).
+    """
+
+    def __init__(self, upload_cache, lookup_dir):
+        self.upload_cache = upload_cache
+        self.lookup_dir = lookup_dir
+
+    def path(self, file_uri):
+        return lookup_file_path(file_uri, self.lookup_dir)
+
+    def lookup(self, file_path):
+        return self.upload_cache.lookup(file_path) if self.upload_cache else None
+
+
+def changed_fields(local, remote, path=""):
+    """Dotted paths of local values the engine holds differently.
+
+    Only fields the engine reports are compared: what it does not return
+    cannot be told apart from what it stores with a default.
+    """
+    if isinstance(local, dict) and isinstance(remote, dict):
+        changes = []
+        for key, value in local.items():
+            if key not in remote:
+                continue
+            changes.extend(changed_fields(value, remote[key], f"{path}.{key}" if path else key))
+        return changes
+    if isinstance(local, (int, float)) and isinstance(remote, (int, float)) and not isinstance(local, bool):
+        return [] if float(local) == float(remote) else [path]
+    return [] if local == remote else [path]
+
+
+def comparable_payload(obj, file_refs):
+    """Local payload as the engine would report it.
+
+    Lookup files are replaced by the reference uploaded for their contents,
+    or by a placeholder that never matches when they were never uploaded.
+    """
+    payload = json.loads(json.dumps(obj.payload))
+    if not obj.resolved:
+        for field in IGNORED_FIELDS.get(obj.kind, ()):
+            payload.pop(field, None)
+
+    if obj.kind == "profile-sets":
+        names = payload.pop('classifierNames', [])
+        payload['classifierNames'] = sorted(names)
+
+    copy = CatalogObject(obj.kind, obj.name, payload, obj.source, obj.framework)
+    for container, key in copy.file_references():
+        path = file_refs.path(container[key])
+        if path:
+            container[key] = file_refs.lookup(path) or f"local:{os.path.basename(path)}"
+    return payload
+
+
+def comparable_remote(kind, remote, classifier_names):
+    remote = dict(remote)
+    if kind == "profile-sets":
+        remote['classifierNames'] = sorted(classifier_names.get(i, str(i)) for i in remote.pop('classifierIds', []) or [])
+    return remote
+
+
+def plan_catalog(objects, deletions, engine, file_refs, prune=False):
+    """Compare the local catalog with the engine, kind by kind.
+
+    Returns CatalogChanges in CSV order (creation order of kinds), followed
+    by deletions in reverse kind order when prune is set. A name is only
+    deleted if it is listed in a dlt_*.csv, exists on the engine and is not
+    part of the local catalog.
+    """
+    classifier_names = {item.get('classifierId'): name for name, item in engine.get("classifiers", {}).items()}
+    changes = []
+    for kind, items in objects.items():
+        for name, obj in items.items():
+            remote = engine.get(kind, {}).get(name)
+            if remote is None:
+                changes.append(CatalogChange(kind, name, "create", local=obj))
+                continue
+            fields = changed_fields(comparable_payload(obj, file_refs),
+                                    comparable_remote(kind, remote, classifier_names))
+            changes.append(CatalogChange(kind, name, "update" if fields else "unchanged", fields, obj, remote))
+
+    if prune:
+        for kind in reversed(list(objects)):
+            for name in deletions.get(kind, []):
+                if name in engine.get(kind, {}) and name not in objects[kind]:
+                    changes.append(CatalogChange(kind, name, "delete", remote=engine[kind][name]))
+    return changes
@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+
+import base64
+import logging
+import os
+import queue
+import socket
+import sys
+import threading
+import time
+from datetime import datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+
+from .throttle import (DEFAULT_RETRIES, IDEMPOTENT_METHODS, LATENCY_MAX_BODY, REJECTED_STATUS, RETRY_STATUS,
+                       AdaptiveLimiter, retry_delay)
+from .tokencache import TokenCache
+from .uploads import MultipartUpload
+
+# Configuration Defaults
+DEFAULT_API_VER = "v5.1.27"
+DEFAULT_KEEPALIVE = 300
+DEFAULT_POOL_SIZE = 10
+DEFAULT_CONNECT_TIMEOUT = 5
+DEFAULT_READ_TIMEOUT = 60
+UPLOAD_READ_TIMEOUT = 300
+HEDGE_PERCENTILE = 0.95
+HEDGE_MIN_DELAY = 0.05
+HEDGE_BUDGET = 0.05  # at most this share of calls is sent twice
+CONFIG_FILE = "CONFIG"
+
+
+def setup_logging(log_file, script_name):
+    log_date = datetime.now().strftime('%d%m%Y_%H%M%S')
+    log_file_name = log_file if log_file else f"{script_name}_{log_date}.log"
+
+    file_handler = logging.FileHandler(log_file_name)
+    console_handler = logging.StreamHandler(sys.stderr)
+
+    formatter = logging.Formatter('[%(asctime)s] %(message)s', datefmt='%d%m%Y %H:%M:%S')
+    file_handler.setFormatter(formatter)
+    console_handler.setFormatter(formatter)
+
+    logger = logging.getLogger()
+    logger.setLevel(logging.INFO)
+    logger.addHandler(file_handler)
+    logger.addHandler(console_handler)
+    return logger, log_file_name
+
+
+def read_config_file(config_file, log):
+    """User, password and engine of a CONFIG file (base64 user and password,
+    then the engine address); logs the problem and exits if it is unusable."""
+    if not os.path.exists(config_file):
+        log(f"Error: {config_file} not found!")
+        sys.exit(1)
+
+    try:
+        with open(config_file, 'r') as f:
+            lines = f.readlines()
+            encoded_user = lines[0].strip()
+            encoded_pass = lines[1].strip()
+            masking_engine = lines[2].strip()
+
+        username = base64.b64decode(encoded_user).decode('utf-8')
+        password = base64.b64decode(encoded_pass).decode('utf-8')
+    except Exception as e:
+        log(f"Error reading {config_file}: {e}")
+        sys.exit(1)
+    return username, password, masking_engine
+
+
+def keepalive_socket_options(keepalive=DEFAULT_KEEPALIVE):
+    # Same intent as curl --keepalive-time in the bash scripts: idle pooled
+    # connections are probed instead of being silently dropped by firewalls.
+    options = list(HTTPConnection.default_socket_options)
+    options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+    if hasattr(socket, "TCP_KEEPIDLE"):
+        options.append((socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, keepalive))
+    if hasattr(socket, "TCP_KEEPINTVL"):
+        options.append((socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, 30))
+    return options
+
+
+def rewind_body(kwargs):
+    # Streamed bodies were consumed by the first attempt of a request.
+    data = kwargs.get('data')
+    if hasattr(data, 'seek'):
+        data.seek(0)
+    for value in (kwargs.get('files') or {}).values():
+        if isinstance(value, tuple) and len(value) > 1 and hasattr(value[1], 'seek'):
+            value[1].seek(0)
+
+
+def body_size(kwargs):
+    # Bytes of a call's data (a MultipartUpload knows what is left to send)
+    data = kwargs.get('data')
+    try:
+        return len(data) if data is not None else 0
+    except TypeError:
+        return 0
+
+
+def endpoint_key(method, api):
+    # Calls compared for latency: same method and collection, whatever the
+    # object ID (async-tasks/12 and async-tasks/13 are the same endpoint).
+    collection, _, rest = api.partition('/')
+    return f"{method} {collection}{'/*' if rest else ''}"
+
+
+class EngineAdapter(HTTPAdapter):
+    """HTTPAdapter with TCP keep-alive enabled on every pooled connection."""
+
+    def __init__(self, keepalive=DEFAULT_KEEPALIVE, **kwargs):
+        self.keepalive = keepalive
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        pool_kwargs['socket_options'] = keepalive_socket_options(self.keepalive)
+        super().init_poolmanager(connections, maxsize, block=block, **pool_kwargs)
+
+
+class EngineClient:
+    """Connection to one Masking Engine shared by all dpxcc_*.py scripts.
+
+    A single requests.Session is used for every call, including the initial
+    connection check, so the TCP/TLS handshake is paid once and the pooled
+    connection is reused for login, data calls and logout.
+
+    Calls go through an AdaptiveLimiter: at most pool_size are in flight,
+    fewer while the engine answers slowly or with 429/5xx. Calls that can
+    be repeated are retried with backoff when the engine is busy or the
+    connection fails. With --hedge, a GET still unanswered after the 95th
+    percentile latency of its endpoint is sent a second time.
+    """
+
+    def __init__(self, args, log, pool_size=DEFAULT_POOL_SIZE, config_file=CONFIG_FILE):
+        self.args = args
+        self.log = log
+        self.config_file = config_file
+        self.masking_engine = ""
+        self.protocol = "http"
+        self.verify_ssl = True
+        self.api_version = DEFAULT_API_VER
+        self.api_base_url = ""
+        self.auth_header = {}
+        self.username = None
+        self.password = None
+        self.auth_lock = threading.Lock()
+        self.token_cache = TokenCache(config_file) if getattr(args, 'token_cache', False) else None
+        connect_timeout = getattr(args, 'connect_timeout', None) or DEFAULT_CONNECT_TIMEOUT
+        read_timeout = getattr(args, 'read_timeout', None) or DEFAULT_READ_TIMEOUT
+        self.timeout = (connect_timeout, read_timeout)
+        self.upload_timeout = (connect_timeout, max(read_timeout, UPLOAD_READ_TIMEOUT))
+        self.session = self.build_session(pool_size)
+        self.limiter = AdaptiveLimiter(pool_size, log)
+        self.retries = DEFAULT_RETRIES
+        self.retried = 0
+        self.hedge = getattr(args, 'hedge', False)
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def build_session(self, pool_size):
+        session = requests.Session()
+        adapter = EngineAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def read_config(self):
+        username, password, masking_engine = read_config_file(self.config_file, self.log)
+        self.set_engine(masking_engine)
+        return username, password
+
+    def set_engine(self, masking_engine):
+        self.masking_engine = masking_engine
+        if self.args.https_insecure:
+            self.protocol = "https"
+            self.verify_ssl = False
+        else:
+            self.protocol = "http"
+            self.verify_ssl = True
+        self.api_base_url = f"{self.protocol}://{self.masking_engine}/masking/api/{self.api_version}"
+
+    def check_connection(self):
+        url = f"{self.protocol}://{self.masking_engine}"
+        self.log(f"Checking connection to {url}...")
+        try:
+            response = self.session.get(url, timeout=self.timeout, verify=self.verify_ssl)
+            response.raise_for_status()
+            self.log(f"Connection to {url} successful.")
+        except requests.exceptions.RequestException as e:
+            self.log(f"Error connecting to {url}: {e}")
+            sys.exit(1)
+
+    def url(self, api):
+        return f"{self.api_base_url}/{api}"
+
+    def request(self, method, api, timeout=None, retry=None, **kwargs):
+        """One API call. GET, PUT and DELETE are retried on 429/502/503/504,
+        timeouts and connection errors; other calls only with retry=True,
+        except on 429, 503 or a connect timeout, which the engine never
+        processed."""
+        kwargs.setdefault('verify', self.verify_ssl)
+        retry = method in IDEMPOTENT_METHODS if retry is None else retry
+        endpoint = endpoint_key(method, api)
+        attempt = 0
+        reauthenticated = False
+        while True:
+            token = self.auth_header.get('Authorization')
+            try:
+                if self.hedge and method == "GET":
+                    response = self.send_hedged(method, api, endpoint, timeout, kwargs)
+                else:
+                    response = self.send(method, api, endpoint, timeout, kwargs)
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+                if attempt >= self.retries or not (retry or isinstance(e, requests.exceptions.ConnectTimeout)):
+                    raise
+                attempt += 1
+                self.wait_retry(method, api, attempt, type(e).__name__)
+                rewind_body(kwargs)
+                continue
+
+            # A cached token may have expired on the engine since the last run:
+            # log in again once and replay the call with the new token.
+            if (response.status_code == 401 and self.username and api not in ("login", "logout")
+                    and not reauthenticated):
+                self.reauthenticate(token)
+                reauthenticated = True
+                rewind_body(kwargs)
+                continue
+
+            if (response.status_code in RETRY_STATUS and (retry or response.status_code in REJECTED_STATUS)
+                    and attempt < self.retries):
+                attempt += 1
+                self.wait_retry(method, api, attempt, f"{response.status_code}", response)
+                rewind_body(kwargs)
+                continue
+            return response
+
+    def send(self, method, api, endpoint, timeout, kwargs, started=None):
+        # A large upload is slow for its size: it says nothing about the load
+        timed = body_size(kwargs) <= LATENCY_MAX_BODY
+        if started is None:
+            started = self.limiter.acquire()
+        try:
+            response = self.session.request(method, self.url(api), timeout=timeout or self.timeout, **kwargs)
+        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+            self.limiter.release(started, endpoint, overloaded=True, reason=f"{endpoint}: {type(e).__name__}")
+            raise
+        except Exception:
+            self.limiter.release(started, endpoint)
+            raise
+        self.limiter.release(started, endpoint, overloaded=response.status_code in RETRY_STATUS,
+                             reason=f"{endpoint}: {response.status_code}", timed=timed)
+        return response
+
+    def send_hedged(self, method, api, endpoint, timeout, kwargs):
+        """send() for reads: if no answer came within the 95th percentile
+        latency of the endpoint, the same call is sent again and the first
+        answer is used. The slower one is left to finish on its own (daemon)
+        thread. Copies are limited to HEDGE_BUDGET of the calls and to free
+        room in the connection pool, and only sent once the endpoint has
+        enough latency samples."""
+        delay = self.limiter.percentile(endpoint, HEDGE_PERCENTILE)
+        if delay is None:
+            return self.send(method, api, endpoint, timeout, kwargs)
+
+        outcomes = queue.Queue()
+
+        def attempt(hedge, started=None):
+            try:
+                outcomes.put((hedge, self.send(method, api, endpoint, timeout, kwargs, started), None))
+            except Exception as e:
+                outcomes.put((hedge, None, e))
+
+        # Timed from when the call is actually sent, not queued by the limiter
+        threading.Thread(target=attempt, args=(False, self.limiter.acquire()), daemon=True).start()
+        sent = 1
+        try:
+            outcome = outcomes.get(timeout=max(delay, HEDGE_MIN_DELAY))
+        except queue.Empty:
+            started = None
+            if self.hedged < HEDGE_BUDGET * self.limiter.calls:
+                started = self.limiter.try_acquire(self.limiter.max_limit)
+            if started is not None:
+                self.hedged += 1
+                sent = 2
+                threading.Thread(target=attempt, args=(True, started), daemon=True).start()
+            outcome = outcomes.get()
+
+        hedge, response, error = outcome
+        if error and sent == 2:
+            # The other copy may still succeed
+            hedge, response, error = outcomes.get()
+        if error:
+            raise error
+        if hedge:
+            self.hedge_wins += 1
+        return response
+
+    def wait_retry(self, method, api, attempt, reason, response=None):
+        delay = retry_delay(attempt, response)
+        self.retried += 1
+        self.log(f"{method} {api}: {reason}, retry {attempt}/{self.retries} in {delay:.1f} seconds.")
+        time.sleep(delay)
+
+    def get(self, api, **kwargs):
+        return self.request("GET", api, **kwargs)
+
+    def post(self, api, **kwargs):
+        return self.request("POST", api, **kwargs)
+
+    def put(self, api, **kwargs):
+        return self.request("PUT", api, **kwargs)
+
+    def delete(self, api, **kwargs):
+        return self.request("DELETE", api, **kwargs)
+
+    def upload(self, file_path, permanent=False):
+        # Bash: file=@$FILE_NAME;type=text/plain, streamed from disk
+        params = {"permanent": "true" if permanent else "false"}
+        with MultipartUpload(file_path, content_type='text/plain') as body:
+            headers = {'Content-Type': body.content_type}
+            # Repeating an upload only leaves an unused copy on the engine
+            return self.post("file-uploads", params=params, data=body, headers=headers, timeout=self.upload_timeout,
+                             retry=True)
+
+    def login(self, username, password):
+        self.username = username
+        self.password = password
+
+        if self.token_cache:
+            token = self.token_cache.get(self.masking_engine, username)
+            if token:
+                self.set_token(token)
+                self.log(f"{username} reusing cached token {token}")
+                return
+
+        self.authenticate()
+
+    def authenticate(self):
+        payload = {"username": self.username, "password": self.password}
+        self.log(f"Logging in with {self.username} ...")
+
+        try:
+            response = self.session.post(self.url("login"), json=payload, timeout=self.timeout, verify=self.verify_ssl)
+
+            if response.status_code != 200:
+                self.log(f"Login failed: {response.status_code} - {response.text}")
+                sys.exit(1)
+
+            data = response.json()
+            if 'Authorization' not in data:
+                self.log(f"Login failed: No Authorization token. Response: {data}")
+                sys.exit(1)
+
+            self.set_token(data['Authorization'])
+            if self.token_cache:
+                self.token_cache.put(self.masking_engine, self.username, data['Authorization'])
+            self.log(f"{self.username} logged in successfully with token {data['Authorization']}")
+
+        except Exception as e:
+            self.log(f"Login exception: {e}")
+            sys.exit(1)
+
+    def reauthenticate(self, stale_token):
+        with self.auth_lock:
+            # Another thread may already have replaced the stale token.
+            if self.auth_header.get('Authorization') != stale_token:
+                return
+            self.log(f"Token {stale_token} rejected by the engine (401). Logging in again ...")
+            if self.token_cache:
+                self.token_cache.drop(self.masking_engine, self.username)
+            self.authenticate()
+
+    def set_token(self, token):
+        self.auth_header = {'Authorization': token}
+        self.session.headers.update(self.auth_header)
+
+    def logout(self):
+        # No re-login on 401 once the run is shutting down.
+        self.username = None
+        if not self.auth_header:
+            return
+        hedged = f", {self.hedged} hedged ({self.hedge_wins} answered first)" if self.hedge else ""
+        self.log(f"Engine {self.masking_engine}: {self.limiter.summary()}, {self.retried} retried{hedged}.")
+
+        if self.token_cache:
+            # The token stays valid for the next script of the pipeline.
+            self.log(f"Keeping token cached in {self.token_cache.path}.")
+            self.auth_header = {}
+            self.session.close()
+            return
+
+        self.log("Logging out ...")
+        try:
+            response = self.put("logout")
+            self.log(f"Response Code: {response.status_code} - Response Body: {response.text}")
+            self.log("Logged out successfully.")
+        except Exception as e:
+            self.log(f"Logout exception: {e}")
+        finally:
+            self.auth_header = {}
+            self.session.headers.pop('Authorization', None)
+            self.session.close()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+
+import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+class LogBuffer:
+    """Logger front-end that keeps concurrent work readable.
+
+    Messages logged from a thread running under capture() are held back as
+    LogRecords (so they keep their original timestamp) and replayed later by
+    flush(), which lets the caller emit them in input order instead of in
+    completion order. Messages from any other thread go straight through.
+    """
+
+    def __init__(self, logger):
+        self.logger = logger
+        self.local = threading.local()
+
+    def log(self, message):
+        record = self.logger.makeRecord(self.logger.name, logging.INFO, __file__, 0, message, None, None)
+        records = getattr(self.local, 'records', None)
+        if records is None:
+            self.logger.handle(record)
+        else:
+            records.append(record)
+
+    def capture(self, func, *args):
+        self.local.records = []
+        try:
+            return self.local.records, func(*args), None
+        except BaseException as e:
+            # sys.exit() inside a worker must reach the main thread too.
+            return self.local.records, None, e
+        finally:
+            self.local.records = None
+
+    def flush(self, records):
+        for record in records:
+            self.logger.handle(record)
+
+
+def topological_order(names, dependencies):
+    """Stable topological order of range(len(names)).
+
+    dependencies maps an index to the names it needs; names that are not in
+    the list are ignored (they already exist on the engine or will fail
+    there). Cycles fall back to input order for the nodes involved.
+    """
+    position = {name: index for index, name in enumerate(names) if name}
+    pending = {index: {position[dep] for dep in dependencies.get(index, ()) if dep in position and position[dep] != index}
+               for index in range(len(names))}
+    order = []
+    done = set()
+    while pending:
+        ready = [index for index in sorted(pending) if pending[index] <= done]
+        if not ready:
+            ready = [min(pending)]
+        for index in ready:
+            order.append(index)
+            done.add(index)
+            del pending[index]
+    return order
+
+
+def run_ordered(func, items, workers, log_buffer, submit_order=None):
+    """Yield (item, func(item)) for every item, in input order.
+
+    With workers > 1 the calls run on a bounded thread pool, submitted in
+    submit_order (defaults to input order); each item's log lines are
+    replayed when the item is yielded, so the log reads as if the run had
+    been sequential. The first failure is re-raised after its log lines and
+    cancels everything not yet started.
+    """
+    if workers <= 1:
+        for item in items:
+            yield item, func(item)
+        return
+
+    order = submit_order if submit_order is not None else range(len(items))
+    executor = ThreadPoolExecutor(max_workers=workers)
+    futures = {}
+    try:
+        for index in order:
+            futures[index] = executor.submit(log_buffer.capture, func, items[index])
+        for index, item in enumerate(items):
+            records, result, error = futures[index].result()
+            log_buffer.flush(records)
+            if error is not None:
+                raise error
+            yield item, result
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def run_graph(func, items, dependencies, workers, log_buffer, succeeded=bool):
+    """Yield (item, func(item)) for every item as soon as it has finished.
+
+    dependencies maps an index to the indexes it needs. An item is started
+    once all of them have finished and succeeded(result) is true for each;
+    up to workers items run at the same time, the lowest index first. The
+    dependants of an item that did not succeed are not run and are yielded
+    with None as their result. Each item's log lines are replayed in one
+    block when it is yielded. A cycle is broken by starting its lowest
+    index, as topological_order() does. The first exception is re-raised
+    after its log lines and cancels everything not yet started.
+    """
+    waiting = {index: {dep for dep in dependencies.get(index, ()) if dep != index and 0 <= dep < len(items)}
+               for index in range(len(items))}
+    dependants = {}
+    for index, deps in waiting.items():
+        for dep in deps:
+            dependants.setdefault(dep, []).append(index)
+
+    executor = ThreadPoolExecutor(max_workers=max(1, workers))
+    running = {}
+
+    def start_ready():
+        ready = sorted(index for index, deps in waiting.items() if not deps)
+        if not ready and not running and waiting:
+            ready = [min(waiting)]
+        for index in ready:
+            del waiting[index]
+            running[executor.submit(log_buffer.capture, func, items[index])] = index
+
+    def skip_dependants(index):
+        # Everything that needs a failed item, directly or not
+        skipped = []
+        pending = list(dependants.get(index, []))
+        while pending:
+            dependant = pending.pop(0)
+            if dependant in waiting:
+                del waiting[dependant]
+                skipped.append(dependant)
+                pending.extend(dependants.get(dependant, []))
+        return sorted(skipped)
+
+    try:
+        start_ready()
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in sorted(done, key=running.get):
+                index = running.pop(future)
+                records, result, error = future.result()
+                log_buffer.flush(records)
+                if error is not None:
+                    raise error
+                yield items[index], result
+
+                if succeeded(result):
+                    for dependant in dependants.get(index, []):
+                        if dependant in waiting:
+                            waiting[dependant].discard(index)
+                else:
+                    for dependant in skip_dependants(index):
+                        yield items[dependant], None
+            start_ready()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+
+from collections import Counter
+
+from .listexport import EXECUTION_COMPONENTS
+
+# Fields of the component, the columns of dpxcc_get_execution_comp.py
+COMPONENT_FIELDS = EXECUTION_COMPONENTS.columns
+# Execution field -> column; the ones the component also has are prefixed
+EXECUTION_FIELDS = {
+    "jobId": "jobId",
+    "status": "executionStatus",
+    "rowsMasked": "executionRowsMasked",
+    "rowsTotal": "executionRowsTotal",
+    "startTime": "executionStartTime",
+    "endTime": "executionEndTime",
+    "submitTime": "executionSubmitTime",
+}
+NO_EXCEPTION = "none"
+
+
+class ExecutionDataset:
+    """Executions, components and events joined into one row per component.
+
+    Executions (the smallest list) are kept whole in a hash index by
+    executionId. Events (the largest) are not kept: each one only adds to
+    the counters of its component, by severity and by exceptionType, and
+    to the event count of its execution, whether or not that execution
+    is indexed. Components are then streamed and
+    each gets its row from the two indexes, so memory grows with the
+    number of executions and components, never with the number of events.
+    """
+
+    def __init__(self):
+        self.executions = {}  # executionId -> execution
+        self.component_events = {}  # executionComponentId -> Counter of count columns
+        self.execution_events = Counter()  # executionId -> events, with or without component
+        self.severities = set()
+        self.exception_types = set()
+        self.events = 0
+        self.count_columns = []
+
+    def add_execution(self, execution):
+        self.executions[execution.get('executionId')] = execution
+
+    def add_event(self, event):
+        """Count an event. Its execution does not have to be indexed yet:
+        one that started after the executions were listed is only looked
+        up when its components are joined."""
+        count = event.get('count') if isinstance(event.get('count'), int) else 1
+        self.events += 1
+        self.execution_events[event.get('executionId')] += count
+        component_id = event.get('executionComponentId')
+        if component_id is None:
+            return
+        severity = event.get('severity') or "UNKNOWN"
+        exception_type = event.get('exceptionType') or NO_EXCEPTION
+        self.severities.add(severity)
+        self.exception_types.add(exception_type)
+        counts = self.component_events.setdefault(component_id, Counter())
+        counts["events"] += count
+        counts[f"events_{severity}"] += count
+        counts[f"exceptions_{exception_type}"] += count
+
+    def columns(self):
+        """Columns of the rows, once every event is counted: the event
+        counts depend on the severities and exception types seen."""
+        self.count_columns = ["events", *(f"events_{severity}" for severity in sorted(self.severities)),
+                              *(f"exceptions_{exception_type}" for exception_type in sorted(self.exception_types))]
+        return [*COMPONENT_FIELDS, *EXECUTION_FIELDS.values(), "executionEvents", *self.count_columns]
+
+    def row(self, component):
+        """The wide record of a component, None if its execution is not in
+        the dataset."""
+        execution = self.executions.get(component.get('executionId'))
+        if execution is None:
+            return None
+        row = {field: component.get(field) for field in COMPONENT_FIELDS}
+        row.update({column: execution.get(field) for field, column in EXECUTION_FIELDS.items()})
+        row["executionEvents"] = self.execution_events[component.get('executionId')]
+        counts = self.component_events.get(component.get('executionComponentId'), Counter())
+        row.update({column: counts[column] for column in self.count_columns})
+        return row
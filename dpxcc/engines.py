@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+
+import os
+
+from .catalog import read_csv_rows
+
+DEFAULT_ENGINES_FILE = "engines.csv"
+
+
+class EngineTarget:
+    """One engine of a fan-out run: a name, its CONFIG file and workers."""
+
+    def __init__(self, name, config_file, workers=None):
+        self.name = name
+        self.config_file = config_file
+        self.workers = workers  # None: the -w of the command line
+
+
+def read_engines_file(engines_file):
+    """Engines listed in an engines file, one per line:
+
+        "name";"config file";"workers"
+
+    The config file has the CONFIG format (user, password and engine) and
+    defaults to CONFIG.<name>; relative paths are taken from the engines
+    file's directory. workers is optional. Raises ValueError on a bad line.
+    """
+    base = os.path.dirname(os.path.abspath(engines_file))
+    targets = []
+    for parts in read_csv_rows(engines_file):
+        name = parts[0].strip()
+        config_file = parts[1].strip() if len(parts) > 1 and parts[1].strip() else f"CONFIG.{name}"
+        workers = parts[2].strip() if len(parts) > 2 else ""
+        if not workers:
+            workers = None
+        elif workers.isdigit() and int(workers) > 0:
+            workers = int(workers)
+        else:
+            raise ValueError(f"{engines_file}: invalid workers '{workers}' for engine {name}")
+        if any(target.name == name for target in targets):
+            raise ValueError(f"{engines_file}: engine {name} listed twice")
+        targets.append(EngineTarget(name, os.path.join(base, config_file), workers))
+    return targets
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+
+import csv
+import gzip
+import json
+import os
+import shutil
+from datetime import datetime
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # optional, only needed for parquet output
+    pyarrow = None
+
+# Output type -> file extension
+OUTPUT_TYPES = {
+    "csv": ".csv",
+    "jsonl": ".jsonl.gz",
+    "parquet": ".parquet",
+}
+DEFAULT_OUTPUT_TYPE = "csv"  # what the dpxcc_get_execution*.sh scripts write
+CSV_DELIMITER = ";"
+PARQUET_BATCH_ROWS = 10000  # rows kept in memory per parquet row group
+
+
+class ExportError(Exception):
+    """An output that cannot be written (unknown type, missing package)."""
+
+
+def default_output_file(prefix, output_type, dated=True):
+    # Incremental exports keep appending to the same, undated, file
+    if not dated:
+        return f"{prefix}{OUTPUT_TYPES[output_type]}"
+    return f"{prefix}_{datetime.now().strftime('%d%m%Y_%H%M%S')}{OUTPUT_TYPES[output_type]}"
+
+
+def output_type_of(output_file):
+    """Output type for a file name without -t: the one of its extension
+    (.jsonl alone too), DEFAULT_OUTPUT_TYPE for any other name or none."""
+    name = (output_file or "").lower()
+    if name.endswith(".jsonl"):
+        return "jsonl"
+    for output_type, extension in OUTPUT_TYPES.items():
+        if name.endswith(extension):
+            return output_type
+    return DEFAULT_OUTPUT_TYPE
+
+
+def csv_value(value):
+    # As jq @tsv wrote them in the bash scripts: null is empty, true/false
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, separators=(',', ':'))
+    return value
+
+
+class RecordWriter:
+    """Writes records (dicts) one at a time to an output file.
+
+    Nothing but the current record (or one parquet batch) is kept in
+    memory. The file is written under a temporary name and renamed on
+    close(), so an interrupted export never looks complete; abort() drops it.
+    With append=True, close() adds the new records at the end of the file
+    instead of replacing it.
+    """
+
+    def __init__(self, path, columns=None, append=False):
+        self.path = path
+        self.columns = list(columns or [])
+        self.append = append
+        self.tmp_path = f"{path}.{os.getpid()}.tmp"
+        self.count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def write(self, record):
+        raise NotImplementedError
+
+    def finish(self):
+        raise NotImplementedError
+
+    def appending(self):
+        # Appending to a file that has records already (a CSV header too)
+        return self.append and os.path.exists(self.path) and os.path.getsize(self.path) > 0
+
+    def close(self):
+        self.finish()
+        if not self.appending():
+            os.replace(self.tmp_path, self.path)
+            return
+        with open(self.tmp_path, 'rb') as src, open(self.path, 'ab') as dst:
+            shutil.copyfileobj(src, dst)
+            dst.flush()
+            os.fsync(dst.fileno())
+        os.remove(self.tmp_path)
+
+    def abort(self):
+        try:
+            self.finish()
+        finally:
+            if os.path.exists(self.tmp_path):
+                os.remove(self.tmp_path)
+
+
+class CsvWriter(RecordWriter):
+    """CSV with the given columns, separated by ; like the bash exports."""
+
+    def __init__(self, path, columns, append=False):
+        super().__init__(path, columns, append)
+        self.file = open(self.tmp_path, 'w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file, delimiter=CSV_DELIMITER)
+        if not self.appending():
+            self.writer.writerow(self.columns)
+
+    def write(self, record):
+        self.writer.writerow([csv_value(record.get(column)) for column in self.columns])
+        self.count += 1
+
+    def finish(self):
+        self.file.close()
+
+
+class JsonLinesWriter(RecordWriter):
+    """JSON Lines: every record whole, one per line, gzip-compressed unless
+    the file name does not end in .gz. Appended records are one more gzip
+    member, which readers concatenate."""
+
+    def __init__(self, path, columns=None, append=False):
+        super().__init__(path, columns, append)
+        if path.lower().endswith(".gz"):
+            self.file = gzip.open(self.tmp_path, 'wt', encoding='utf-8')
+        else:
+            self.file = open(self.tmp_path, 'w', encoding='utf-8')
+
+    def write(self, record):
+        self.file.write(json.dumps(record, separators=(',', ':')))
+        self.file.write("\n")
+        self.count += 1
+
+    def finish(self):
+        self.file.close()
+
+
+class ParquetWriter(RecordWriter):
+    """Parquet file with the given columns, one row group per batch.
+
+    Column types come from the first batch; columns that are empty in it
+    are written as strings.
+    """
+
+    def __init__(self, path, columns):
+        if pyarrow is None:
+            raise ExportError("parquet output needs the pyarrow package (pip install pyarrow)")
+        super().__init__(path, columns)
+        self.rows = []
+        self.schema = None
+        self.writer = None
+
+    def write(self, record):
+        self.rows.append({column: record.get(column) for column in self.columns})
+        self.count += 1
+        if len(self.rows) >= PARQUET_BATCH_ROWS:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        if self.writer is None:
+            inferred = pyarrow.Table.from_pylist(self.rows).schema
+            self.schema = pyarrow.schema([
+                pyarrow.field(field.name, pyarrow.string()) if pyarrow.types.is_null(field.type) else field
+                for field in inferred])
+            self.writer = pyarrow.parquet.ParquetWriter(self.tmp_path, self.schema)
+        for row in self.rows:
+            for field in self.schema:
+                if pyarrow.types.is_string(field.type) and row[field.name] is not None:
+                    row[field.name] = str(row[field.name])
+        self.writer.write_table(pyarrow.Table.from_pylist(self.rows, schema=self.schema))
+        self.rows = []
+
+    def abort(self):
+        self.rows = []
+        super().abort()
+
+    def finish(self):
+        self.flush()
+        if self.writer is None:
+            # No records: an empty file with the columns
+            self.schema = pyarrow.schema([pyarrow.field(column, pyarrow.string()) for column in self.columns])
+            self.writer = pyarrow.parquet.ParquetWriter(self.tmp_path, self.schema)
+        self.writer.close()
+
+
+def open_writer(path, output_type, columns, append=False):
+    """RecordWriter for an output type; raises ExportError if it is unknown
+    or cannot be written here (parquet files cannot be appended to)."""
+    if output_type == "csv":
+        return CsvWriter(path, columns, append)
+    if output_type == "jsonl":
+        return JsonLinesWriter(path, columns, append)
+    if output_type == "parquet":
+        if append:
+            raise ExportError("parquet files cannot be appended to, use csv or jsonl")
+        return ParquetWriter(path, columns)
+    raise ExportError(f"unknown output type {output_type}, expected one of {', '.join(OUTPUT_TYPES)}")
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+
+import hashlib
+import os
+import threading
+import time
+
+from .storage import cache_path, load_json, save_json
+
+UPLOAD_CACHE_FILE = "uploads.json"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# uploads.json is read, changed and rewritten as a whole
+upload_cache_lock = threading.Lock()
+
+
+def file_sha256(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_reference_gone(response, file_ref_id):
+    # The engine answers 400/404 naming the reference when an uploaded file
+    # it was asked to use has been removed.
+    return response.status_code in (400, 404) and bool(file_ref_id) and file_ref_id in response.text
+
+
+class UploadCache:
+    """fileReferenceIds of lookup files already uploaded to an engine.
+
+    Entries are keyed by engine and SHA-256 of the file contents, so the same
+    file is uploaded once whatever its name or location, and by whichever
+    script (algorithms or classifiers) gets to it first. The cache file is
+    shared by all scripts (see dpxcc.storage.cache_dir).
+    """
+
+    def __init__(self, masking_engine, path=None):
+        self.masking_engine = masking_engine
+        self.path = path or cache_path(UPLOAD_CACHE_FILE)
+        self.lock = upload_cache_lock  # shared by every engine's cache in this process
+        self.digests = {}  # (path, size, mtime) -> sha256
+
+    def key(self, digest):
+        return f"{self.masking_engine}|{digest}"
+
+    def digest(self, file_path):
+        stat = os.stat(file_path)
+        memo_key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+        if memo_key not in self.digests:
+            self.digests[memo_key] = file_sha256(file_path)
+        return self.digests[memo_key]
+
+    def load(self):
+        data = load_json(self.path, {})
+        return data if isinstance(data, dict) else {}
+
+    def lookup(self, file_path):
+        entry = self.load().get(self.key(self.digest(file_path)))
+        return entry.get('fileReferenceId') if entry else None
+
+    def store(self, file_path, file_ref_id):
+        key = self.key(self.digest(file_path))
+        with self.lock:
+            data = self.load()
+            data[key] = {
+                "fileReferenceId": file_ref_id,
+                "fileName": os.path.basename(file_path),
+                "size": os.path.getsize(file_path),
+                "uploaded": int(time.time()),
+            }
+            save_json(self.path, data)
+
+    def invalidate(self, file_ref_id):
+        with self.lock:
+            data = self.load()
+            stale = [key for key, entry in data.items()
+                     if key.startswith(f"{self.masking_engine}|") and entry.get('fileReferenceId') == file_ref_id]
+            for key in stale:
+                del data[key]
+            if stale:
+                save_json(self.path, data)
+        return bool(stale)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+
+import hashlib
+import json
+import threading
+import time
+
+from .client import DEFAULT_API_VER
+from .pagination import Paginator
+from .storage import cache_path, load_json, save_json
+
+FRAMEWORK_CACHE_FILE = "frameworks.json"
+FRAMEWORK_PAGE_SIZE = 256
+
+# Framework list endpoints; only algorithm frameworks carry a schema
+FRAMEWORK_KINDS = ("algorithm/frameworks", "classifiers/frameworks")
+SCHEMA_KINDS = ("algorithm/frameworks",)
+
+# frameworks.json is read, changed and rewritten as a whole
+framework_cache_lock = threading.Lock()
+
+
+def framework_fingerprint(frameworks):
+    # Hash of the framework list without schemas: installing, removing or
+    # upgrading a plugin changes it, and it costs one small request.
+    body = json.dumps(sorted(frameworks, key=lambda fw: str(fw.get('frameworkId'))), sort_keys=True)
+    return hashlib.sha256(body.encode('utf-8')).hexdigest()
+
+
+def cached_frameworks(masking_engine, kind, api_version=DEFAULT_API_VER, path=None):
+    """Frameworks of an engine as last cached, without asking the engine
+    (None if never cached)."""
+    cache = load_json(path or cache_path(FRAMEWORK_CACHE_FILE), {}) or {}
+    entry = cache.get(f"{masking_engine}|{api_version}|{kind}")
+    return entry.get('frameworks') if entry else None
+
+
+class FrameworkIndex:
+    """Frameworks of one endpoint, indexed by frameworkName."""
+
+    def __init__(self, frameworks):
+        self.frameworks = frameworks
+        self.by_name = {fw.get('frameworkName'): fw for fw in frameworks if fw.get('frameworkName')}
+        self.framework_ids = {name: fw.get('frameworkId') for name, fw in self.by_name.items()}
+        self.plugin_ids = {name: (fw.get('plugin') or {}).get('pluginId') for name, fw in self.by_name.items()}
+
+    def get(self, name):
+        return self.by_name.get(name)
+
+    def __contains__(self, name):
+        return name in self.by_name
+
+    def __len__(self):
+        return len(self.by_name)
+
+
+class FrameworkCatalog:
+    """Algorithm and classifier frameworks, cached per engine and API version.
+
+    The full list (algorithm frameworks with their JSON schemas) is kept in
+    frameworks.json. Each run only lists the frameworks without schemas and
+    compares that with the fingerprint stored alongside; the schemas are
+    downloaded again only when it differs.
+    """
+
+    def __init__(self, client, log, path=None):
+        self.client = client
+        self.log = log
+        self.path = path or cache_path(FRAMEWORK_CACHE_FILE)
+        self.lock = threading.Lock()
+        self.indexes = {}
+
+    def key(self, kind):
+        return f"{self.client.masking_engine}|{self.client.api_version}|{kind}"
+
+    def list_frameworks(self, kind, include_schema):
+        params = {"include_schema": "true" if include_schema else "false"}
+        return list(Paginator(self.client, kind, params, page_size=FRAMEWORK_PAGE_SIZE))
+
+    def load(self, kind):
+        """FrameworkIndex of a kind, from the cache if it is still current.
+
+        Raises PageError if the engine does not answer the listing.
+        """
+        with self.lock:
+            if kind in self.indexes:
+                return self.indexes[kind]
+
+            started = time.monotonic()
+            summary = self.list_frameworks(kind, include_schema=False)
+            fingerprint = framework_fingerprint(summary)
+
+            cache = load_json(self.path, {}) or {}
+            entry = cache.get(self.key(kind))
+            if entry and entry.get('fingerprint') == fingerprint:
+                frameworks = entry.get('frameworks') or []
+                self.log(f"Frameworks {kind}: {len(frameworks)} unchanged since "
+                         f"{time.strftime('%d%m%Y %H:%M:%S', time.localtime(entry.get('fetched', 0)))}, using the cached copy.")
+            else:
+                if kind in SCHEMA_KINDS:
+                    frameworks = self.list_frameworks(kind, include_schema=True)
+                else:
+                    frameworks = summary
+                with framework_cache_lock:
+                    cache = load_json(self.path, {}) or {}
+                    cache[self.key(kind)] = {"fingerprint": fingerprint, "fetched": time.time(),
+                                             "frameworks": frameworks}
+                    save_json(self.path, cache)
+                self.log(f"Frameworks {kind}: {len(frameworks)} downloaded "
+                         f"({time.monotonic() - started:.1f} seconds).")
+
+            self.indexes[kind] = FrameworkIndex(frameworks)
+            return self.indexes[kind]
+
+    def algorithms(self):
+        return self.load("algorithm/frameworks")
+
+    def classifiers(self):
+        return self.load("classifiers/frameworks")
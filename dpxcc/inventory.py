@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from .pagination import Paginator
+from .storage import cache_path
+
+INVENTORY_FILE = "inventory.sqlite"
+DEFAULT_INVENTORY_MAX_AGE = 15 * 60
+
+# kind (list endpoint) -> (name key, id key); algorithms and domains are
+# addressed by name on the engine and have no separate id.
+INVENTORY_KINDS = {
+    "algorithms": ("algorithmName", None),
+    "domains": ("domainName", None),
+    "classifiers": ("classifierName", "classifierId"),
+    "profile-sets": ("profileSetName", "profileSetId"),
+    "algorithm/frameworks": ("frameworkName", "frameworkId"),
+    "classifiers/frameworks": ("frameworkName", "frameworkId"),
+}
+
+# Extra list parameters per kind
+INVENTORY_PARAMS = {
+    "algorithm/frameworks": {"include_schema": "false"},
+    "classifiers/frameworks": {"include_schema": "false"},
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS objects (
+    engine TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    object_id TEXT,
+    body TEXT NOT NULL,
+    seen REAL NOT NULL,
+    PRIMARY KEY (engine, kind, name)
+);
+CREATE INDEX IF NOT EXISTS objects_by_id ON objects (engine, kind, object_id);
+CREATE TABLE IF NOT EXISTS refreshes (
+    engine TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    refreshed REAL NOT NULL,
+    PRIMARY KEY (engine, kind)
+);
+"""
+
+
+def cached_names(masking_engine, kind, path=None):
+    """Names of a kind in the persistent inventory, without asking the
+    engine (None if that kind was never downloaded)."""
+    path = path or cache_path(INVENTORY_FILE)
+    if not os.path.exists(path):
+        return None
+    db = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        if not db.execute("SELECT 1 FROM refreshes WHERE engine = ? AND kind = ?", (masking_engine, kind)).fetchone():
+            return None
+        return {row[0] for row in db.execute("SELECT name FROM objects WHERE engine = ? AND kind = ?",
+                                             (masking_engine, kind))}
+    except sqlite3.Error:
+        return None
+    finally:
+        db.close()
+
+
+class Inventory:
+    """Local copy of the engine's catalog (classifiers, profile sets, ...).
+
+    Lookups are answered from SQLite, indexed by name and id. A kind is
+    downloaded the first time it is needed; after that, a copy older than
+    max_age is still served while a background thread refreshes it, and a
+    name that is not found triggers one synchronous refresh. Our own
+    create/delete calls update the rows in place through put()/remove().
+
+    With persistent=False the database lives in memory for this run only,
+    which behaves like the old per-script name -> id maps.
+    """
+
+    def __init__(self, client, log, persistent=False, path=None, max_age=DEFAULT_INVENTORY_MAX_AGE):
+        self.client = client
+        self.log = log
+        self.path = (path or cache_path(INVENTORY_FILE)) if persistent else ":memory:"
+        self.max_age = max_age
+        self.lock = threading.RLock()
+        self.db = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        if persistent:
+            self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+        self.refreshed_now = set()  # kinds downloaded by this run
+        self.refreshing = {}  # kind -> background Thread
+
+    @property
+    def engine(self):
+        return self.client.masking_engine
+
+    def refreshed_at(self, kind):
+        with self.lock:
+            row = self.db.execute("SELECT refreshed FROM refreshes WHERE engine = ? AND kind = ?",
+                                  (self.engine, kind)).fetchone()
+        return row[0] if row else None
+
+    def refresh(self, kind):
+        """Download a kind and apply the differences to the local copy."""
+        name_key, id_key = INVENTORY_KINDS[kind]
+        started = time.time()
+        items = {}
+        for item in Paginator(self.client, kind, INVENTORY_PARAMS.get(kind)):
+            if item.get(name_key):
+                items[item[name_key]] = item
+
+        added = updated = 0
+        with self.lock, self.db:
+            current = dict(self.db.execute("SELECT name, body FROM objects WHERE engine = ? AND kind = ?",
+                                           (self.engine, kind)))
+            for name, item in items.items():
+                body = json.dumps(item, sort_keys=True)
+                if current.get(name) == body:
+                    continue
+                if name in current:
+                    updated += 1
+                else:
+                    added += 1
+                self.write(kind, name, item.get(id_key) if id_key else None, body, started)
+            removed = [name for name in current if name not in items]
+            self.db.executemany("DELETE FROM objects WHERE engine = ? AND kind = ? AND name = ?",
+                                [(self.engine, kind, name) for name in removed])
+            self.db.execute("INSERT OR REPLACE INTO refreshes (engine, kind, refreshed) VALUES (?, ?, ?)",
+                            (self.engine, kind, started))
+            self.refreshed_now.add(kind)
+
+        if current:
+            self.log(f"Inventory {kind}: {len(items)} objects, {added} added, {updated} updated, "
+                     f"{len(removed)} removed ({time.time() - started:.1f} seconds).")
+        else:
+            self.log(f"Inventory {kind}: {len(items)} objects loaded ({time.time() - started:.1f} seconds).")
+
+    def write(self, kind, name, object_id, body, seen):
+        self.db.execute("INSERT OR REPLACE INTO objects (engine, kind, name, object_id, body, seen) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        (self.engine, kind, name, None if object_id is None else str(object_id), body, seen))
+
+    def ensure(self, kind):
+        """Make sure a kind is available, refreshing it if needed."""
+        if kind in self.refreshed_now:
+            return
+        refreshed = self.refreshed_at(kind)
+        if refreshed is None:
+            self.refresh(kind)
+        elif time.time() - refreshed > self.max_age:
+            self.refresh_in_background(kind)
+
+    def refresh_in_background(self, kind):
+        with self.lock:
+            if kind in self.refreshing:
+                return
+            self.log(f"Inventory {kind} is older than {self.max_age} seconds, refreshing in the background.")
+            thread = threading.Thread(target=self.background_refresh, args=(kind,), daemon=True,
+                                      name=f"dpxcc-inventory-{kind}")
+            self.refreshing[kind] = thread
+            thread.start()
+
+    def background_refresh(self, kind):
+        try:
+            self.refresh(kind)
+        except Exception as e:
+            self.log(f"Inventory {kind} background refresh failed: {e}")
+
+    def wait(self, kind=None):
+        for refreshing_kind, thread in list(self.refreshing.items()):
+            if kind is None or kind == refreshing_kind:
+                thread.join()
+                self.refreshing.pop(refreshing_kind, None)
+
+    def get(self, kind, name, refresh_missing=True):
+        self.ensure(kind)
+        with self.lock:
+            row = self.db.execute("SELECT body FROM objects WHERE engine = ? AND kind = ? AND name = ?",
+                                  (self.engine, kind, name)).fetchone()
+        if row is None and refresh_missing and kind not in self.refreshed_now:
+            # Maybe created since the last refresh (by another tool or user).
+            self.wait(kind)
+            if kind not in self.refreshed_now:
+                self.refresh(kind)
+            return self.get(kind, name, refresh_missing=False)
+        return json.loads(row[0]) if row else None
+
+    def get_id(self, kind, name):
+        _, id_key = INVENTORY_KINDS[kind]
+        item = self.get(kind, name)
+        return item.get(id_key) if item else None
+
+    def get_by_id(self, kind, object_id):
+        self.ensure(kind)
+        with self.lock:
+            row = self.db.execute("SELECT body FROM objects WHERE engine = ? AND kind = ? AND object_id = ?",
+                                  (self.engine, kind, str(object_id))).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def items(self, kind):
+        self.ensure(kind)
+        with self.lock:
+            rows = self.db.execute("SELECT body FROM objects WHERE engine = ? AND kind = ? ORDER BY name",
+                                   (self.engine, kind)).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def name_map(self, kind):
+        """{name: id} for a kind, like the maps the scripts used to build."""
+        name_key, id_key = INVENTORY_KINDS[kind]
+        return {item[name_key]: item.get(id_key) for item in self.items(kind)}
+
+    def put(self, kind, item):
+        # Called after our own successful create/update.
+        name_key, id_key = INVENTORY_KINDS[kind]
+        if not item.get(name_key):
+            return
+        with self.lock, self.db:
+            self.write(kind, item[name_key], item.get(id_key) if id_key else None,
+                       json.dumps(item, sort_keys=True), time.time())
+
+    def remove(self, kind, name):
+        # Called after our own successful delete.
+        with self.lock, self.db:
+            self.db.execute("DELETE FROM objects WHERE engine = ? AND kind = ? AND name = ?",
+                            (self.engine, kind, name))
+
+    def close(self):
+        self.wait()
+        with self.lock:
+            self.db.close()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+from .storage import cache_dir
+
+JOURNAL_DIR = "journals"
+
+# Status of a journal record
+DONE = "done"
+FAILED = "failed"
+SENT = "sent"  # sent, answer not received (yet)
+
+
+def content_hash(definition):
+    """SHA-256 of an object as defined locally (key order does not matter)."""
+    body = json.dumps(definition, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(body.encode('utf-8')).hexdigest()
+
+
+def journal_path(masking_engine, script):
+    directory = os.path.join(cache_dir(), JOURNAL_DIR)
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    return os.path.join(directory, f"{script}-{re.sub(r'[^A-Za-z0-9_.-]', '_', masking_engine)}.jsonl")
+
+
+class DeployJournal:
+    """Append-only journal of the objects a script has handled on an engine.
+
+    Every created or deleted object adds one JSON line: kind, name, content
+    hash, engine ID and whether it is done or failed. A run starts a new
+    journal; with resume=True it continues the last one instead, and
+    completed() tells which objects can be skipped because they were done
+    with the same content. A line cut short by a crash is ignored.
+
+    sending() writes a "sent" line before an object is created; once the
+    engine has answered (answered()), the next line replaces it. If the
+    answer was lost (timeout, crash during the call), the "sent" line stays
+    the last one, and only then does attempted() let the resumed run count
+    an "already exists" as its own.
+    """
+
+    def __init__(self, masking_engine, script, log, resume=False, path=None):
+        self.path = path or journal_path(masking_engine, script)
+        self.log = log
+        self.lock = threading.Lock()
+        self.records = {}  # (kind, name) -> last record
+        self.previous = {}  # last records of the run being resumed
+        self.unanswered = set()  # (kind, name) sent, no answer yet
+        if resume:
+            self.records = self.load()
+            self.previous = dict(self.records)
+            done = sum(1 for record in self.records.values() if record.get('status') == DONE)
+            self.log(f"Resuming from {self.path}: {done} objects done, "
+                     f"{len(self.records) - done} failed in the previous run.")
+        elif os.path.exists(self.path):
+            os.remove(self.path)
+
+    def load(self):
+        records = {}
+        if not os.path.exists(self.path):
+            return records
+        line = ""
+        with open(self.path, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                records[(record.get('kind'), record.get('name'))] = record
+        if line and not line.endswith("\n"):
+            # Cut short by a crash: end it, or the next record would be lost with it
+            with open(self.path, 'a') as f:
+                f.write("\n")
+        return records
+
+    def get(self, kind, name):
+        record = self.records.get((kind, name))
+        return record if record and record.get('status') == DONE else None
+
+    def completed(self, kind, name, digest=None):
+        """True if the object was done, and with the same content if digest
+        is given. A changed object is logged and has to be sent again."""
+        record = self.get(kind, name)
+        if not record:
+            return False
+        if digest and record.get('hash') and record['hash'] != digest:
+            self.log(f"{name} changed since the previous run, not skipped.")
+            return False
+        return True
+
+    def attempted(self, kind, name, digest):
+        """True if the previous run sent the object with the same content
+        and never got the answer: an "already exists" then means that run
+        created it before it was interrupted. An answered call, even one
+        rejected because the object already existed, does not count."""
+        record = self.previous.get((kind, name))
+        return bool(record and digest and record.get('status') == SENT and record.get('hash') == digest)
+
+    def sending(self, kind, name, digest):
+        self.record(kind, name, SENT, digest)
+        with self.lock:
+            self.unanswered.add((kind, name))
+
+    def answered(self, kind, name):
+        with self.lock:
+            self.unanswered.discard((kind, name))
+
+    def failed(self, kind, name, digest=None, object_id=None, **details):
+        """Record a failure, unless the answer to sending() was lost: the
+        "sent" line then stays the last one for --resume."""
+        with self.lock:
+            if (kind, name) in self.unanswered:
+                return
+        self.record(kind, name, FAILED, digest, object_id, **details)
+
+    def record(self, kind, name, status, digest=None, object_id=None, **details):
+        record = {"kind": kind, "name": name, "status": status, "hash": digest, "id": object_id,
+                  "time": time.time(), **details}
+        line = json.dumps(record, separators=(',', ':'))
+        with self.lock:
+            self.records[(kind, name)] = record
+            # One line per write, flushed to disk before the next object
+            fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+            try:
+                os.write(fd, f"{line}\n".encode('utf-8'))
+                os.fsync(fd)
+            finally:
+                os.close(fd)
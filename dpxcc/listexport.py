@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+
+import argparse
+import sys
+import time
+
+from .client import DEFAULT_CONNECT_TIMEOUT, DEFAULT_POOL_SIZE, DEFAULT_READ_TIMEOUT, EngineClient, setup_logging
+from .concurrency import LogBuffer
+from .export import OUTPUT_TYPES, ExportError, default_output_file, open_writer, output_type_of
+from .pagination import DEFAULT_PAGE_WORKERS, PageError, Paginator
+from .watermarks import IncrementalReader, load_watermark, restore_output, save_watermark, watermark_key
+
+PROGRESS_SECONDS = 10
+
+
+class ListExport:
+    """A list endpoint exported by one of the dpxcc_get_execution*.py
+    scripts: what to read, which columns to write and the option that
+    filters it (e.g. -e/--execution-id, sent as execution_id)."""
+
+    def __init__(self, script, api, id_key, time_key, columns, prefix, title, filter_flags, filter_param,
+                 filter_help):
+        self.script = script
+        self.api = api
+        self.id_key = id_key
+        self.time_key = time_key
+        self.columns = columns
+        self.prefix = prefix  # default output file name
+        self.title = title  # "Execution Event"
+        self.filter_flags = filter_flags
+        self.filter_param = filter_param
+        self.filter_help = filter_help
+
+    @property
+    def plural(self):
+        return f"{self.title}s"
+
+    @property
+    def noun(self):
+        # "events", "components": in progress lines and help texts
+        return self.plural.split()[-1].lower()
+
+
+EXECUTIONS = ListExport(
+    "dpxcc_get_execution", "executions", "executionId", "submitTime",
+    columns=("executionId", "jobId", "status", "rowsMasked", "rowsTotal", "bytesProcessed", "bytesTotal",
+             "startTime", "endTime", "submitTime"),
+    prefix="execution", title="Execution",
+    filter_flags=("-j", "--job-id"), filter_param="job_id", filter_help="Only the executions of this job")
+EXECUTION_COMPONENTS = ListExport(
+    "dpxcc_get_execution_comp", "execution-components", "executionComponentId", "startTime",
+    columns=("executionComponentId", "componentName", "executionId", "status", "rowsMasked", "rowsTotal",
+             "bytesProcessed", "bytesTotal", "startTime", "endTime", "logFile", "nonConformingDataCount"),
+    prefix="execution_comp", title="Execution Component",
+    filter_flags=("-e", "--execution-id"), filter_param="execution_id",
+    filter_help="Only the components of this execution")
+EXECUTION_EVENTS = ListExport(
+    "dpxcc_get_execution_event", "execution-events", "executionEventId", "timeStamp",
+    columns=("executionEventId", "executionId", "eventType", "severity", "cause", "count", "timeStamp",
+             "executionComponentId", "maskedObjectName", "algorithmName", "exceptionType", "exceptionDetail"),
+    prefix="execution_event", title="Execution Event",
+    filter_flags=("-e", "--execution-id"), filter_param="execution_id", filter_help="Only the events of this execution")
+
+
+class ListExporter:
+    def __init__(self, args, export):
+        self.args = args
+        self.export = export
+        self.logger, self.log_file_name = setup_logging(args.log_file, export.script)
+        self.log_buffer = LogBuffer(self.logger)
+        self.client = EngineClient(args, self.log, pool_size=max(DEFAULT_POOL_SIZE, args.page_workers))
+
+    def log(self, message):
+        self.log_buffer.log(message)
+
+    def check_response_error(self, func_name, api_name, response):
+        self.log(f"{func_name}() -> Function: {func_name}() - Api: {api_name} - Response Code: {response.status_code} - Response Body: {response.text}")
+        self.client.logout()
+        sys.exit(1)
+
+    def get_records(self, writer, params, watermark=None):
+        # Pages are written as they arrive; only a few are ever in memory
+        export = self.export
+        if watermark:
+            records = IncrementalReader(self.client, export.api, export.id_key, export.time_key, watermark, params,
+                                        page_size=self.args.page_size, workers=self.args.page_workers)
+        else:
+            records = Paginator(self.client, export.api, params, page_size=self.args.page_size,
+                                workers=self.args.page_workers)
+        started = last_progress = time.monotonic()
+        for record in records:
+            writer.write(record)
+            if time.monotonic() - last_progress >= PROGRESS_SECONDS:
+                last_progress = time.monotonic()
+                total = f" of {records.total}" if records.total is not None else ""
+                self.log(f"{writer.count}{total} {export.noun} written ...")
+        return time.monotonic() - started
+
+    def run(self):
+        export = self.export
+        output_type = self.args.output_type
+        output_file = self.args.output_file or default_output_file(export.prefix, output_type,
+                                                                   dated=not self.args.incremental)
+        value = getattr(self.args, export.filter_param)
+        params = {export.filter_param: value} if value else {}
+
+        if self.args.masking_engine:
+            self.client.set_engine(self.args.masking_engine)
+            username, password = self.args.masking_username, self.args.masking_password
+        else:
+            username, password = self.client.read_config()
+        self.client.check_connection()
+        self.client.login(username, password)
+
+        watermark = None
+        if self.args.incremental:
+            watermark = load_watermark(watermark_key(self.client.masking_engine, export.api, params, output_file))
+            restore_output(output_file, watermark, self.log)
+
+        try:
+            if watermark and watermark.last_id is not None:
+                self.log(f"Getting {export.plural} after {export.id_key} {watermark.last_id} ({watermark.last_time}) ...")
+            else:
+                self.log(f"Getting {export.plural} ...")
+            calls = self.client.limiter.calls
+            append = bool(watermark and watermark.last_id is not None)
+            with open_writer(output_file, output_type, export.columns, append=append) as writer:
+                elapsed = self.get_records(writer, params, watermark)
+            self.log(f"{writer.count} {export.plural} {'appended' if append else 'written'} to {output_file} "
+                     f"({self.client.limiter.calls - calls} requests, {elapsed:.1f} seconds).")
+            if watermark:
+                save_watermark(watermark, output_file)
+        except ExportError as e:
+            self.log(f"Error: {e}")
+            self.client.logout()
+            sys.exit(1)
+        except PageError as e:
+            self.check_response_error(f"get_{export.api.replace('-', '_')}", e.api, e.response)
+        except OSError as e:
+            self.log(f"Error writing {output_file}: {e}")
+            self.client.logout()
+            sys.exit(1)
+
+        self.client.logout()
+
+
+def export_parser(description, prefix, noun, filters, incremental=True):
+    """Options of the export scripts. filters are the (flags, dest, help)
+    of the options that narrow the lists down, e.g. -j/--job-id."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('-l', '--log-file', help="Log file name")
+    parser.add_argument('-o', '--output-file', help=f"Output file name (default {prefix}_<date> with the extension of the output type)")
+    parser.add_argument('-t', '--output-type', choices=tuple(OUTPUT_TYPES), type=str.lower, help="csv (; separated), jsonl (gzip compressed JSON Lines, every field) or parquet (needs pyarrow); default from the -o extension, else csv")
+    for flags, dest, help_text in filters:
+        parser.add_argument(*flags, dest=dest, help=help_text)
+    if incremental:
+        parser.add_argument('-n', '--incremental', action='store_true', help=f"Only fetch the {noun} exported to the output file since the last run and append them to it (default output file {prefix}.csv/.jsonl.gz)")
+    parser.add_argument('-x', '--proxy-bypass', default="true", help="Proxy ByPass (ignored)")
+    parser.add_argument('-k', '--https-insecure', action='store_true', help="Make Https Insecure")
+    parser.add_argument('-m', '--masking-engine', help="Masking Engine Address (default: from CONFIG)")
+    parser.add_argument('-u', '--masking-username', help="Masking Engine User Name")
+    parser.add_argument('-p', '--masking-password', '--masking-pwd', help="Masking Engine Password")
+    parser.add_argument('--page-size', type=int, help=f"{noun.capitalize()} per page to start with (adjusted to the engine's latency)")
+    parser.add_argument('--page-workers', type=int, default=DEFAULT_PAGE_WORKERS, help="Pages requested in parallel")
+    parser.add_argument('--token-cache', action='store_true', help="Reuse the engine token between runs (CONFIG.tokens)")
+    parser.add_argument('--connect-timeout', type=float, default=DEFAULT_CONNECT_TIMEOUT, help="Seconds to wait for a connection to the engine")
+    parser.add_argument('--read-timeout', type=float, default=DEFAULT_READ_TIMEOUT, help="Seconds to wait for the answer to a call")
+    parser.add_argument('--hedge', action='store_true', help="Request a page again if it has not answered within its usual 95th percentile time")
+    return parser
+
+
+def parse_export_args(parser):
+    """Parsed options of export_parser(), with the output type resolved;
+    exits with a usage error if they do not go together."""
+    args = parser.parse_args()
+    args.output_type = args.output_type or output_type_of(args.output_file)
+    if args.masking_engine and not (args.masking_username and args.masking_password):
+        parser.error("-m needs -u and -p")
+    if getattr(args, 'incremental', False) and args.output_type == "parquet":
+        parser.error("parquet files cannot be appended to: use -t csv or -t jsonl with --incremental")
+    return args
+
+
+def export_main(export):
+    """Command line of a list exporter script: parse, check, run."""
+    parser = export_parser(f"Export every {export.title} of the engine, page by page, to a file", export.prefix,
+                           export.noun, [(export.filter_flags, export.filter_param, export.filter_help)])
+    exporter = ListExporter(parse_export_args(parser), export)
+    exporter.run()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+
+import os
+import time
+
+from .catalog import CATALOG_SOURCES, CatalogObject
+from .storage import load_json, save_json
+
+MANIFEST_VERSION = 1
+DEFAULT_MANIFEST = "manifest.json"
+
+
+class ManifestError(Exception):
+    """A manifest that cannot be used (missing, other engine, outdated)."""
+
+
+def source_stamp(path):
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def build_manifest(root, objects, deletions, masking_engine, api_version, file_refs, manifest_path):
+    """Compiled catalog: resolved payloads of every object, in CSV order.
+
+    objects are CatalogObjects whose frameworkId/pluginId and lookup file
+    references were already resolved for masking_engine. Paths are stored
+    relative to the manifest, with the size and mtime of every source (CSV,
+    JSON and lookup file) so that load_manifest() can tell when it is out
+    of date.
+    """
+    base = os.path.dirname(os.path.abspath(manifest_path))
+
+    def relative(path):
+        return os.path.relpath(os.path.abspath(path), base)
+
+    sources = {}
+    for kind in objects:
+        directory, create_csv, delete_csv = CATALOG_SOURCES[kind]
+        for csv_name in (create_csv, delete_csv):
+            csv_path = os.path.join(root, directory, csv_name)
+            if os.path.exists(csv_path):
+                sources[relative(csv_path)] = source_stamp(csv_path)
+
+    entries = {}
+    for kind, items in objects.items():
+        entries[kind] = []
+        for obj in items.values():
+            sources[relative(obj.source)] = source_stamp(obj.source)
+            lookup_files = {}
+            for container, key in obj.file_references():
+                path = file_refs.path(container[key])
+                if path:
+                    lookup_files[container[key]] = relative(path)
+                    sources[relative(path)] = source_stamp(path)
+            entries[kind].append({
+                "name": obj.name,
+                "source": relative(obj.source),
+                "framework": obj.framework,
+                "resolved": obj.resolved,
+                "payload": obj.payload,
+                "lookupFiles": lookup_files,
+            })
+
+    return {
+        "version": MANIFEST_VERSION,
+        "engine": masking_engine,
+        "apiVersion": api_version,
+        "compiled": time.time(),
+        "sources": sources,
+        "objects": entries,
+        "deletions": {kind: list(names) for kind, names in deletions.items()},
+    }
+
+
+def save_manifest(path, manifest):
+    save_json(path, manifest, mode=0o644, separators=(',', ':'))
+
+
+def stale_sources(manifest, manifest_path):
+    """Sources changed (or gone) since the manifest was compiled."""
+    base = os.path.dirname(os.path.abspath(manifest_path))
+    changed = []
+    for relative, stamp in manifest.get('sources', {}).items():
+        path = os.path.join(base, relative)
+        try:
+            if source_stamp(path) != stamp:
+                changed.append(relative)
+        except OSError:
+            changed.append(relative)
+    return changed
+
+
+def load_manifest(path, masking_engine, check_sources=True):
+    """Manifest compiled for masking_engine; raises ManifestError otherwise."""
+    manifest = load_json(path)
+    if not isinstance(manifest, dict):
+        raise ManifestError(f"{path} not found or not a manifest")
+    if manifest.get('version') != MANIFEST_VERSION:
+        raise ManifestError(f"{path} has version {manifest.get('version')}, expected {MANIFEST_VERSION}")
+    if manifest.get('engine') != masking_engine:
+        raise ManifestError(f"{path} was compiled for {manifest.get('engine')}, not {masking_engine}")
+    if check_sources:
+        changed = stale_sources(manifest, path)
+        if changed:
+            raise ManifestError(f"{path} is out of date, changed since compiled: {', '.join(changed[:5])}"
+                                f"{' ...' if len(changed) > 5 else ''}")
+    return manifest
+
+
+def manifest_entries(manifest, kind, manifest_path):
+    """Entries of a kind, with source and lookup file paths made usable
+    from the current directory."""
+    base = os.path.dirname(os.path.abspath(manifest_path))
+    entries = []
+    for entry in manifest.get('objects', {}).get(kind, []):
+        entry = dict(entry)
+        entry['source'] = os.path.relpath(os.path.join(base, entry['source']))
+        entry['lookupFiles'] = {ref: os.path.relpath(os.path.join(base, path))
+                                for ref, path in entry.get('lookupFiles', {}).items()}
+        entries.append(entry)
+    return entries
+
+
+def manifest_catalog(manifest, manifest_path):
+    """(objects, deletions) as load_local_catalog() returns them."""
+    objects = {}
+    for kind in manifest.get('objects', {}):
+        objects[kind] = {}
+        for entry in manifest_entries(manifest, kind, manifest_path):
+            obj = CatalogObject(kind, entry['name'], entry['payload'], entry['source'], entry.get('framework'))
+            obj.resolved = entry.get('resolved', False)
+            objects[kind][obj.name] = obj
+    return objects, dict(manifest.get('deletions', {}))
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+
+from .watermarks import FINAL_STATUSES
+
+# Polling Defaults
+MONITOR_MIN_INTERVAL = 2  # seconds between polls while rows are moving
+MONITOR_BACKOFF_FACTOR = 2
+MONITOR_MAX_INTERVAL = 60  # while nothing moves (queued, blocked, slow to start)
+RATE_SMOOTHING = 0.3  # weight of the latest reading in rows per second
+
+
+def format_duration(seconds):
+    if seconds is None:
+        return ""
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds}s"
+
+
+class Progress:
+    """Rows per second and time left of an execution or a component, from
+    its successive rowsMasked readings (moving average)."""
+
+    def __init__(self):
+        self.rows = None
+        self.time = None
+        self.rate = None
+
+    def update(self, rows, now):
+        """Take a reading; True if rows moved since the previous one."""
+        if not isinstance(rows, int):
+            return False
+        moved = self.rows is not None and rows != self.rows
+        if self.rows is not None and now > self.time:
+            rate = max(0.0, (rows - self.rows) / (now - self.time))
+            self.rate = rate if self.rate is None else self.rate + RATE_SMOOTHING * (rate - self.rate)
+        self.rows, self.time = rows, now
+        return moved
+
+    def eta(self, total):
+        if not isinstance(total, int) or self.rows is None:
+            return None
+        if total <= self.rows:
+            return 0
+        return (total - self.rows) / self.rate if self.rate else None
+
+
+class MonitoredExecution:
+    """An execution being watched: last state, progress of the execution
+    and its components, and when to poll it next.
+
+    Polls come every MONITOR_MIN_INTERVAL seconds while rows are moving;
+    each poll where nothing moved doubles the interval, up to
+    MONITOR_MAX_INTERVAL, and the first movement brings it back down.
+    """
+
+    def __init__(self, engine, execution, now, min_interval=MONITOR_MIN_INTERVAL, max_interval=MONITOR_MAX_INTERVAL):
+        self.engine = engine
+        self.execution_id = execution.get('executionId')
+        self.execution = execution
+        self.components = []
+        self.progress = Progress()
+        self.component_progress = {}  # executionComponentId -> Progress
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self.next_poll = now
+        self.started = now
+
+    @property
+    def status(self):
+        return self.execution.get('status')
+
+    @property
+    def finished(self):
+        return self.status in FINAL_STATUSES
+
+    def update(self, execution, components, now):
+        self.execution = execution
+        self.components = components
+        moved = self.progress.update(execution.get('rowsMasked'), now)
+        for component in components:
+            progress = self.component_progress.setdefault(component.get('executionComponentId'), Progress())
+            moved = progress.update(component.get('rowsMasked'), now) or moved
+        if moved:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.max_interval, self.interval * MONITOR_BACKOFF_FACTOR)
+        self.next_poll = now + self.interval
+        return moved
+
+    def rows(self, item, progress):
+        total = item.get('rowsTotal')
+        masked = item.get('rowsMasked')
+        percent = f"{100 * masked / total:.0f}%" if isinstance(masked, int) and isinstance(total, int) and total else ""
+        rate = f"{progress.rate:.0f}" if progress.rate is not None else ""
+        eta = "" if item.get('status') in FINAL_STATUSES else format_duration(progress.eta(total))
+        return ("" if masked is None else masked, "" if total is None else total, percent, rate, eta)
+
+    def table_rows(self, now):
+        """Rows of the status table: the execution, then its components."""
+        rows = [(self.engine, self.execution_id, self.execution.get('jobId', ""), self.status or "",
+                 *self.rows(self.execution, self.progress), format_duration(max(0, self.next_poll - now)))]
+        for component in self.components:
+            progress = self.component_progress.get(component.get('executionComponentId'), Progress())
+            rows.append(("", "", f"  {component.get('componentName', '')}", component.get('status', ""),
+                         *self.rows(component, progress), ""))
+        return rows
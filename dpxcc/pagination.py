@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+
+import itertools
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Pagination Defaults
+DEFAULT_PAGE_SIZE = 100
+MIN_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 1000
+DEFAULT_PAGE_WORKERS = 4
+PAGES_AHEAD = 2  # pages per worker fetched before the reader gets to them
+TARGET_PAGE_SECONDS = 1.0
+
+# Page size that worked last time, per (engine, api), for this process
+tuned_page_sizes = {}
+tuned_lock = threading.Lock()
+
+
+class PageError(Exception):
+    """A page request answered with something other than 200."""
+
+    def __init__(self, api, page_number, response):
+        self.api = api
+        self.page_number = page_number
+        self.response = response
+        super().__init__(f"page {page_number}: {response.status_code} - {response.text}")
+
+
+def page_total(data):
+    # The engine reports the total in _pageInfo; older scripts looked for _page.
+    page_info = data.get('_pageInfo') or data.get('_page') or {}
+    total = page_info.get('total')
+    return total if isinstance(total, int) else None
+
+
+def next_page_size(page_size, elapsed, max_page_size=MAX_PAGE_SIZE):
+    """Page size for the following requests, from the latency of one page.
+
+    Fast pages grow by whole multiples of page_size and slow pages are
+    halved, so the new size always lines up with the pages already read.
+    """
+    if elapsed > 2 * TARGET_PAGE_SECONDS and page_size % 2 == 0 and page_size // 2 >= MIN_PAGE_SIZE:
+        return page_size // 2
+    factor = int(TARGET_PAGE_SECONDS / max(elapsed, 0.001))
+    factor = min(factor, max_page_size // page_size)
+    return page_size * max(1, factor)
+
+
+class Paginator:
+    """Every item of a paginated list endpoint (classifiers, profile-sets, ...).
+
+    The first page gives the total; the remaining pages are then requested
+    concurrently and their items yielded in page order as they arrive. The
+    page size starts from what worked for the same endpoint earlier in the
+    run and is adjusted from the latency of the first page. Only a few pages
+    per worker are fetched ahead of the reader, so a long list can be
+    streamed without holding it in memory.
+    """
+
+    def __init__(self, client, api, params=None, page_size=None, workers=DEFAULT_PAGE_WORKERS,
+                 max_page_size=MAX_PAGE_SIZE):
+        self.client = client
+        self.api = api
+        self.params = dict(params or {})
+        self.workers = max(1, workers)
+        self.max_page_size = max_page_size
+        self.tuning_key = (client.masking_engine, api)
+        self.page_size = page_size or tuned_page_sizes.get(self.tuning_key, DEFAULT_PAGE_SIZE)
+        self.total = None
+
+    def fetch(self, page_number, page_size):
+        params = dict(self.params, page_number=page_number, page_size=page_size)
+        started = time.monotonic()
+        response = self.client.get(self.api, params=params)
+        elapsed = time.monotonic() - started
+        if response.status_code != 200:
+            raise PageError(self.api, page_number, response)
+        data = response.json()
+        return data, data.get('responseList') or [], elapsed
+
+    def remaining_pages(self, first_size, page_size):
+        # Items [first_size, total) as (page_number, page_size) requests:
+        # page_size is a multiple of first_size (or divides it), so whole
+        # pages of the new size start right after the first page, and the
+        # gap up to the first full page of the new size uses the old size.
+        requests = []
+        if page_size > first_size:
+            gap_pages = page_size // first_size
+            requests.extend((number, first_size) for number in range(2, gap_pages + 1)
+                            if (number - 1) * first_size < self.total)
+            start = 2
+        else:
+            start = first_size // page_size + 1
+        last = math.ceil(self.total / page_size)
+        requests.extend((number, page_size) for number in range(start, last + 1))
+        return requests
+
+    def __iter__(self):
+        first_size = self.page_size
+        data, items, elapsed = self.fetch(1, first_size)
+        yield from items
+
+        self.total = page_total(data)
+        page_size = next_page_size(first_size, elapsed, self.max_page_size)
+        with tuned_lock:
+            tuned_page_sizes[self.tuning_key] = page_size
+
+        if self.total is None:
+            # No total reported: read on until a short page, one at a time.
+            page_number = 1
+            while len(items) == first_size:
+                page_number += 1
+                data, items, _ = self.fetch(page_number, first_size)
+                yield from items
+            return
+
+        if self.total <= first_size or len(items) < first_size:
+            return
+
+        requests = self.remaining_pages(first_size, page_size)
+        executor = ThreadPoolExecutor(max_workers=min(self.workers, len(requests)),
+                                      thread_name_prefix="dpxcc-page")
+        requests = iter(requests)
+        try:
+            futures = deque(executor.submit(self.fetch, number, size)
+                            for number, size in itertools.islice(requests, self.workers * PAGES_AHEAD))
+            while futures:
+                _, items, _ = futures.popleft().result()
+                for number, size in itertools.islice(requests, 1):
+                    futures.append(executor.submit(self.fetch, number, size))
+                yield from items
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+
+import json
+import os
+import threading
+
+CACHE_DIR_ENV = "DPXCC_CACHE_DIR"
+DEFAULT_CACHE_DIR = os.path.join("~", ".cache", "dpxcc")
+
+
+def cache_dir():
+    """Directory for state shared by every script (upload cache, etc.)."""
+    path = os.path.expanduser(os.environ.get(CACHE_DIR_ENV) or DEFAULT_CACHE_DIR)
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    return path
+
+
+def cache_path(file_name):
+    return os.path.join(cache_dir(), file_name)
+
+
+def load_json(path, default=None):
+    if not os.path.exists(path):
+        return default
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def save_json(path, data, mode=0o600, separators=None):
+    # Write to a temporary file and rename it, so a crash or a concurrent
+    # script never sees a half-written file.
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
+    with os.fdopen(fd, 'w') as f:
+        json.dump(data, f, separators=separators)
+    os.chmod(tmp_path, mode)
+    os.replace(tmp_path, path)
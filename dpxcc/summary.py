@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+
+import threading
+from collections import Counter
+
+
+def format_table(headers, rows):
+    """Lines of a plain text table, for the log."""
+    widths = [max(len(str(value)) for value in column) for column in zip(headers, *rows)]
+    line = "-+-".join("-" * width for width in widths)
+    lines = [line, " | ".join(str(header).ljust(width) for header, width in zip(headers, widths)).rstrip(), line]
+    for row in rows:
+        lines.append(" | ".join(str(value).ljust(width) for value, width in zip(row, widths)).rstrip())
+    lines.append(line)
+    return lines
+
+
+class RunSummary:
+    """Outcome of every object handled by a run, logged as a table at the end."""
+
+    def __init__(self, kind, headers=("File", "Name", "Status", "Seconds")):
+        self.kind = kind
+        self.headers = headers
+        self.rows = []
+        self.lock = threading.Lock()
+
+    def add(self, source, name, status, elapsed=None):
+        with self.lock:
+            self.rows.append((source or "", name or "", status, "" if elapsed is None else f"{elapsed:.1f}"))
+
+    def counts(self):
+        return Counter(row[2] for row in self.rows)
+
+    def log_table(self, log):
+        if not self.rows:
+            return
+        log(f"Summary of {len(self.rows)} {self.kind}:")
+        for line in format_table(self.headers, self.rows):
+            log(line)
+        log(", ".join(f"{status}: {count}" for status, count in sorted(self.counts().items())))
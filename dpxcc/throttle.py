@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+
+import random
+import threading
+import time
+from collections import deque
+
+# Concurrency limit (calls in flight to one engine)
+INITIAL_LIMIT = 4
+LIMIT_DECREASE = 0.5  # multiplied on overload
+LATENCY_TOLERANCE = 2.0  # a call this many times slower than usual is a sign of load
+LATENCY_SLACK = 0.25  # seconds; fast calls may vary this much without counting as slow
+LATENCY_SMOOTHING = 0.2  # weight of a new sample in the moving average
+LATENCY_SAMPLES = 200  # latencies kept per endpoint for percentiles
+PERCENTILE_MIN_SAMPLES = 20
+LATENCY_MAX_BODY = 1024 * 1024  # bytes; larger requests take as long as their size, not the engine's load
+
+# Retries
+DEFAULT_RETRIES = 4
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 30
+RETRY_STATUS = (429, 502, 503, 504)  # the engine is busy or a proxy lost it
+REJECTED_STATUS = (429, 503)  # refused before being processed: safe to repeat
+IDEMPOTENT_METHODS = ("GET", "HEAD", "PUT", "DELETE")
+
+
+def retry_delay(attempt, response=None):
+    """Seconds to wait before retry number attempt (1, 2, ...): the
+    engine's Retry-After if it sent one, else a random delay up to an
+    exponentially growing cap ("full jitter"), so that workers which failed
+    together do not all come back at the same time."""
+    retry_after = response.headers.get('Retry-After') if response is not None else None
+    if retry_after and retry_after.isdigit():
+        return min(float(retry_after), RETRY_MAX_DELAY)
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+
+
+class AdaptiveLimiter:
+    """Limit of calls in flight to an engine, adjusted from its answers (AIMD).
+
+    Each call that comes back in its usual time raises the limit by
+    1/limit, i.e. about one more call in flight per round of calls, as long
+    as the limit is actually reached (a script with fewer workers does not
+    push it up). A call that gets 429/5xx, times out, or is more than
+    LATENCY_TOLERANCE times slower than the usual latency of its endpoint
+    halves it, at most once per round (calls started before the last
+    decrease are not counted again). Calls released with timed=False (a
+    lookup file upload) are not compared with that latency. The limit
+    stays between 1 and max_limit, the connection pool size.
+    """
+
+    def __init__(self, max_limit, log, initial=INITIAL_LIMIT):
+        self.max_limit = max(1, max_limit)
+        self.log = log
+        self.limit = float(min(initial, self.max_limit))
+        self.in_flight = 0
+        self.condition = threading.Condition()
+        self.latency = {}  # endpoint -> [moving average, lowest average seen]
+        self.samples = {}  # endpoint -> latest latencies of calls that went well
+        self.last_decrease = 0.0
+        self.peak = self.limit
+        self.calls = 0
+        self.decreases = 0
+
+    def acquire(self):
+        with self.condition:
+            while self.in_flight >= int(self.limit):
+                self.condition.wait()
+            self.in_flight += 1
+            return time.monotonic()
+
+    def try_acquire(self, ceiling=None):
+        """acquire() if one more call fits right now under the limit (or
+        under ceiling instead), else None."""
+        with self.condition:
+            if self.in_flight >= (ceiling or int(self.limit)):
+                return None
+            self.in_flight += 1
+            return time.monotonic()
+
+    def release(self, started, endpoint, overloaded=False, reason=None, timed=True):
+        """End of a call started at started (from acquire()); overloaded if
+        the engine refused or failed it for lack of capacity. timed=False
+        leaves its latency out of the endpoint's usual latency."""
+        elapsed = time.monotonic() - started
+        with self.condition:
+            self.in_flight -= 1
+            self.calls += 1
+            if not overloaded and timed and self.slow(endpoint, elapsed):
+                overloaded, reason = True, f"{endpoint} took {elapsed:.1f} seconds"
+            if overloaded:
+                if started >= self.last_decrease:
+                    previous = self.limit
+                    self.limit = max(1.0, self.limit * LIMIT_DECREASE)
+                    self.last_decrease = time.monotonic()
+                    self.decreases += 1
+                    if int(previous) != int(self.limit):
+                        self.log(f"Engine under load ({reason}): concurrency limit {int(previous)} -> {int(self.limit)}.")
+            else:
+                if timed:
+                    self.samples.setdefault(endpoint, deque(maxlen=LATENCY_SAMPLES)).append(elapsed)
+                if self.limit < self.max_limit and self.in_flight + 1 >= int(self.limit):
+                    self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+                    self.peak = max(self.peak, self.limit)
+            self.condition.notify_all()
+
+    def slow(self, endpoint, elapsed):
+        average, baseline = self.latency.get(endpoint, (elapsed, elapsed))
+        average += LATENCY_SMOOTHING * (elapsed - average)
+        self.latency[endpoint] = [average, min(baseline, average)]
+        return elapsed > max(LATENCY_TOLERANCE * baseline, baseline + LATENCY_SLACK)
+
+    def percentile(self, endpoint, fraction):
+        """Latency of an endpoint not exceeded by that fraction of its recent
+        calls, None until it has PERCENTILE_MIN_SAMPLES of them."""
+        with self.condition:
+            samples = sorted(self.samples.get(endpoint, ()))
+        if len(samples) < PERCENTILE_MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+    def summary(self):
+        return (f"{self.calls} calls, concurrency limit {int(self.limit)} (peak {int(self.peak)}, "
+                f"max {self.max_limit}), reduced {self.decreases} times")
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+
+import threading
+
+from .storage import load_json, save_json
+
+TOKEN_CACHE_SUFFIX = ".tokens"
+
+
+class TokenCache:
+    """Authorization tokens kept between runs, keyed by engine and user.
+
+    The cache lives next to the CONFIG file (CONFIG.tokens) and is only ever
+    written with 0600 permissions, since a token is as good as a password
+    until the engine expires it.
+    """
+
+    def __init__(self, config_file):
+        self.path = config_file + TOKEN_CACHE_SUFFIX
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(masking_engine, username):
+        return f"{username}@{masking_engine}"
+
+    def load(self):
+        data = load_json(self.path, {})
+        return data if isinstance(data, dict) else {}
+
+    def get(self, masking_engine, username):
+        return self.load().get(self.key(masking_engine, username))
+
+    def put(self, masking_engine, username, token):
+        with self.lock:
+            data = self.load()
+            data[self.key(masking_engine, username)] = token
+            save_json(self.path, data)
+
+    def drop(self, masking_engine, username):
+        with self.lock:
+            data = self.load()
+            if data.pop(self.key(masking_engine, username), None) is not None:
+                save_json(self.path, data)
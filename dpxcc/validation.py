@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from .catalog import CATALOG_KINDS, CATALOG_SOURCES, NAME_KEYS, read_csv_rows, referenced_algorithms
+
+try:
+    import jsonschema
+except ImportError:  # optional, a subset of JSON Schema is checked without it
+    jsonschema = None
+
+ERROR = "error"
+WARNING = "warning"
+
+JSON_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "boolean": bool,
+    "integer": int,
+    "number": (int, float),
+    "null": type(None),
+}
+
+
+class ValidationIssue:
+    def __init__(self, level, source, name, message):
+        self.level = level
+        self.source = source  # JSON (or CSV) file
+        self.name = name or ""
+        self.message = message
+
+    def row(self):
+        return (self.level, os.path.basename(self.source), self.name, self.message)
+
+
+class ValidatedFile:
+    """What one worker found in one JSON file.
+
+    objects lists (name, references) per object, references being
+    (kind, name) pairs that have to exist locally or on the engine.
+    """
+
+    def __init__(self, kind, source):
+        self.kind = kind
+        self.source = source
+        self.objects = []
+        self.issues = []
+
+    def add_issue(self, level, name, message):
+        self.issues.append(ValidationIssue(level, self.source, name, message))
+
+
+def is_type(value, json_type):
+    if json_type in ("integer", "number") and isinstance(value, bool):
+        return False
+    return isinstance(value, JSON_TYPES.get(json_type, object))
+
+
+def schema_errors(value, schema, path="algorithmExtension"):
+    """Messages for value against a JSON schema.
+
+    Uses jsonschema when installed, otherwise checks type, enum, required,
+    properties, additionalProperties, items and minimum/maximum.
+    """
+    if not isinstance(schema, dict):
+        return []
+    if jsonschema is not None:
+        validator = jsonschema.validators.validator_for(schema)(schema)
+        return [f"{'.'.join([path] + [str(p) for p in error.absolute_path])}: {error.message}"
+                for error in validator.iter_errors(value)]
+
+    types = schema.get('type')
+    if types:
+        types = types if isinstance(types, list) else [types]
+        if not any(is_type(value, json_type) for json_type in types):
+            return [f"{path}: expected {' or '.join(types)}, got {json.dumps(value)[:60]}"]
+    if 'enum' in schema and value not in schema['enum']:
+        return [f"{path}: {json.dumps(value)[:60]} is not one of {schema['enum']}"]
+
+    errors = []
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        if 'minimum' in schema and value < schema['minimum']:
+            errors.append(f"{path}: {value} is less than {schema['minimum']}")
+        if 'maximum' in schema and value > schema['maximum']:
+            errors.append(f"{path}: {value} is greater than {schema['maximum']}")
+    if isinstance(value, dict):
+        properties = schema.get('properties') or {}
+        for key in schema.get('required') or []:
+            if key not in value:
+                errors.append(f"{path}.{key}: required")
+        for key, item in value.items():
+            if key in properties:
+                errors.extend(schema_errors(item, properties[key], f"{path}.{key}"))
+            elif schema.get('additionalProperties') is False:
+                errors.append(f"{path}.{key}: not a property of this framework")
+    if isinstance(value, list) and isinstance(schema.get('items'), dict):
+        for index, item in enumerate(value):
+            errors.extend(schema_errors(item, schema['items'], f"{path}[{index}]"))
+    return errors
+
+
+def framework_schema(framework):
+    # Returned with include_schema=true; the key differs between versions.
+    return framework.get('schema') or framework.get('extensionSchema')
+
+
+def check_strength(result, name, path, value):
+    if value is None:
+        return
+    if not is_type(value, "number") or not 0 <= float(value) <= 1:
+        result.add_issue(ERROR, name, f"{path}: {json.dumps(value)} is not a number between 0 and 1")
+
+
+def check_regex(result, name, path, pattern):
+    # Python's re accepts almost all of what the engine's (Java) regexes do
+    if not isinstance(pattern, str) or not pattern:
+        result.add_issue(ERROR, name, f"{path}: missing regular expression")
+        return
+    try:
+        re.compile(pattern)
+    except re.error as e:
+        result.add_issue(ERROR, name, f"{path}: invalid regular expression {pattern!r}: {e}")
+
+
+def check_lookup_file(result, name, path, file_uri, lookup_dir):
+    # Local names must exist next to the JSON; uploaded references
+    # (delphix-file://) can only be checked by the engine.
+    if not isinstance(file_uri, str) or file_uri in ("", "0") or "://" in file_uri:
+        return
+    if not os.path.isfile(os.path.join(lookup_dir, os.path.basename(file_uri))):
+        result.add_issue(ERROR, name, f"{path}: lookup file {file_uri} not found in {lookup_dir}")
+
+
+def check_algorithm(result, data, framework_name, framework, lookup_dir):
+    name = data.get('algorithmName')
+    if not name:
+        result.add_issue(ERROR, None, "algorithmName missing")
+        return
+    extension = data.get('algorithmExtension')
+    if extension is not None and not isinstance(extension, dict):
+        result.add_issue(ERROR, name, "algorithmExtension is not an object")
+        extension = None
+
+    if framework_name and framework is False:
+        result.add_issue(ERROR, name, f"framework {framework_name} does not exist on the engine")
+    elif framework and extension is not None:
+        for message in schema_errors(extension, framework_schema(framework)):
+            result.add_issue(ERROR, name, message)
+
+    if extension:
+        lookup = extension.get('lookupFile')
+        if isinstance(lookup, dict):
+            check_lookup_file(result, name, "algorithmExtension.lookupFile.uri", lookup.get('uri'), lookup_dir)
+    references = [("algorithms", ref) for ref in referenced_algorithms(extension)]
+    result.objects.append((name, references))
+
+
+def check_domain(result, data):
+    name = data.get('domainName')
+    if not name:
+        result.add_issue(ERROR, None, "domainName missing")
+        return
+    references = []
+    for key in ('defaultAlgorithmCode', 'defaultTokenizationCode'):
+        if data.get(key):
+            references.append(("algorithms", data[key]))
+    if not data.get('defaultAlgorithmCode'):
+        result.add_issue(ERROR, name, "defaultAlgorithmCode missing")
+    result.objects.append((name, references))
+
+
+def check_classifier(result, item, frameworks, lookup_dir):
+    name = item.get('name')
+    if not name:
+        result.add_issue(ERROR, None, "classifier without a name")
+        return
+    clf_type = item.get('type')
+    if not clf_type:
+        result.add_issue(WARNING, name, "type missing, the frameworkId of the file is used as is")
+    elif frameworks is not None and clf_type not in frameworks:
+        result.add_issue(ERROR, name, f"classifier framework {clf_type} does not exist on the engine")
+
+    properties = item.get('properties')
+    if not isinstance(properties, dict):
+        result.add_issue(ERROR, name, "properties missing")
+        properties = {}
+    check_strength(result, name, "properties.rejectStrength", properties.get('rejectStrength'))
+    for index, path in enumerate(properties.get('paths') or []):
+        where = f"properties.paths[{index}]"
+        check_strength(result, name, f"{where}.matchStrength", path.get('matchStrength'))
+        if path.get('matchType', "REGEX") == "REGEX":
+            check_regex(result, name, f"{where}.fieldValue", path.get('fieldValue'))
+    for index, pattern in enumerate(properties.get('dataPatterns') or []):
+        where = f"properties.dataPatterns[{index}]"
+        check_strength(result, name, f"{where}.matchStrength", pattern.get('matchStrength'))
+        check_regex(result, name, f"{where}.regex", pattern.get('regex'))
+    for index, value_list in enumerate(properties.get('valueLists') or []):
+        where = f"properties.valueLists[{index}]"
+        check_strength(result, name, f"{where}.matchStrength", value_list.get('matchStrength'))
+        if not value_list.get('file'):
+            result.add_issue(ERROR, name, f"{where}.file missing")
+        else:
+            check_lookup_file(result, name, f"{where}.file", value_list['file'], lookup_dir)
+
+    references = [("domains", item['domain'])] if item.get('domain') else []
+    if not references:
+        result.add_issue(ERROR, name, "domain missing")
+    result.objects.append((name, references))
+
+
+def check_profile_set(result, data):
+    name = data.get('profileSetName')
+    if not name:
+        result.add_issue(ERROR, None, "profileSetName missing")
+        return
+    names = data.get('classifierNames') or []
+    if not names:
+        result.add_issue(WARNING, name, "no classifierNames")
+    result.objects.append((name, [("classifiers", clf_name) for clf_name in names]))
+
+
+def validate_file(task):
+    """Check one JSON file on its own (run in a worker process).
+
+    task is (kind, json_path, framework_name, framework, frameworks,
+    lookup_dir). framework is the cached algorithm framework, False if the
+    engine has none by that name and None if unknown; frameworks is the set
+    of classifier framework names, or None if unknown.
+    """
+    kind, json_path, framework_name, framework, frameworks, lookup_dir = task
+    result = ValidatedFile(kind, json_path)
+    try:
+        with open(json_path, 'r') as jf:
+            data = json.load(jf)
+    except OSError as e:
+        result.add_issue(ERROR, None, f"cannot read file: {e.strerror}")
+        return result
+    except ValueError as e:
+        result.add_issue(ERROR, None, f"invalid JSON: {e}")
+        return result
+
+    expected = list if kind == "classifiers" else dict
+    if not isinstance(data, expected):
+        result.add_issue(ERROR, None, f"expected a JSON {'array' if expected is list else 'object'}")
+        return result
+
+    if kind == "algorithms":
+        check_algorithm(result, data, framework_name, framework, lookup_dir)
+    elif kind == "domains":
+        check_domain(result, data)
+    elif kind == "classifiers":
+        for item in data:
+            if isinstance(item, dict):
+                check_classifier(result, item, frameworks, lookup_dir)
+            else:
+                result.add_issue(ERROR, None, "classifier entry is not an object")
+    else:
+        check_profile_set(result, data)
+    return result
+
+
+def validation_tasks(root, kinds, algorithm_frameworks, classifier_frameworks):
+    """(tasks, issues) for every JSON listed in the crt_*.csv files."""
+    tasks = []
+    issues = []
+    lookup_dir = os.path.join(root, CATALOG_SOURCES["algorithms"][0])
+    for kind in kinds:
+        directory, create_csv, _ = CATALOG_SOURCES[kind]
+        csv_path = os.path.join(root, directory, create_csv)
+        if not os.path.exists(csv_path):
+            continue
+        for parts in read_csv_rows(csv_path):
+            json_path = os.path.join(root, directory, parts[0])
+            framework_name = parts[1] if kind == "algorithms" and len(parts) > 1 else None
+            framework = None
+            if framework_name and algorithm_frameworks is not None:
+                framework = algorithm_frameworks.get(framework_name, False)
+            elif kind == "algorithms":
+                issues.append(ValidationIssue(WARNING, csv_path, parts[0], "no frameworkName column"))
+            tasks.append((kind, json_path, framework_name, framework, classifier_frameworks, lookup_dir))
+    return tasks, issues
+
+
+def check_references(results, known):
+    """Cross-file checks: duplicate names and references to missing objects.
+
+    known maps kind -> names that exist on the engine (from the local
+    inventory), or None when that is unknown: references that are not part
+    of the local catalog are then only warnings.
+    """
+    issues = []
+    local = {kind: {} for kind in CATALOG_KINDS}
+    for result in results:
+        for name, _ in result.objects:
+            if name in local[result.kind]:
+                issues.append(ValidationIssue(ERROR, result.source, name,
+                                              f"also defined in {os.path.basename(local[result.kind][name])}"))
+            else:
+                local[result.kind][name] = result.source
+
+    for result in results:
+        for name, references in result.objects:
+            for ref_kind, ref_name in references:
+                if ref_name in local[ref_kind]:
+                    continue
+                engine_names = known.get(ref_kind)
+                label = NAME_KEYS[ref_kind].replace("Name", "")
+                if engine_names is None:
+                    issues.append(ValidationIssue(WARNING, result.source, name,
+                                                  f"{label} {ref_name} is not in the local catalog, it must exist on the engine"))
+                elif ref_name not in engine_names:
+                    issues.append(ValidationIssue(ERROR, result.source, name,
+                                                  f"{label} {ref_name} exists neither locally nor on the engine"))
+    return issues
+
+
+def validate_catalog(root, kinds=CATALOG_KINDS, algorithm_frameworks=None, classifier_frameworks=None,
+                     known=None, workers=None):
+    """Every problem of the local catalog, found without an engine.
+
+    The files are checked in a process pool; algorithm_frameworks maps
+    frameworkName -> framework (with schema) and classifier_frameworks is a
+    set of names, both None to skip the framework checks. Returns
+    (files checked, issues).
+    """
+    tasks, issues = validation_tasks(root, kinds, algorithm_frameworks, classifier_frameworks)
+    if not tasks:
+        return 0, issues
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(tasks)))
+    if workers == 1:
+        results = [validate_file(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(validate_file, tasks, chunksize=max(1, len(tasks) // (workers * 4))))
+
+    for result in results:
+        issues.extend(result.issues)
+    issues.extend(check_references(results, known or {}))
+    return len(tasks), issues
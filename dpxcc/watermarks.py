@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+
+import math
+import os
+import threading
+import time
+
+from .pagination import DEFAULT_PAGE_WORKERS, MAX_PAGE_SIZE, PageError, Paginator, page_total
+from .storage import cache_path, load_json, save_json
+
+WATERMARK_FILE = "watermarks.json"
+
+# Executions and components in any other status may still change
+FINAL_STATUSES = ("SUCCEEDED", "FAILED", "CANCELLED", "WARNING")
+
+# watermarks.json is read, changed and rewritten as a whole
+watermark_lock = threading.Lock()
+
+
+def watermark_key(masking_engine, api, params, output_file):
+    query = "&".join(f"{name}={value}" for name, value in sorted((params or {}).items()))
+    return f"{masking_engine}|{api}?{query}|{os.path.abspath(output_file)}"
+
+
+class Watermark:
+    """How far the incremental export of a list into one file got.
+
+    last_id and last_time are the highest id and latest time exported.
+    open_ids are records exported while not finished (a running execution):
+    they are exported again once they are. size is the size of the output
+    file after that export, so that anything appended by a run that did
+    not get to save its watermark can be cut off.
+    """
+
+    def __init__(self, key, data=None):
+        data = data or {}
+        self.key = key
+        self.last_id = data.get('lastId')
+        self.last_time = data.get('lastTime')
+        self.open_ids = set(data.get('openIds', []))
+        self.size = data.get('size', 0)
+        self.exported = data.get('exported', 0)
+        self.updated = data.get('updated')
+
+    def add(self, record, id_key, time_key):
+        record_id = record.get(id_key)
+        if isinstance(record_id, int) and (self.last_id is None or record_id > self.last_id):
+            self.last_id = record_id
+        record_time = record.get(time_key)
+        if record_time and (self.last_time is None or record_time > self.last_time):
+            self.last_time = record_time
+        self.exported += 1
+        if not isinstance(record_id, int):
+            return
+        if record.get('status') and record['status'] not in FINAL_STATUSES:
+            self.open_ids.add(record_id)
+        else:
+            self.open_ids.discard(record_id)
+
+    def to_json(self):
+        return {
+            "lastId": self.last_id,
+            "lastTime": self.last_time,
+            "openIds": sorted(self.open_ids),
+            "size": self.size,
+            "exported": self.exported,
+            "updated": self.updated,
+        }
+
+
+def load_watermark(key, path=None):
+    """Watermark saved under key, or an empty one (export everything)."""
+    watermarks = load_json(path or cache_path(WATERMARK_FILE), {}) or {}
+    return Watermark(key, watermarks.get(key))
+
+
+def save_watermark(watermark, output_file, path=None):
+    path = path or cache_path(WATERMARK_FILE)
+    watermark.size = os.path.getsize(output_file) if os.path.exists(output_file) else 0
+    watermark.updated = time.time()
+    with watermark_lock:
+        watermarks = load_json(path, {}) or {}
+        watermarks[watermark.key] = watermark.to_json()
+        save_json(path, watermarks)
+
+
+def restore_output(output_file, watermark, log):
+    """Cut off what a run appended to output_file after the last saved
+    watermark (it was interrupted before saving its own)."""
+    if not watermark.size or not os.path.exists(output_file):
+        return
+    size = os.path.getsize(output_file)
+    if size > watermark.size:
+        log(f"{output_file}: dropping {size - watermark.size} bytes written after the last watermark.")
+        os.truncate(output_file, watermark.size)
+
+
+class IncrementalReader:
+    """Records of a list endpoint not exported yet, advancing a watermark.
+
+    Without a watermark every record is read (Paginator). With one, only
+    records with a higher id and the open records that have finished since
+    are yielded. The engine lists records in id order, so page 1 gives the
+    total, the last page tells whether anything is new, and a binary search
+    over the pages in between finds the first page to read: a few requests
+    when little is new. A list that turns out not to be in id order is
+    read whole instead, keeping the same records.
+    """
+
+    def __init__(self, client, api, id_key, time_key, watermark, params=None, page_size=None,
+                 workers=DEFAULT_PAGE_WORKERS):
+        self.client = client
+        self.api = api
+        self.id_key = id_key
+        self.time_key = time_key
+        self.watermark = watermark
+        self.params = dict(params or {})
+        self.page_size = page_size or MAX_PAGE_SIZE
+        self.workers = workers
+        self.after_id = watermark.last_id
+        self.reopen_ids = set(watermark.open_ids)
+        # Every record after start_id is read: new ones and open ones
+        self.start_id = None
+        if self.after_id is not None:
+            self.start_id = min([self.after_id, *(record_id - 1 for record_id in self.reopen_ids)])
+        self.pages = {}  # page number -> items, read while searching
+        self.total = None
+        self.full_scan = False
+
+    def fetch(self, page_number):
+        params = dict(self.params, page_number=page_number, page_size=self.page_size)
+        response = self.client.get(self.api, params=params)
+        if response.status_code != 200:
+            raise PageError(self.api, page_number, response)
+        data = response.json()
+        if page_number == 1:
+            self.total = page_total(data)
+        return data.get('responseList') or []
+
+    def in_order(self, items):
+        ids = [item.get(self.id_key) for item in items]
+        return all(isinstance(item_id, int) for item_id in ids) and all(a < b for a, b in zip(ids, ids[1:]))
+
+    def page(self, page_number):
+        """Items of a page, None if they are not in id order."""
+        if page_number not in self.pages:
+            items = self.fetch(page_number)
+            if not self.in_order(items):
+                return None
+            self.pages[page_number] = items
+        return self.pages[page_number]
+
+    def last_page(self):
+        return max(1, math.ceil(self.total / self.page_size))
+
+    def past_start(self, items):
+        return bool(items) and items[-1][self.id_key] > self.start_id
+
+    def search(self):
+        """First page with a record past start_id, 0 if there is none,
+        None if the pages are not in id order (read the whole list).
+
+        A generator that yields the page numbers it needs and is sent
+        their items, page(), so that the same search runs for
+        AsyncIncrementalReader."""
+        first = yield 1
+        if first is None or self.total is None:
+            return None
+        if self.past_start(first):
+            return 1
+        low, high = 1, self.last_page()  # nothing past start_id up to page low
+        items = yield high
+        if items is None:
+            return None
+        if not self.past_start(items):
+            return 0
+        while high - low > 1:
+            middle = (low + high) // 2
+            items = yield middle
+            if items is None:
+                return None
+            if self.past_start(items):
+                high = middle
+            else:
+                low = middle
+                self.pages.pop(middle, None)
+        return high
+
+    def start_page(self):
+        steps = self.search()
+        try:
+            page_number = next(steps)
+            while True:
+                page_number = steps.send(self.page(page_number))
+        except StopIteration as stop:
+            return stop.value
+
+    def wanted(self, record):
+        record_id = record.get(self.id_key)
+        if not isinstance(record_id, int):
+            return False
+        if record_id in self.reopen_ids:
+            self.reopen_ids.discard(record_id)
+            return record.get('status') in FINAL_STATUSES
+        return record_id > self.after_id
+
+    def records(self):
+        if self.after_id is None:
+            yield from Paginator(self.client, self.api, self.params, workers=self.workers)
+            return
+
+        start = self.start_page()
+        if start is None:
+            self.full_scan = True
+            self.pages.clear()
+            yield from filter(self.wanted, Paginator(self.client, self.api, self.params, workers=self.workers))
+            return
+        if not start:
+            return
+        for page_number in range(start, self.last_page() + 1):
+            items = self.pages.pop(page_number, None)
+            yield from filter(self.wanted, items if items is not None else self.fetch(page_number))
+
+    def __iter__(self):
+        for record in self.records():
+            self.watermark.add(record, self.id_key, self.time_key)
+            yield record
+        # Open records that were not listed again are gone
+        self.watermark.open_ids -= self.reopen_ids
@@ -0,0 +1,13 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from dpxcc import EXECUTIONS, export_main
+
+def main():
+    export_main(EXECUTIONS)
+
+if __name__ == "__main__":
+    main()
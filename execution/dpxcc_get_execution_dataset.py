@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from dpxcc import (DEFAULT_POOL_SIZE, EngineClient, ExecutionDataset, ExportError, LogBuffer, PageError, Paginator,
+                   default_output_file, export_parser, open_writer, parse_export_args, setup_logging)
+from dpxcc.pagination import page_total
+
+# Configuration Defaults
+PROGRESS_SECONDS = 10
+
+class ExecutionDatasetExporter:
+    def __init__(self, args):
+        self.args = args
+        self.logger, self.log_file_name = setup_logging(args.log_file, "dpxcc_get_execution_dataset")
+        self.log_buffer = LogBuffer(self.logger)
+        self.client = EngineClient(args, self.log, pool_size=max(DEFAULT_POOL_SIZE, args.page_workers))
+        self.dataset = ExecutionDataset()
+        self.not_found = set()  # executionIds looked up and not in the dataset
+        self.listed_up_to = None  # highest executionId of the engine when the executions were listed
+
+    def log(self, message):
+        self.log_buffer.log(message)
+
+    def check_response_error(self, func_name, api_name, response):
+        self.log(f"{func_name}() -> Function: {func_name}() - Api: {api_name} - Response Code: {response.status_code} - Response Body: {response.text}")
+        self.client.logout()
+        sys.exit(1)
+
+    def paginator(self, api, params):
+        return Paginator(self.client, api, params, page_size=self.args.page_size, workers=self.args.page_workers)
+
+    def get_execution(self, execution_id):
+        api_endpoint = f"executions/{execution_id}"
+        response = self.client.get(api_endpoint)
+        if response.status_code == 404:
+            return None
+        if response.status_code != 200:
+            self.check_response_error("get_execution", api_endpoint, response)
+        execution = response.json()
+        if self.args.job_id and str(execution.get('jobId')) != str(self.args.job_id):
+            return None
+        return execution
+
+    def get_executions(self):
+        # Build side of the join: every execution, by executionId
+        if self.args.execution_id:
+            execution = self.get_execution(self.args.execution_id)
+            executions = [execution] if execution else []
+        else:
+            executions = self.paginator("executions", {"job_id": self.args.job_id} if self.args.job_id else {})
+        for execution in executions:
+            self.dataset.add_execution(execution)
+        self.listed_up_to = self.last_execution_id()
+        self.log(f"{len(self.dataset.executions)} Executions indexed.")
+
+    def last_execution_id(self):
+        # Only a component of a higher executionId can be of an execution
+        # started after the listing. With -j the listing only has the job's
+        # executions: the engine lists them all in id order, so its last one
+        # is alone on the last page of size 1.
+        ids = [execution_id for execution_id in self.dataset.executions if isinstance(execution_id, int)]
+        if self.args.job_id and not self.args.execution_id:
+            data = self.execution_page(1)
+            total = page_total(data)
+            if total and total > 1:
+                data = self.execution_page(total)
+            ids.extend(item['executionId'] for item in data.get('responseList') or []
+                       if isinstance(item.get('executionId'), int))
+        return max(ids, default=None)
+
+    def execution_page(self, page_number):
+        response = self.client.get("executions", params={"page_number": page_number, "page_size": 1})
+        if response.status_code != 200:
+            self.check_response_error("execution_page", "executions", response)
+        return response.json()
+
+    def count_execution_events(self, params):
+        # Streamed: each event only adds to the counters of its component
+        events = self.paginator("execution-events", params)
+        last_progress = time.monotonic()
+        for event in events:
+            self.dataset.add_event(event)
+            if time.monotonic() - last_progress >= PROGRESS_SECONDS:
+                last_progress = time.monotonic()
+                total = f" of {events.total}" if events.total is not None else ""
+                self.log(f"{self.dataset.events}{total} events counted ...")
+        self.log(f"{self.dataset.events} Execution Events counted for {len(self.dataset.component_events)} "
+                 f"components.")
+
+    def resolve_execution(self, execution_id):
+        # Started after the executions were listed: its events are counted
+        # already, only the execution itself is missing
+        if execution_id in self.dataset.executions or execution_id in self.not_found:
+            return
+        if not isinstance(execution_id, int) or (self.listed_up_to is not None and execution_id <= self.listed_up_to):
+            # Listed already and not indexed: an execution of another job
+            self.not_found.add(execution_id)
+            return
+        execution = self.get_execution(execution_id)
+        if execution:
+            self.dataset.add_execution(execution)
+        else:
+            self.not_found.add(execution_id)
+
+    def write_components(self, writer, params):
+        # Probe side: components streamed and joined as they arrive
+        skipped = 0
+        last_progress = time.monotonic()
+        components = self.paginator("execution-components", params)
+        for component in components:
+            self.resolve_execution(component.get('executionId'))
+            row = self.dataset.row(component)
+            if row is None:
+                skipped += 1
+                continue
+            writer.write(row)
+            if time.monotonic() - last_progress >= PROGRESS_SECONDS:
+                last_progress = time.monotonic()
+                total = f" of {components.total}" if components.total is not None else ""
+                self.log(f"{writer.count}{total} components written ...")
+        return skipped
+
+    def run(self):
+        output_type = self.args.output_type
+        output_file = self.args.output_file or default_output_file("execution_dataset", output_type)
+        params = {"execution_id": self.args.execution_id} if self.args.execution_id else {}
+
+        if self.args.masking_engine:
+            self.client.set_engine(self.args.masking_engine)
+            username, password = self.args.masking_username, self.args.masking_password
+        else:
+            username, password = self.client.read_config()
+        self.client.check_connection()
+        self.client.login(username, password)
+
+        try:
+            started = time.monotonic()
+            self.log("Getting Executions ...")
+            self.get_executions()
+            self.log("Counting Execution Events ...")
+            self.count_execution_events(params)
+            self.log("Getting Execution Components ...")
+            with open_writer(output_file, output_type, self.dataset.columns()) as writer:
+                skipped = self.write_components(writer, params)
+            skipped = f", {skipped} of other executions skipped" if skipped else ""
+            self.log(f"{writer.count} Execution Components written to {output_file}{skipped} "
+                     f"({self.client.limiter.calls} requests, {time.monotonic() - started:.1f} seconds).")
+        except ExportError as e:
+            self.log(f"Error: {e}")
+            self.client.logout()
+            sys.exit(1)
+        except PageError as e:
+            self.check_response_error("get_execution_dataset", e.api, e.response)
+        except OSError as e:
+            self.log(f"Error writing {output_file}: {e}")
+            self.client.logout()
+            sys.exit(1)
+
+        self.client.logout()
+
+def main():
+    parser = export_parser("Export one row per Execution Component, joined with its Execution and its Execution Event counts by severity and exception type",
+                           "execution_dataset", "records",
+                           [(("-j", "--job-id"), "job_id", "Only the executions of this job"),
+                            (("-e", "--execution-id"), "execution_id", "Only this execution")],
+                           incremental=False)
+    exporter = ExecutionDatasetExporter(parse_export_args(parser))
+    exporter.run()
+
+if __name__ == "__main__":
+    main()
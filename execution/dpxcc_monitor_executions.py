@@ -0,0 +1,442 @@
+#!/usr/bin/env python3
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from dpxcc import (CONFIG_FILE, DEFAULT_CONNECT_TIMEOUT, DEFAULT_ENGINES_FILE, DEFAULT_POOL_SIZE,
+                   DEFAULT_READ_TIMEOUT, AsyncEngineClient, AsyncIncrementalReader, AsyncPaginator, EngineClient,
+                   IncrementalReader, LogBuffer, MonitoredExecution, PageError, Paginator, Watermark, async_available,
+                   format_table, read_engines_file, setup_logging)
+from dpxcc.monitor import MONITOR_MAX_INTERVAL, MONITOR_MIN_INTERVAL
+
+# Configuration Defaults
+DEFAULT_WORKERS = 4
+DEFAULT_DISCOVERY_INTERVAL = 30
+DEFAULT_REFRESH = 5
+RECENT_EVENTS = 10
+TABLE_HEADERS = ("Engine", "Execution", "Job / Component", "Status", "Rows", "Total", "%", "Rows/s", "ETA",
+                 "Next poll")
+CLEAR_SCREEN = "\033[H\033[J"
+
+class EngineMonitor:
+    """Watches the running executions of one engine, over one session.
+
+    New executions are found with an IncrementalReader over executions (a
+    full listing the first time, then only what was added since); each
+    running one is then polled on its own schedule, MonitoredExecution.
+    """
+
+    def __init__(self, args, log, emit, config_file=CONFIG_FILE, name=None):
+        self.args = args
+        self.name = name
+        self.prefix = f"[{name}] " if name else ""
+        self.parent_log = log
+        self.emit = emit
+        self.client = self.build_client(config_file)
+        self.params = {"job_id": args.job_id} if args.job_id else {}
+        self.watermark = Watermark("executions")  # in memory: where discovery got to
+        self.watched = {}  # executionId -> MonitoredExecution
+        self.lock = threading.Lock()
+        self.discovered = False
+        self.failed = False
+        self.next_discovery = 0
+
+    def log(self, message):
+        self.parent_log(f"{self.prefix}{message}")
+
+    def build_client(self, config_file):
+        return EngineClient(self.args, self.log, pool_size=max(DEFAULT_POOL_SIZE, self.args.workers),
+                            config_file=config_file)
+
+    @property
+    def engine(self):
+        return self.name or self.client.masking_engine
+
+    def connect(self):
+        username, password = self.client.read_config()
+        self.client.check_connection()
+        self.client.login(username, password)
+
+    def reader(self):
+        return IncrementalReader(self.client, "executions", "executionId", "submitTime", self.watermark, self.params)
+
+    def track(self, execution, now):
+        """Watch an execution found by discovery; None if it is watched
+        already or has ended."""
+        if execution.get('executionId') in self.watched:
+            return None
+        monitored = MonitoredExecution(self.engine, execution, now, self.args.min_interval, self.args.max_interval)
+        if monitored.finished:
+            # Started and ended since the last discovery (the first
+            # one lists the engine's history, which is not reported)
+            if self.discovered:
+                self.emit(monitored)
+            return None
+        with self.lock:
+            self.watched[monitored.execution_id] = monitored
+        return monitored
+
+    def discovery_done(self, found, now):
+        # Running executions are polled one by one, not listed again
+        self.watermark.open_ids.clear()
+        if found:
+            self.log(f"{len(found)} running executions found, watching {len(self.watched)}.")
+        self.discovered = True
+        self.next_discovery = now + self.args.discovery_interval
+
+    def discover(self):
+        # Executions added since the last discovery
+        now = time.monotonic()
+        found = []
+        for execution in self.reader():
+            monitored = self.track(execution, now)
+            if monitored:
+                found.append(monitored)
+        self.discovery_done(found, now)
+        return found
+
+    def polled(self, monitored, response):
+        """The execution from a poll answer, None if there is nothing to
+        update."""
+        if response.status_code == 404:
+            self.log(f"Execution {monitored.execution_id} no longer exists.")
+            with self.lock:
+                self.watched.pop(monitored.execution_id, None)
+            return None
+        if response.status_code != 200:
+            self.log(f"poll() -> Api: executions/{monitored.execution_id} - Response Code: {response.status_code} - Response Body: {response.text}")
+            monitored.next_poll = time.monotonic() + monitored.interval
+            return None
+        return response.json()
+
+    def update(self, monitored, execution, components):
+        with self.lock:
+            monitored.update(execution, components, time.monotonic())
+            if monitored.finished:
+                self.watched.pop(monitored.execution_id, None)
+        if monitored.finished:
+            self.emit(monitored)
+
+    def poll(self, monitored):
+        execution = self.polled(monitored, self.client.get(f"executions/{monitored.execution_id}"))
+        if execution is None:
+            return
+        components = list(Paginator(self.client, "execution-components", {"execution_id": monitored.execution_id}))
+        self.update(monitored, execution, components)
+
+    def poll_due(self, executor):
+        now = time.monotonic()
+        with self.lock:
+            due = [monitored for monitored in self.watched.values() if monitored.next_poll <= now]
+        for monitored, future in [(monitored, executor.submit(self.poll, monitored)) for monitored in due]:
+            try:
+                future.result()
+            except PageError as e:
+                self.log(f"Error fetching {e.api} {e}")
+                monitored.next_poll = time.monotonic() + monitored.interval
+            except SystemExit:
+                self.stop_engine()
+            except Exception as e:
+                self.log(f"Poll exception for execution {monitored.execution_id}: {e}")
+                monitored.next_poll = time.monotonic() + monitored.interval
+
+    def stop_engine(self):
+        # The client could not log in again (it exits): nothing more can be read
+        if not self.failed:
+            self.log("Could not log in to the engine again, no longer monitoring it.")
+        self.failed = True
+
+    def next_wakeup(self):
+        with self.lock:
+            polls = [monitored.next_poll for monitored in self.watched.values()]
+        return min([self.next_discovery, *polls])
+
+    def run(self, stop):
+        try:
+            self.connect()
+        except SystemExit:
+            self.failed = True
+            self.discovered = True
+            return
+        executor = ThreadPoolExecutor(max_workers=self.args.workers, thread_name_prefix="dpxcc-monitor")
+        try:
+            while not stop.is_set() and not self.failed:
+                if time.monotonic() >= self.next_discovery:
+                    try:
+                        self.discover()
+                    except PageError as e:
+                        self.log(f"Error fetching {e.api} {e}")
+                        self.next_discovery = time.monotonic() + self.args.discovery_interval
+                    except SystemExit:
+                        self.stop_engine()
+                        break
+                    except Exception as e:
+                        self.log(f"Discovery exception: {e}")
+                        self.next_discovery = time.monotonic() + self.args.discovery_interval
+                self.poll_due(executor)
+                stop.wait(max(0.1, self.next_wakeup() - time.monotonic()))
+        finally:
+            executor.shutdown(wait=True)
+            self.client.logout()
+
+    def table_rows(self):
+        now = time.monotonic()
+        with self.lock:
+            watched = sorted(self.watched.values(), key=lambda monitored: monitored.execution_id)
+            return [row for monitored in watched for row in monitored.table_rows(now)]
+
+class AsyncEngineMonitor(EngineMonitor):
+    """EngineMonitor on the asyncio client (--async): every engine runs in
+    the same event loop, each watched execution is a coroutine polling it
+    on its own schedule, and the calls to an engine share a few pooled
+    connections (-w) instead of a thread each."""
+
+    def build_client(self, config_file):
+        return AsyncEngineClient(self.args, self.log, connections=self.args.workers, config_file=config_file)
+
+    async def connect(self):
+        username, password = self.client.read_config()
+        await self.client.check_connection()
+        await self.client.login(username, password)
+
+    def reader(self):
+        return AsyncIncrementalReader(self.client, "executions", "executionId", "submitTime", self.watermark,
+                                      self.params)
+
+    async def discover(self):
+        now = time.monotonic()
+        found = []
+        async for execution in self.reader():
+            monitored = self.track(execution, now)
+            if monitored:
+                found.append(monitored)
+        self.discovery_done(found, now)
+        return found
+
+    async def poll(self, monitored):
+        execution = self.polled(monitored, await self.client.get(f"executions/{monitored.execution_id}"))
+        if execution is None:
+            return
+        components = [component async for component in AsyncPaginator(
+            self.client, "execution-components", {"execution_id": monitored.execution_id})]
+        self.update(monitored, execution, components)
+
+    async def follow(self, monitored, stop):
+        while monitored.execution_id in self.watched:
+            if await wait_stop(stop, monitored.next_poll - time.monotonic()):
+                return
+            try:
+                await self.poll(monitored)
+            except PageError as e:
+                self.log(f"Error fetching {e.api} {e}")
+                monitored.next_poll = time.monotonic() + monitored.interval
+            except SystemExit:
+                self.stop_engine()
+                return
+            except Exception as e:
+                self.log(f"Poll exception for execution {monitored.execution_id}: {e}")
+                monitored.next_poll = time.monotonic() + monitored.interval
+
+    async def run(self, stop):
+        try:
+            await self.connect()
+        except SystemExit:
+            self.failed = True
+            self.discovered = True
+            await self.client.close()
+            return
+        followers = set()
+        try:
+            while not stop.is_set() and not self.failed:
+                try:
+                    for monitored in await self.discover():
+                        followers.add(asyncio.ensure_future(self.follow(monitored, stop)))
+                except PageError as e:
+                    self.log(f"Error fetching {e.api} {e}")
+                    self.next_discovery = time.monotonic() + self.args.discovery_interval
+                except SystemExit:
+                    self.stop_engine()
+                    break
+                except Exception as e:
+                    self.log(f"Discovery exception: {e}")
+                    self.next_discovery = time.monotonic() + self.args.discovery_interval
+                followers = {follower for follower in followers if not follower.done()}
+                await wait_stop(stop, self.next_discovery - time.monotonic())
+        finally:
+            for follower in followers:
+                follower.cancel()
+            await asyncio.gather(*followers, return_exceptions=True)
+            await self.client.logout()
+
+async def wait_stop(stop, seconds):
+    """Sleep for seconds, or until stop is set; True if it was."""
+    try:
+        await asyncio.wait_for(stop.wait(), max(0, seconds))
+    except asyncio.TimeoutError:
+        pass
+    return stop.is_set()
+
+class ExecutionMonitor:
+    def __init__(self, args):
+        self.args = args
+        self.engine_monitor = AsyncEngineMonitor if args.use_async else EngineMonitor
+        self.logger, self.log_file_name = setup_logging(args.log_file, "dpxcc_monitor_executions")
+        self.log_buffer = LogBuffer(self.logger)
+        self.stop = threading.Event()
+        self.events = deque(maxlen=RECENT_EVENTS)
+        self.events_lock = threading.Lock()
+        self.failures = 0
+        self.monitors = []
+
+    def log(self, message):
+        self.log_buffer.log(message)
+
+    def emit(self, monitored):
+        # Completion or failure of an execution: log, table and events file
+        execution = monitored.execution
+        event = {
+            "time": time.strftime('%Y-%m-%dT%H:%M:%S'),
+            "engine": monitored.engine,
+            "executionId": monitored.execution_id,
+            "jobId": execution.get('jobId'),
+            "status": monitored.status,
+            "rowsMasked": execution.get('rowsMasked'),
+            "rowsTotal": execution.get('rowsTotal'),
+            "startTime": execution.get('startTime'),
+            "endTime": execution.get('endTime'),
+        }
+        self.log(f"Execution {monitored.execution_id} of job {event['jobId']} on {monitored.engine}: "
+                 f"{monitored.status}, {event['rowsMasked']} rows masked.")
+        with self.events_lock:
+            if monitored.status != "SUCCEEDED":
+                self.failures += 1
+            self.events.append(f"{event['time']} {monitored.engine} execution {monitored.execution_id} "
+                               f"(job {event['jobId']}) {monitored.status}")
+            if self.args.events_file:
+                with open(self.args.events_file, 'a') as f:
+                    f.write(json.dumps(event) + "\n")
+
+    def build_monitors(self):
+        if not self.args.engines:
+            return [self.engine_monitor(self.args, self.log, self.emit)]
+        try:
+            targets = read_engines_file(self.args.engines)
+        except (OSError, ValueError) as e:
+            self.log(f"Error reading {self.args.engines}: {e}")
+            sys.exit(1)
+        if not targets:
+            self.log(f"No engines in {self.args.engines}")
+            sys.exit(1)
+        return [self.engine_monitor(self.args, self.log, self.emit, target.config_file, target.name)
+                for target in targets]
+
+    def show_table(self):
+        rows = [row for monitor in self.monitors for row in monitor.table_rows()]
+        lines = [f"{time.strftime('%d%m%Y %H:%M:%S')} - {len(self.monitors)} engines, "
+                 f"{sum(1 for row in rows if row[1] != '')} running executions"]
+        if rows:
+            lines.extend(format_table(TABLE_HEADERS, rows))
+        with self.events_lock:
+            if self.events:
+                lines.append("Recent events:")
+                lines.extend(f"  {event}" for event in self.events)
+        output = "\n".join(lines) + "\n"
+        if sys.stdout.isatty():
+            output = CLEAR_SCREEN + output
+        sys.stdout.write(output)
+        sys.stdout.flush()
+
+    def idle(self):
+        return all(monitor.failed or (monitor.discovered and not monitor.watched) for monitor in self.monitors)
+
+    def refresh(self):
+        """Redraw the table; True once the monitor should stop (idle)."""
+        if not self.args.quiet:
+            self.show_table()
+        if self.args.exit_when_idle and self.idle():
+            self.log("No running executions left.")
+            return True
+        return False
+
+    def run_threads(self):
+        threads = [threading.Thread(target=monitor.run, args=(self.stop,), name=f"dpxcc-engine-{index}", daemon=True)
+                   for index, monitor in enumerate(self.monitors)]
+        for thread in threads:
+            thread.start()
+        self.log(f"Monitoring {len(self.monitors)} engines (Ctrl-C to stop) ...")
+        try:
+            while any(thread.is_alive() for thread in threads):
+                if self.refresh():
+                    break
+                self.stop.wait(self.args.refresh)
+        except KeyboardInterrupt:
+            self.log("Stopping ...")
+        finally:
+            self.stop.set()
+            for thread in threads:
+                thread.join()
+
+    async def run_async(self):
+        stop = asyncio.Event()
+        engines = [asyncio.ensure_future(monitor.run(stop)) for monitor in self.monitors]
+        self.log(f"Monitoring {len(self.monitors)} engines in one event loop (Ctrl-C to stop) ...")
+        try:
+            while not all(engine.done() for engine in engines):
+                if self.refresh():
+                    break
+                await asyncio.wait(engines, timeout=self.args.refresh)
+        finally:
+            # Also on Ctrl-C: every engine logs out before the loop ends
+            stop.set()
+            await asyncio.gather(*engines, return_exceptions=True)
+
+    def run(self):
+        self.monitors = self.build_monitors()
+        if self.args.use_async:
+            try:
+                asyncio.run(self.run_async())
+            except KeyboardInterrupt:
+                self.log("Stopping ...")
+        else:
+            self.run_threads()
+
+        if self.failures or any(monitor.failed for monitor in self.monitors):
+            sys.exit(1)
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch the running executions of one or several engines until stopped, with rows per second and ETA per component")
+    parser.add_argument('-e', '--engines', help=f"Engines file (e.g. {DEFAULT_ENGINES_FILE}) to watch every engine it lists instead of the one in CONFIG")
+    parser.add_argument('-j', '--job-id', help="Only the executions of this job")
+    parser.add_argument('-w', '--workers', type=int, default=DEFAULT_WORKERS, help="Executions of one engine polled in parallel (with --async, connections to each engine)")
+    parser.add_argument('-r', '--refresh', type=float, default=DEFAULT_REFRESH, help="Seconds between redraws of the status table")
+    parser.add_argument('--min-interval', type=float, default=MONITOR_MIN_INTERVAL, help="Seconds between polls of an execution whose rows are moving")
+    parser.add_argument('--max-interval', type=float, default=MONITOR_MAX_INTERVAL, help="Longest interval between polls of an execution whose rows do not move")
+    parser.add_argument('--discovery-interval', type=float, default=DEFAULT_DISCOVERY_INTERVAL, help="Seconds between checks for new executions")
+    parser.add_argument('--events-file', help="Append a JSON line to this file for every execution that ends")
+    parser.add_argument('--async', dest='use_async', action='store_true', help="Watch every engine and execution from one asyncio event loop instead of threads (needs aiohttp)")
+    parser.add_argument('--exit-when-idle', action='store_true', help="Stop once no execution is running; exit with 1 if any failed")
+    parser.add_argument('-q', '--quiet', action='store_true', help="Do not print the status table, only log the events")
+    parser.add_argument('-l', '--log-file', help="Log file name")
+    parser.add_argument('-k', '--https-insecure', action='store_true', help="Make Https Insecure")
+    parser.add_argument('--token-cache', action='store_true', help="Reuse the engine token between runs (CONFIG.tokens)")
+    parser.add_argument('--connect-timeout', type=float, default=DEFAULT_CONNECT_TIMEOUT, help="Seconds to wait for a connection to the engine")
+    parser.add_argument('--read-timeout', type=float, default=DEFAULT_READ_TIMEOUT, help="Seconds to wait for the answer to a call")
+    parser.add_argument('--hedge', action='store_true', help="Send a poll again if it has not answered within its usual 95th percentile time")
+
+    args = parser.parse_args()
+    if args.use_async and not async_available():
+        parser.error("--async needs the aiohttp package (pip install aiohttp)")
+
+    monitor = ExecutionMonitor(args)
+    monitor.run()
+
+if __name__ == "__main__":
+    main()
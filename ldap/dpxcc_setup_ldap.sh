@@ -256,7 +256,7 @@ build_curl() {
         curl_command="$curl_command -k "
     fi
 
-    curl_command="$curl_command -i -s $URL_BASE/$API"
+    curl_command="$curl_command -i -s '$URL_BASE/$API'"
     log "$curl_command\n"
 }
 
@@ -314,32 +314,65 @@ dpxlogout() {
     fi
 }
 
-# Get LDAP Config
-get_ldap_config() {
-    local setting_group="ldap"
+# GET every page of a list endpoint: $2 is the endpoint with its query
+# string, $3 the page size. CURL_BODY_RESPONSE is then one responseList
+# with the items of all the pages.
+get_all_pages() {
+    local FUNC="$1"
+    local LIST_API="$2"
+    local page_size="$3"
     local page_number=1
-    local page_size=10
+    local items
+    local total
+    local count=0
+    local pages=""
 
-    local FUNC="${FUNCNAME[0]}"
     local URL_BASE="$MASKING_ENGINE/masking/api/$apiVer"
-    local API="application-settings?setting_group=$setting_group&page_number=$page_number&page_size=$page_size"
+    local API
     local METHOD="GET"
     local AUTH="$AUTH_HEADER"
     local CONTENT_TYPE="application/json"
     local FORM=""
     local DATA=""
+    local PAGE_RESPONSE
+    local separator="?"
+    if [[ "$LIST_API" == *\?* ]]; then
+        separator="&"
+    fi
+
+    while true; do
+        API="$LIST_API${separator}page_number=$page_number&page_size=$page_size"
+        build_curl "$URL_BASE" "$API" "$METHOD" "$AUTH" "$CONTENT_TYPE" "$KEEPALIVE" "$PROXY_BYPASS" "$HttpsInsecure" "$FORM" "$DATA"
+        PAGE_RESPONSE=$(eval "$curl_command")
+        split_response "$PAGE_RESPONSE"
+        check_response_error "$FUNC" "$API"
+
+        pages="$pages$CURL_BODY_RESPONSE"$'\n'
+        items=$(echo "$CURL_BODY_RESPONSE" | jq -r '(.responseList // []) | length')
+        total=$(echo "$CURL_BODY_RESPONSE" | jq -r '(._pageInfo // ._page // {}).total // 0')
+        count=$((count + items))
+        # Without a total, read on until a short page
+        if [ "$items" -eq 0 ] || { [ "$total" -gt 0 ] && [ "$count" -ge "$total" ]; } || { [ "$total" -eq 0 ] && [ "$items" -lt "$page_size" ]; }; then
+            break
+        fi
+        page_number=$((page_number + 1))
+    done
+
+    CURL_BODY_RESPONSE=$(echo "$pages" | jq -s '{responseList: [.[] | (.responseList // [])[]]}')
+}
+
+# Get LDAP Config
+get_ldap_config() {
+    local setting_group="ldap"
+    local page_size=10
+
+    local FUNC="${FUNCNAME[0]}"
 
     local settingName
     local settingValue
 
     log "Getting LDAP Parameters ...\n"
-    build_curl "$URL_BASE" "$API" "$METHOD" "$AUTH" "$CONTENT_TYPE" "$KEEPALIVE" "$PROXY_BYPASS" "$HttpsInsecure" "$FORM" "$DATA"
-
-    local LDAP_CONFIG_RESPONSE
-    LDAP_CONFIG_RESPONSE=$(eval "$curl_command")
-
-    split_response "$LDAP_CONFIG_RESPONSE"
-    check_response_error "$FUNC" "$API"
+    get_all_pages "$FUNC" "application-settings?setting_group=$setting_group" "$page_size"
 
     local LDAP_CONFIG_VALUE
     LDAP_CONFIG_VALUE=$(echo "$CURL_BODY_RESPONSE" | jq -r '.responseList[]')
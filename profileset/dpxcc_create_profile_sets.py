@@ -1,190 +1,65 @@
 #!/usr/bin/env python3
 
 import argparse
-import base64
 import json
-import logging
 import os
+import re
 import sys
-import requests
-from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from dpxcc import (DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT, DeployJournal, EngineClient, Inventory, PageError,
+                   content_hash, setup_logging)
+from dpxcc.journal import DONE
 
 # Configuration Defaults
-DEFAULT_API_VER = "v5.1.27"
 DEFAULT_PROFILE_SET_FILE = "crt_profile_sets.csv"
-CONFIG_FILE = "CONFIG"
 
 class ProfileSetCreator:
     def __init__(self, args):
         self.args = args
-        self.masking_engine = ""
-        self.api_base_url = ""
-        self.auth_header = {}
-        self.session = requests.Session()
+        self.logger, self.log_file_name = setup_logging(args.log_file, "dpxcc_create_profile_sets")
+        self.client = EngineClient(args, self.log)
+        self.inventory = Inventory(self.client, self.log, persistent=args.inventory)
         self.classifier_map = {} # Name -> ID
-        self.setup_logging()
-
-    def setup_logging(self):
-        log_date = datetime.now().strftime('%d%m%Y_%H%M%S')
-        log_file_name = self.args.log_file if self.args.log_file else f"dpxcc_create_profile_sets_{log_date}.log"
-        
-        file_handler = logging.FileHandler(log_file_name)
-        console_handler = logging.StreamHandler(sys.stderr)
-
-        formatter = logging.Formatter('[%(asctime)s] %(message)s', datefmt='%d%m%Y %H:%M:%S')
-        file_handler.setFormatter(formatter)
-        console_handler.setFormatter(formatter)
-
-        self.logger = logging.getLogger()
-        self.logger.setLevel(logging.INFO)
-        self.logger.addHandler(file_handler)
-        self.logger.addHandler(console_handler)
+        self.journal = None  # DeployJournal, needs the engine from CONFIG
 
     def log(self, message):
         self.logger.info(message)
 
-    def read_config(self):
-        if not os.path.exists(CONFIG_FILE):
-            self.log(f"Error: {CONFIG_FILE} not found!")
-            sys.exit(1)
-        
-        try:
-            with open(CONFIG_FILE, 'r') as f:
-                lines = f.readlines()
-                encoded_user = lines[0].strip()
-                encoded_pass = lines[1].strip()
-                self.masking_engine = lines[2].strip()
-            
-            username = base64.b64decode(encoded_user).decode('utf-8')
-            password = base64.b64decode(encoded_pass).decode('utf-8')
-            
-            if self.args.https_insecure:
-                self.protocol = "https"
-                self.verify_ssl = False
-            else:
-                self.protocol = "http"
-                self.verify_ssl = True
-            
-            self.api_base_url = f"{self.protocol}://{self.masking_engine}/masking/api/{DEFAULT_API_VER}"
-            return username, password
-
-        except Exception as e:
-            self.log(f"Error reading CONFIG: {e}")
-            sys.exit(1)
-
-    def check_connection(self):
-        url = f"{self.protocol}://{self.masking_engine}"
-        self.log(f"Checking connection to {url}...")
-        try:
-            response = requests.get(url, timeout=5, verify=self.verify_ssl)
-            response.raise_for_status()
-            self.log(f"Connection to {url} successful.")
-        except requests.exceptions.RequestException as e:
-            self.log(f"Error connecting to {url}: {e}")
-            sys.exit(1)
-
-    def login(self, username, password):
-        api_endpoint = f"{self.api_base_url}/login"
-        payload = {"username": username, "password": password}
-        self.log(f"Logging in with {username} ...")
-        
-        try:
-            response = self.session.post(api_endpoint, json=payload, verify=self.verify_ssl)
-            
-            if response.status_code != 200:
-                self.log(f"Login failed: {response.status_code} - {response.text}")
-                sys.exit(1)
-                
-            data = response.json()
-            if 'Authorization' not in data:
-                self.log(f"Login failed: No Authorization token. Response: {data}")
-                sys.exit(1)
-                
-            self.auth_header = {'Authorization': data['Authorization']}
-            self.session.headers.update(self.auth_header)
-            self.log(f"{username} logged in successfully with token {data['Authorization']}")
-            
-        except Exception as e:
-            self.log(f"Login exception: {e}")
-            sys.exit(1)
-
-    def logout(self):
-        if not self.auth_header:
-            return
-        self.log("Logging out ...")
-        try:
-            api_endpoint = f"{self.api_base_url}/logout"
-            response = self.session.put(api_endpoint, verify=self.verify_ssl)
-            self.log(f"Response Code: {response.status_code} - Response Body: {response.text}")
-            self.log("Logged out successfully.")
-        except Exception as e:
-            self.log(f"Logout exception: {e}")
-    
     def check_response_error(self, func_name, api_name, response):
         self.log(f"{func_name}() -> Function: {func_name}() - Api: {api_name} - Response Code: {response.status_code} - Response Body: {response.text}")
         if not self.args.ignore_errors:
-            self.logout()
+            self.client.logout()
             sys.exit(1)
 
     def get_all_classifiers(self):
         self.log("Fetching all classifiers to map Names to IDs...")
-        api_endpoint = f"{self.api_base_url}/classifiers"
+        api_endpoint = "classifiers"
         
-        page_number = 1
-        page_size = 100
-        total_fetched = 0
-        
-        while True:
-            params = {
-                "page_number": page_number,
-                "page_size": page_size
-            }
-            
-            try:
-                response = self.session.get(api_endpoint, params=params, verify=self.verify_ssl)
-                
-                if response.status_code != 200:
-                    self.log(f"Error fetching classifiers page {page_number}: {response.text}")
-                    if not self.args.ignore_errors:
-                        self.logout()
-                        sys.exit(1)
-                    break 
+        try:
+            self.classifier_map = self.inventory.name_map(api_endpoint)
 
-                data = response.json()
-                response_list = data.get('responseList', [])
-                
-                if not response_list:
-                    break
-                    
-                for clf in response_list:
-                    name = clf.get('classifierName')
-                    clf_id = clf.get('classifierId')
-                    if name and clf_id:
-                        self.classifier_map[name] = clf_id
-                
-                total_fetched += len(response_list)
-                
-                # Check pagination metadata if available
-                page_info = data.get('_page')
-                if page_info:
-                    if total_fetched >= page_info.get('total', float('inf')):
-                        break
-                
-                if len(response_list) < page_size:
-                    break
-                    
-                page_number += 1
-                
-            except Exception as e:
-                self.log(f"Exception fetching classifiers: {e}")
-                if not self.args.ignore_errors:
-                    self.logout()
-                    sys.exit(1)
-                break
+        except PageError as e:
+            self.log(f"Error fetching classifiers {e}")
+            if not self.args.ignore_errors:
+                self.client.logout()
+                sys.exit(1)
+        except Exception as e:
+            self.log(f"Exception fetching classifiers: {e}")
+            if not self.args.ignore_errors:
+                self.client.logout()
+                sys.exit(1)
                 
         self.log(f"Mapped {len(self.classifier_map)} classifiers.")
 
-    def add_profile_set(self, ps_json):
+    def unknown_classifier_ids(self, response, classifier_ids):
+        # A 4xx about classifiers that names IDs we sent: they may have been
+        # deleted and recreated since the inventory was last refreshed.
+        if not 400 <= response.status_code < 500 or "classifier" not in response.text.lower():
+            return []
+        return [clf_id for clf_id in classifier_ids if re.search(rf"\b{clf_id}\b", response.text)]
+
+    def add_profile_set(self, ps_json, digest=None, retry=True):
         ps_name = ps_json.get('profileSetName')
         self.log(f"Adding Profile Set {ps_name} ...")
         
@@ -195,8 +70,17 @@ class ProfileSetCreator:
         missing_classifiers = []
         
         for name in classifier_names:
-            if name in self.classifier_map:
-                classifier_ids.append(self.classifier_map[name])
+            clf_id = self.classifier_map.get(name)
+            if clf_id is None:
+                # Not in the inventory: refreshed once if it is from an earlier run
+                try:
+                    clf_id = self.inventory.get_id("classifiers", name)
+                except Exception as e:
+                    self.log(f"Exception fetching classifiers: {e}")
+                if clf_id is not None:
+                    self.classifier_map[name] = clf_id
+            if clf_id is not None:
+                classifier_ids.append(clf_id)
             else:
                 missing_classifiers.append(name)
         
@@ -216,34 +100,67 @@ class ProfileSetCreator:
             # Add other fields if necessary
         }
         
-        api_endpoint = f"{self.api_base_url}/profile-sets"
+        api_endpoint = "profile-sets"
         
         try:
-            response = self.session.post(api_endpoint, json=payload, verify=self.verify_ssl)
+            self.journal.sending("profile-sets", ps_name, digest)
+            response = self.client.post(api_endpoint, json=payload)
+            self.journal.answered("profile-sets", ps_name)
             
+            stale_ids = self.unknown_classifier_ids(response, classifier_ids) if retry else []
+            if stale_ids:
+                self.log(f"Classifier IDs {stale_ids} rejected by the engine, refreshing classifiers ...")
+                self.inventory.refresh("classifiers")
+                self.classifier_map = self.inventory.name_map("classifiers")
+                return self.add_profile_set(ps_json, digest, retry=False)
+
             if response.status_code != 200:
                 # Check for "already exists"
+                if "already exists" in response.text and self.journal.attempted("profile-sets", ps_name, digest):
+                     self.log(f"Profile Set {ps_name} already exists, created by the interrupted run.")
+                     self.journal.record("profile-sets", ps_name, DONE, digest)
+                     return True
                 if self.args.ignore_errors and "already exists" in response.text:
                      self.log(f"Profile Set {ps_name} already exists. Ignoring.")
-                     return
+                     self.journal.record("profile-sets", ps_name, DONE, digest)
+                     return True
                 self.check_response_error("add_profile_set", "profile-sets", response)
             
             data = response.json()
             if data.get('profileSetName'):
                 self.log(f"Profile Set: {ps_name} created.")
+                self.inventory.put("profile-sets", data)
+                self.journal.record("profile-sets", ps_name, DONE, digest, data.get('profileSetId'))
+                return True
             else:
                 self.log(f"Profile Set: {ps_name} NOT created.")
 
         except Exception as e:
             self.log(f"Add profile set exception: {e}")
             if not self.args.ignore_errors:
-                self.logout()
+                self.client.logout()
                 sys.exit(1)
+        return False
+
+    def process_profile_set(self, ps_json):
+        ps_name = ps_json.get('profileSetName')
+        digest = content_hash(ps_json)
+        if self.args.resume and self.journal.completed("profile-sets", ps_name, digest):
+            self.log(f"Profile Set: {ps_name} already created by the previous run.")
+            return
+        done = False
+        try:
+            done = self.add_profile_set(ps_json, digest)
+        finally:
+            # Also when add_profile_set exits: --resume then retries it
+            if not done:
+                self.journal.failed("profile-sets", ps_name, digest)
 
     def run(self):
-        username, password = self.read_config()
-        self.check_connection()
-        self.login(username, password)
+        username, password = self.client.read_config()
+        self.client.check_connection()
+        self.client.login(username, password)
+        self.journal = DeployJournal(self.client.masking_engine, "dpxcc_create_profile_sets", self.log, self.args.resume)
         
         if not os.path.exists(self.args.profile_sets_file) and not self.args.ignore_errors:
              self.log(f"Input CSV file {self.args.profile_sets_file} missing")
@@ -268,21 +185,22 @@ class ProfileSetCreator:
                     if not os.path.exists(json_name):
                         self.log(f"Warning: JSON file {json_name} not found.")
                         if not self.args.ignore_errors:
-                            self.logout()
+                            self.client.logout()
                             sys.exit(1)
                         continue
                     
                     try:
                         with open(json_name, 'r') as jf:
                             ps_json = json.load(jf)
-                            self.add_profile_set(ps_json)
+                            self.process_profile_set(ps_json)
                                 
                     except json.JSONDecodeError:
                          self.log(f"JSON Decode Error in {json_name}")
                          continue
                     
         finally:
-            self.logout()
+            self.inventory.close()
+            self.client.logout()
 
 def main():
     parser = argparse.ArgumentParser(description="Create Profile Sets from CSV list")
@@ -290,6 +208,12 @@ def main():
     parser.add_argument('-i', '--ignore-errors', action='store_true', help="Ignore errors")
     parser.add_argument('-o', '--log-file', help="Log file name")
     parser.add_argument('-k', '--https-insecure', action='store_true', help="Make Https Insecure")
+    parser.add_argument('--token-cache', action='store_true', help="Reuse the engine token between runs (CONFIG.tokens)")
+    parser.add_argument('--connect-timeout', type=float, default=DEFAULT_CONNECT_TIMEOUT, help="Seconds to wait for a connection to the engine")
+    parser.add_argument('--read-timeout', type=float, default=DEFAULT_READ_TIMEOUT, help="Seconds to wait for the answer to a call (lookup file uploads wait at least 300)")
+    parser.add_argument('--hedge', action='store_true', help="Send a read (list, framework, async task status) again if it has not answered within its usual 95th percentile time")
+    parser.add_argument('--inventory', action='store_true', help="Look objects up in the local inventory of the engine instead of downloading them")
+    parser.add_argument('--resume', action='store_true', help="Skip the Profile Sets the previous run created (journal), only send the failed and remaining ones")
     
     args = parser.parse_args()
     
@@ -1,226 +1,123 @@
 #!/usr/bin/env python3
 
 import argparse
-import base64
 import json
-import logging
 import os
 import sys
-import requests
-from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from dpxcc import (DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT, DeployJournal, EngineClient, Inventory, PageError,
+                   setup_logging)
+from dpxcc.journal import DONE, FAILED
 
 # Configuration Defaults
-DEFAULT_API_VER = "v5.1.27"
 DEFAULT_PROFILE_SET_FILE = "crt_profile_sets.csv"
-CONFIG_FILE = "CONFIG"
 
 class ProfileSetDeleter:
     def __init__(self, args):
         self.args = args
-        self.masking_engine = ""
-        self.api_base_url = ""
-        self.auth_header = {}
-        self.session = requests.Session()
-        self.profile_set_map = {} # Name -> ID
-        self.setup_logging()
-
-    def setup_logging(self):
-        log_date = datetime.now().strftime('%d%m%Y_%H%M%S')
-        log_file_name = self.args.log_file if self.args.log_file else f"dpxcc_delete_profile_sets_{log_date}.log"
-        
-        file_handler = logging.FileHandler(log_file_name)
-        console_handler = logging.StreamHandler(sys.stderr)
-
-        formatter = logging.Formatter('[%(asctime)s] %(message)s', datefmt='%d%m%Y %H:%M:%S')
-        file_handler.setFormatter(formatter)
-        console_handler.setFormatter(formatter)
-
-        self.logger = logging.getLogger()
-        self.logger.setLevel(logging.INFO)
-        self.logger.addHandler(file_handler)
-        self.logger.addHandler(console_handler)
+        self.logger, self.log_file_name = setup_logging(args.log_file, "dpxcc_delete_profile_sets")
+        self.client = EngineClient(args, self.log)
+        self.inventory = Inventory(self.client, self.log, persistent=args.inventory) # Name -> ID
+        self.journal = None  # DeployJournal, needs the engine from CONFIG
 
     def log(self, message):
         self.logger.info(message)
 
-    def read_config(self):
-        if not os.path.exists(CONFIG_FILE):
-            self.log(f"Error: {CONFIG_FILE} not found!")
-            sys.exit(1)
+    def get_all_profile_sets(self):
+        self.log("Fetching all profile sets to map Names to IDs...")
+        api_endpoint = "profile-sets"
         
-        try:
-            with open(CONFIG_FILE, 'r') as f:
-                lines = f.readlines()
-                encoded_user = lines[0].strip()
-                encoded_pass = lines[1].strip()
-                self.masking_engine = lines[2].strip()
-            
-            username = base64.b64decode(encoded_user).decode('utf-8')
-            password = base64.b64decode(encoded_pass).decode('utf-8')
-            
-            if self.args.https_insecure:
-                self.protocol = "https"
-                self.verify_ssl = False
-            else:
-                self.protocol = "http"
-                self.verify_ssl = True
-            
-            self.api_base_url = f"{self.protocol}://{self.masking_engine}/masking/api/{DEFAULT_API_VER}"
-            return username, password
-
-        except Exception as e:
-            self.log(f"Error reading CONFIG: {e}")
-            sys.exit(1)
-
-    def check_connection(self):
-        url = f"{self.protocol}://{self.masking_engine}"
-        self.log(f"Checking connection to {url}...")
-        try:
-            response = requests.get(url, timeout=5, verify=self.verify_ssl)
-            response.raise_for_status()
-            self.log(f"Connection to {url} successful.")
-        except requests.exceptions.RequestException as e:
-            self.log(f"Error connecting to {url}: {e}")
-            sys.exit(1)
-
-    def login(self, username, password):
-        api_endpoint = f"{self.api_base_url}/login"
-        payload = {"username": username, "password": password}
-        self.log(f"Logging in with {username} ...")
+        profile_set_count = 0
         
         try:
-            response = self.session.post(api_endpoint, json=payload, verify=self.verify_ssl)
-            
-            if response.status_code != 200:
-                self.log(f"Login failed: {response.status_code} - {response.text}")
+            profile_set_count = len(self.inventory.items(api_endpoint))
+
+        except PageError as e:
+            self.log(f"Error fetching profile sets {e}")
+            if not self.args.ignore_errors:
+                self.client.logout()
                 sys.exit(1)
-                
-            data = response.json()
-            if 'Authorization' not in data:
-                self.log(f"Login failed: No Authorization token. Response: {data}")
+        except Exception as e:
+            self.log(f"Exception fetching profile sets: {e}")
+            if not self.args.ignore_errors:
+                self.client.logout()
                 sys.exit(1)
                 
-            self.auth_header = {'Authorization': data['Authorization']}
-            self.session.headers.update(self.auth_header)
-            self.log(f"{username} logged in successfully with token {data['Authorization']}")
-            
-        except Exception as e:
-            self.log(f"Login exception: {e}")
-            sys.exit(1)
+        self.log(f"Mapped {profile_set_count} profile sets.")
 
-    def logout(self):
-        if not self.auth_header:
-            return
-        self.log("Logging out ...")
+    def delete_profile_set(self, ps_name, retry=True):
         try:
-            api_endpoint = f"{self.api_base_url}/logout"
-            response = self.session.put(api_endpoint, verify=self.verify_ssl)
-            self.log(f"Response Code: {response.status_code} - Response Body: {response.text}")
-            self.log("Logged out successfully.")
+            ps_id = self.inventory.get_id("profile-sets", ps_name)
         except Exception as e:
-            self.log(f"Logout exception: {e}")
-
-    def get_all_profile_sets(self):
-        self.log("Fetching all profile sets to map Names to IDs...")
-        api_endpoint = f"{self.api_base_url}/profile-sets"
-        
-        page_number = 1
-        page_size = 100
-        total_fetched = 0
-        
-        while True:
-            params = {
-                "page_number": page_number,
-                "page_size": page_size
-            }
-            
-            try:
-                response = self.session.get(api_endpoint, params=params, verify=self.verify_ssl)
-                
-                if response.status_code != 200:
-                    self.log(f"Error fetching profile sets page {page_number}: {response.text}")
-                    if not self.args.ignore_errors:
-                        self.logout()
-                        sys.exit(1)
-                    break 
-
-                data = response.json()
-                response_list = data.get('responseList', [])
-                
-                if not response_list:
-                    break
-                    
-                for ps in response_list:
-                    name = ps.get('profileSetName')
-                    ps_id = ps.get('profileSetId')
-                    if name and ps_id:
-                        self.profile_set_map[name] = ps_id
-                
-                total_fetched += len(response_list)
-                
-                page_info = data.get('_page')
-                if page_info:
-                    if total_fetched >= page_info.get('total', float('inf')):
-                        break
-                
-                if len(response_list) < page_size:
-                    break
-                    
-                page_number += 1
-                
-            except Exception as e:
-                self.log(f"Exception fetching profile sets: {e}")
-                if not self.args.ignore_errors:
-                    self.logout()
-                    sys.exit(1)
-                break
-                
-        self.log(f"Mapped {len(self.profile_set_map)} profile sets.")
-
-    def delete_profile_set(self, ps_name):
-        ps_id = self.profile_set_map.get(ps_name)
+            self.log(f"Exception fetching profile sets: {e}")
+            if not self.args.ignore_errors:
+                self.client.logout()
+                sys.exit(1)
+            return
         
         if not ps_id:
             self.log(f"Profile Set {ps_name} NOT found in engine. Skipping.")
-            return
+            return True
 
         self.log(f"Deleting Profile Set {ps_name} (ID: {ps_id}) ...")
         
-        api_endpoint = f"{self.api_base_url}/profile-sets/{ps_id}"
+        api_endpoint = f"profile-sets/{ps_id}"
         
         try:
-            response = self.session.delete(api_endpoint, verify=self.verify_ssl)
+            response = self.client.delete(api_endpoint)
             
             if response.status_code == 204: 
                  self.log(f"Profile Set: {ps_name} deleted (204 No Content).")
-                 return
+                 self.inventory.remove("profile-sets", ps_name)
+                 return True
 
             if response.status_code == 200:
                  self.log(f"Profile Set: {ps_name} deleted (200 OK).")
-                 return
+                 self.inventory.remove("profile-sets", ps_name)
+                 return True
             
             if response.status_code == 404:
                  self.log(f"Profile Set ID {ps_id} not found during deletion.")
-                 return
+                 self.inventory.remove("profile-sets", ps_name)
+                 if retry and self.args.inventory:
+                     # Stale local inventory: refresh and retry with the new ID
+                     self.inventory.refresh("profile-sets")
+                     if self.inventory.get_id("profile-sets", ps_name) not in (None, ps_id):
+                         return self.delete_profile_set(ps_name, retry=False)
+                 return True
 
             self.check_response_error("delete_profile_set", f"profile-sets/{ps_id}", response)
 
         except Exception as e:
              self.log(f"Delete profile set exception: {e}")
              if not self.args.ignore_errors:
-                 self.logout()
+                 self.client.logout()
                  sys.exit(1)
+        return False
+
+    def process_profile_set(self, ps_name):
+        if self.args.resume and self.journal.completed("profile-sets", ps_name):
+            self.log(f"Profile Set: {ps_name} already deleted by the previous run.")
+            return
+        done = False
+        try:
+            done = self.delete_profile_set(ps_name)
+        finally:
+            # Also when delete_profile_set exits: --resume then retries it
+            self.journal.record("profile-sets", ps_name, DONE if done else FAILED)
 
     def check_response_error(self, func_name, api_name, response):
         self.log(f"{func_name}() -> Function: {func_name}() - Api: {api_name} - Response Code: {response.status_code} - Response Body: {response.text}")
         if not self.args.ignore_errors:
-            self.logout()
+            self.client.logout()
             sys.exit(1)
 
     def run(self):
-        username, password = self.read_config()
-        self.check_connection()
-        self.login(username, password)
+        username, password = self.client.read_config()
+        self.client.check_connection()
+        self.client.login(username, password)
+        self.journal = DeployJournal(self.client.masking_engine, "dpxcc_delete_profile_sets", self.log, self.args.resume)
         
         if not os.path.exists(self.args.profile_sets_file) and not self.args.ignore_errors:
              self.log(f"Input CSV file {self.args.profile_sets_file} missing")
@@ -252,7 +149,7 @@ class ProfileSetDeleter:
                             ps_name = ps_json.get('profileSetName')
                             
                             if ps_name:
-                                self.delete_profile_set(ps_name)
+                                self.process_profile_set(ps_name)
                             else:
                                 self.log(f"No profileSetName found in {json_name}")
 
@@ -261,7 +158,8 @@ class ProfileSetDeleter:
                          continue
                     
         finally:
-            self.logout()
+            self.inventory.close()
+            self.client.logout()
 
 def main():
     parser = argparse.ArgumentParser(description="Delete Profile Sets from CSV list")
@@ -269,6 +167,12 @@ def main():
     parser.add_argument('-i', '--ignore-errors', action='store_true', help="Ignore errors")
     parser.add_argument('-o', '--log-file', help="Log file name")
     parser.add_argument('-k', '--https-insecure', action='store_true', help="Make Https Insecure")
+    parser.add_argument('--token-cache', action='store_true', help="Reuse the engine token between runs (CONFIG.tokens)")
+    parser.add_argument('--connect-timeout', type=float, default=DEFAULT_CONNECT_TIMEOUT, help="Seconds to wait for a connection to the engine")
+    parser.add_argument('--read-timeout', type=float, default=DEFAULT_READ_TIMEOUT, help="Seconds to wait for the answer to a call (lookup file uploads wait at least 300)")
+    parser.add_argument('--hedge', action='store_true', help="Send a read (list, framework, async task status) again if it has not answered within its usual 95th percentile time")
+    parser.add_argument('--inventory', action='store_true', help="Look objects up in the local inventory of the engine instead of downloading them")
+    parser.add_argument('--resume', action='store_true', help="Skip the Profile Sets the previous run deleted (journal), only retry the failed and remaining ones")
     
     args = parser.parse_args()
     
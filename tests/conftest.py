@@ -0,0 +1,77 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+
+class StubResponse:
+    def __init__(self, status_code, data=None):
+        self.status_code = status_code
+        self.data = data
+        self.text = "" if data is None else str(data)
+
+    def json(self):
+        return self.data
+
+
+class StubEngine:
+    """Answers list requests the way the engine does: records sliced by
+    page_number and page_size, the total in _pageInfo. records is the list
+    of every api, or a dict api -> list. Every request is kept in requests
+    as (api, page_number, page_size)."""
+
+    def __init__(self, records, masking_engine="stub"):
+        self.records = records
+        self.masking_engine = masking_engine
+        self.requests = []
+
+    def get(self, api, params=None):
+        page_number, page_size = params['page_number'], params['page_size']
+        self.requests.append((api, page_number, page_size))
+        records = self.records.get(api, []) if isinstance(self.records, dict) else self.records
+        start = (page_number - 1) * page_size
+        return StubResponse(200, {
+            "_pageInfo": {"numberOnPage": page_size, "total": len(records)},
+            "responseList": records[start:start + page_size],
+        })
+
+
+class AsyncStubEngine(StubEngine):
+    """StubEngine for the asyncio readers: get() is awaited and waits while
+    gate is cleared. in_flight counts the requests waiting at the gate,
+    most_in_flight the most there at once, cancelled those cancelled
+    there."""
+
+    def __init__(self, records, masking_engine="stub"):
+        super().__init__(records, masking_engine)
+        self.gate = asyncio.Event()
+        self.gate.set()
+        self.in_flight = 0
+        self.most_in_flight = 0
+        self.cancelled = 0
+
+    async def get(self, api, params=None):
+        self.in_flight += 1
+        self.most_in_flight = max(self.most_in_flight, self.in_flight)
+        try:
+            await self.gate.wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.in_flight -= 1
+        return super().get(api, params)
+
+
+@pytest.fixture
+def stub_engine(request):
+    # One masking_engine per test: Paginator remembers page sizes by engine
+    return lambda records: StubEngine(records, masking_engine=request.node.nodeid)
+
+
+@pytest.fixture
+def async_stub_engine(request):
+    return lambda records: AsyncStubEngine(records, masking_engine=request.node.nodeid)
@@ -0,0 +1,179 @@
+import asyncio
+
+import pytest
+
+from dpxcc import AsyncIncrementalReader, AsyncPaginator, Watermark
+from dpxcc.aioclient import AsyncLimiter
+from dpxcc.pagination import PAGES_AHEAD
+
+
+def executions(count, status="SUCCEEDED"):
+    return [{"executionId": execution_id, "submitTime": f"t{execution_id:05}", "status": status}
+            for execution_id in range(1, count + 1)]
+
+
+def reader(client, watermark, page_size=10):
+    return AsyncIncrementalReader(client, "executions", "executionId", "submitTime", watermark, page_size=page_size)
+
+
+def watermark(last_id, open_ids=()):
+    return Watermark("key", {"lastId": last_id, "lastTime": f"t{last_id:05}", "openIds": list(open_ids)})
+
+
+def ids(records):
+    return [record["executionId"] for record in records]
+
+
+async def settle():
+    # Let every task that can run do so
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+async def collect(records):
+    return [record async for record in records]
+
+
+def read(records):
+    return asyncio.run(collect(records))
+
+
+def test_limiter_wakes_only_as_many_waiters_as_there_is_room_for():
+    async def scenario():
+        limiter = AsyncLimiter(2, [].append, initial=2)
+        started = [await limiter.acquire_async(), await limiter.acquire_async()]
+        waiting = [asyncio.ensure_future(limiter.acquire_async()) for _ in range(3)]
+        await settle()
+        assert not any(task.done() for task in waiting)
+        assert len(limiter.waiters) == 3
+
+        limiter.release(started[0], "GET executions")
+        await settle()
+        assert [task.done() for task in waiting] == [True, False, False]
+        assert limiter.in_flight == 2
+
+        for task in waiting[1:]:
+            task.cancel()
+        await settle()
+
+    asyncio.run(scenario())
+
+
+def test_limiter_cancelled_waiter_passes_its_slot_on():
+    async def scenario():
+        limiter = AsyncLimiter(2, [].append, initial=2)
+        started = [await limiter.acquire_async(), await limiter.acquire_async()]
+        first, second = (asyncio.ensure_future(limiter.acquire_async()) for _ in range(2))
+        await settle()
+
+        # first is woken for the free slot but cancelled before it runs
+        limiter.release(started[0], "GET executions")
+        first.cancel()
+        await settle()
+        assert first.cancelled()
+        assert second.done()
+        assert limiter.in_flight == 2
+
+    asyncio.run(scenario())
+
+
+def test_limiter_skips_waiters_cancelled_while_waiting():
+    async def scenario():
+        limiter = AsyncLimiter(1, [].append, initial=1)
+        started = await limiter.acquire_async()
+        first, second = (asyncio.ensure_future(limiter.acquire_async()) for _ in range(2))
+        await settle()
+        first.cancel()
+        await settle()
+
+        limiter.release(started, "GET executions")
+        await settle()
+        assert second.done()
+        assert limiter.in_flight == 1
+
+    asyncio.run(scenario())
+
+
+def test_paginator_reads_ahead_a_window_of_pages(async_stub_engine):
+    async def scenario():
+        client = async_stub_engine(executions(1000))
+        records = AsyncPaginator(client, "executions", page_size=10, workers=2).__aiter__()
+        first_page = [await records.__anext__() for _ in range(10)]
+
+        client.gate.clear()
+        following = asyncio.ensure_future(records.__anext__())
+        await settle()
+        # Waiting for page 2, with the next pages already requested
+        assert client.in_flight == 2 * PAGES_AHEAD
+
+        client.gate.set()
+        rest = [await following, *await collect(records)]
+        assert ids(first_page + rest) == list(range(1, 1001))
+        assert client.most_in_flight == 2 * PAGES_AHEAD
+
+    asyncio.run(scenario())
+
+
+def test_paginator_cancels_its_pages_when_cancelled(async_stub_engine):
+    async def scenario():
+        client = async_stub_engine(executions(1000))
+        records = AsyncPaginator(client, "executions", page_size=10, workers=2).__aiter__()
+        for _ in range(10):
+            await records.__anext__()
+
+        client.gate.clear()
+        following = asyncio.ensure_future(records.__anext__())
+        await settle()
+        following.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await following
+        await settle()
+        assert client.cancelled == 2 * PAGES_AHEAD
+        assert client.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_only_new_records_are_read(async_stub_engine):
+    client = async_stub_engine(executions(1000))
+    mark = watermark(950)
+    assert ids(read(reader(client, mark))) == list(range(951, 1001))
+    assert mark.last_id == 1000 and mark.last_time == "t01000"
+    assert len(client.requests) < 20
+
+
+def test_search_finds_the_first_page_past_the_watermark(async_stub_engine):
+    for last_id in (0, 5, 9, 10, 11, 499, 500, 501, 989, 990, 991, 999):
+        records = reader(async_stub_engine(executions(1000)), watermark(last_id))
+        start = asyncio.run(records.start_page())
+        assert start == last_id // 10 + 1
+        assert records.pages[start][-1]["executionId"] > last_id
+
+
+def test_nothing_new(async_stub_engine):
+    client = async_stub_engine(executions(1000))
+    assert read(reader(client, watermark(1000))) == []
+    assert [page_number for _, page_number, _ in client.requests] == [1, 100]
+
+
+def test_reopened_ids_lower_the_start(async_stub_engine):
+    records = executions(1000)
+    client = async_stub_engine(records)
+    mark = watermark(950, open_ids=(500, 700))
+    records[699]["status"] = "RUNNING"
+    assert ids(read(reader(client, mark))) == [500, *range(951, 1001)]
+    assert mark.open_ids == {700}
+
+
+def test_reopened_ids_no_longer_listed_are_dropped(async_stub_engine):
+    mark = watermark(950, open_ids=(2000,))
+    read(reader(async_stub_engine(executions(1000)), mark))
+    assert mark.open_ids == set()
+
+
+def test_records_not_in_id_order_are_read_whole(async_stub_engine):
+    client = async_stub_engine(executions(1000)[::-1])
+    mark = watermark(950, open_ids=(500,))
+    incremental = reader(client, mark)
+    assert sorted(ids(read(incremental))) == [500, *range(951, 1001)]
+    assert incremental.full_scan
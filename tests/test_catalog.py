@@ -0,0 +1,26 @@
+from dpxcc import CatalogObject, FileReferences, fetch_engine_catalog, plan_catalog
+
+ENGINE = {
+    "classifiers": [{"classifierId": 7, "classifierName": "FIRST_NAME"},
+                    {"classifierId": 8, "classifierName": "LAST_NAME"}],
+    "profile-sets": [{"profileSetId": 3, "profileSetName": "HR", "classifierIds": [8, 7], "description": "HR"}],
+}
+
+
+def profile_set(classifier_names):
+    payload = {"profileSetName": "HR", "classifierNames": classifier_names, "description": "HR"}
+    return CatalogObject("profile-sets", "HR", payload, "P_HR.json")
+
+
+def test_profile_sets_fetch_their_classifiers(stub_engine):
+    engine = fetch_engine_catalog(stub_engine(ENGINE), ["profile-sets"])
+    assert set(engine["classifiers"]) == {"FIRST_NAME", "LAST_NAME"}
+
+
+def test_unchanged_profile_set_is_not_updated(stub_engine):
+    engine = fetch_engine_catalog(stub_engine(ENGINE), ["profile-sets"])
+    file_refs = FileReferences(None, ".")
+    changes = plan_catalog({"profile-sets": {"HR": profile_set(["FIRST_NAME", "LAST_NAME"])}}, {}, engine, file_refs)
+    assert [(change.name, change.action) for change in changes] == [("HR", "unchanged")]
+    changes = plan_catalog({"profile-sets": {"HR": profile_set(["FIRST_NAME"])}}, {}, engine, file_refs)
+    assert [(change.action, change.fields) for change in changes] == [("update", ["classifierNames"])]
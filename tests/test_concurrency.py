@@ -0,0 +1,63 @@
+import logging
+import threading
+
+import pytest
+
+from dpxcc import LogBuffer, run_graph, topological_order
+
+
+def test_topological_order_puts_dependencies_first():
+    names = ["a", "b", "c", "d"]
+    # a needs c, c needs d
+    assert topological_order(names, {0: ["c"], 2: ["d"]}) == [1, 3, 2, 0]
+
+
+def test_topological_order_is_stable_and_ignores_unknown_names():
+    names = ["a", "b", "c"]
+    assert topological_order(names, {}) == [0, 1, 2]
+    assert topological_order(names, {0: ["a", "on the engine"], 1: [None]}) == [0, 1, 2]
+
+
+def test_topological_order_breaks_cycles_in_input_order():
+    names = ["a", "b", "c"]
+    assert topological_order(names, {0: ["b"], 1: ["a"]}) == [2, 0, 1]
+
+
+def run(items, dependencies, func, workers=4):
+    log_buffer = LogBuffer(logging.getLogger("dpxcc-test"))
+    return list(run_graph(func, items, dependencies, workers, log_buffer))
+
+
+def test_run_graph_starts_an_item_after_its_dependencies():
+    finished = []
+    lock = threading.Lock()
+
+    def deploy(item):
+        with lock:
+            finished.append(item)
+        return True
+
+    items = ["a", "b", "c", "d"]
+    results = run(items, {0: [2], 2: [3], 1: [0]}, deploy)
+    assert sorted(results) == [(item, True) for item in items]
+    assert finished.index("d") < finished.index("c") < finished.index("a") < finished.index("b")
+
+
+def test_run_graph_skips_the_dependants_of_a_failure():
+    results = run(["a", "b", "c", "d"], {1: [0], 2: [1], 3: []}, lambda item: item != "a")
+    assert dict(results) == {"a": False, "b": None, "c": None, "d": True}
+
+
+def test_run_graph_runs_cycles():
+    results = run(["a", "b"], {0: [1], 1: [0]}, lambda item: True)
+    assert dict(results) == {"a": True, "b": True}
+
+
+def test_run_graph_reraises_the_first_error():
+    def deploy(item):
+        if item == "b":
+            raise SystemExit(1)
+        return True
+
+    with pytest.raises(SystemExit):
+        run(["a", "b", "c"], {2: [1]}, deploy, workers=1)
@@ -0,0 +1,58 @@
+from dpxcc import EXECUTION_COMPONENTS, ExecutionDataset
+
+
+def event(execution_id, component_id, severity="ERROR", exception_type=None, count=None):
+    return {"executionId": execution_id, "executionComponentId": component_id, "severity": severity,
+            "exceptionType": exception_type, "count": count}
+
+
+def component(component_id, execution_id):
+    return {"executionComponentId": component_id, "executionId": execution_id, "componentName": f"c{component_id}"}
+
+
+def dataset():
+    joined = ExecutionDataset()
+    joined.add_execution({"executionId": 1, "jobId": 5, "status": "SUCCEEDED", "rowsMasked": 10})
+    for item in (event(1, 11, "ERROR", "NullPointerException"), event(1, 11, "WARNING", count=3),
+                 event(1, 12, "ERROR", "NullPointerException", count=2), event(1, None, "INFO")):
+        joined.add_event(item)
+    return joined
+
+
+def test_columns_follow_the_severities_and_exception_types_seen():
+    assert dataset().columns() == [*EXECUTION_COMPONENTS.columns, "jobId", "executionStatus", "executionRowsMasked",
+                                   "executionRowsTotal", "executionStartTime", "executionEndTime",
+                                   "executionSubmitTime", "executionEvents", "events", "events_ERROR",
+                                   "events_WARNING", "exceptions_NullPointerException", "exceptions_none"]
+
+
+def test_counts_are_weighted_by_count():
+    joined = dataset()
+    joined.columns()
+    row = joined.row(component(11, 1))
+    assert (row["events"], row["events_ERROR"], row["events_WARNING"]) == (4, 1, 3)
+    assert (row["exceptions_NullPointerException"], row["exceptions_none"]) == (1, 3)
+    row = joined.row(component(12, 1))
+    assert (row["events"], row["events_ERROR"], row["events_WARNING"]) == (2, 2, 0)
+    assert row["jobId"] == 5 and row["executionStatus"] == "SUCCEEDED" and row["componentName"] == "c12"
+
+
+def test_events_without_a_component_only_count_for_the_execution():
+    joined = dataset()
+    joined.columns()
+    assert joined.events == 4
+    assert "events_INFO" not in joined.count_columns
+    assert set(joined.component_events) == {11, 12}
+    assert joined.row(component(11, 1))["executionEvents"] == 7
+    assert joined.row(component(13, 1))["events"] == 0
+
+
+def test_components_of_a_missing_execution_have_no_row():
+    joined = dataset()
+    joined.add_event(event(2, 21, count=4))
+    joined.columns()
+    assert joined.row(component(21, 2)) is None
+    # Started after the listing: joined once the execution is added
+    joined.add_execution({"executionId": 2, "jobId": 5})
+    row = joined.row(component(21, 2))
+    assert (row["events"], row["executionEvents"]) == (4, 4)
@@ -0,0 +1,23 @@
+import gzip
+import json
+
+from dpxcc import DEFAULT_OUTPUT_TYPE, open_writer, output_type_of
+
+
+def test_output_type_follows_the_extension():
+    assert output_type_of("events.csv") == "csv"
+    assert output_type_of("events.jsonl.gz") == "jsonl"
+    assert output_type_of("EVENTS.JSONL") == "jsonl"
+    assert output_type_of("events.parquet") == "parquet"
+    assert output_type_of("events.txt") == DEFAULT_OUTPUT_TYPE == "csv"
+    assert output_type_of(None) == "csv"
+
+
+def test_jsonl_is_compressed_only_for_gz_names(tmp_path):
+    record = {"executionEventId": 1, "severity": "ERROR"}
+    for name, read in (("events.jsonl.gz", gzip.open), ("events.jsonl", open)):
+        path = str(tmp_path / name)
+        with open_writer(path, "jsonl", None) as writer:
+            writer.write(record)
+        with read(path, 'rt', encoding='utf-8') as lines:
+            assert [json.loads(line) for line in lines] == [record]
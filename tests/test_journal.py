@@ -0,0 +1,71 @@
+from dpxcc import DeployJournal, content_hash
+from dpxcc.journal import DONE, FAILED, SENT
+
+DIGEST = content_hash({"profileSetName": "PS1", "classifierIds": [1, 2]})
+
+
+def journal(tmp_path, resume=False):
+    return DeployJournal("engine", "dpxcc_create_profile_sets", [].append, resume=resume,
+                         path=str(tmp_path / "journal.jsonl"))
+
+
+def statuses(tmp_path):
+    return {name: record['status'] for (_, name), record in journal(tmp_path, resume=True).records.items()}
+
+
+def test_a_lost_answer_then_already_exists_counts_as_created(tmp_path):
+    first = journal(tmp_path)
+    first.sending("profile-sets", "PS1", DIGEST)
+    # Timed out: the engine may have created it, the "sent" line stays
+    first.failed("profile-sets", "PS1", DIGEST)
+    assert statuses(tmp_path) == {"PS1": SENT}
+
+    resumed = journal(tmp_path, resume=True)
+    assert not resumed.completed("profile-sets", "PS1", DIGEST)
+    assert resumed.attempted("profile-sets", "PS1", DIGEST)
+    assert not resumed.attempted("profile-sets", "PS1", content_hash({"profileSetName": "PS1"}))
+
+
+def test_an_answered_already_exists_stays_an_error_on_resume(tmp_path):
+    first = journal(tmp_path)
+    first.sending("profile-sets", "PS1", DIGEST)
+    first.answered("profile-sets", "PS1")  # 409 already exists
+    first.failed("profile-sets", "PS1", DIGEST)
+
+    resumed = journal(tmp_path, resume=True)
+    assert resumed.previous[("profile-sets", "PS1")]['status'] == FAILED
+    assert not resumed.attempted("profile-sets", "PS1", DIGEST)
+    assert not resumed.completed("profile-sets", "PS1", DIGEST)
+
+
+def test_failed_after_an_answer_replaces_the_sent_line(tmp_path):
+    first = journal(tmp_path)
+    first.sending("profile-sets", "PS1", DIGEST)
+    first.answered("profile-sets", "PS1")
+    first.failed("profile-sets", "PS1", DIGEST, error="400")
+    first.failed("profile-sets", "PS2", DIGEST)  # never sent
+    first.sending("profile-sets", "PS3", DIGEST)
+    first.answered("profile-sets", "PS3")
+    first.record("profile-sets", "PS3", DONE, DIGEST, 7)
+    assert statuses(tmp_path) == {"PS1": FAILED, "PS2": FAILED, "PS3": DONE}
+
+    resumed = journal(tmp_path, resume=True)
+    assert resumed.previous[("profile-sets", "PS1")]['error'] == "400"
+    assert resumed.completed("profile-sets", "PS3", DIGEST)
+    assert not resumed.completed("profile-sets", "PS3", content_hash({"profileSetName": "PS3"}))
+
+
+def test_a_line_cut_short_is_ignored(tmp_path):
+    first = journal(tmp_path)
+    first.record("profile-sets", "PS1", DONE, DIGEST)
+    first.sending("profile-sets", "PS2", DIGEST)
+    with open(first.path, 'rb+') as f:
+        f.truncate(len(f.read()) - 20)
+
+    resumed = journal(tmp_path, resume=True)
+    assert resumed.completed("profile-sets", "PS1", DIGEST)
+    assert not resumed.attempted("profile-sets", "PS2", DIGEST)
+
+    # What the resumed run writes next is not lost with the cut line
+    resumed.record("profile-sets", "PS2", DONE, DIGEST)
+    assert statuses(tmp_path) == {"PS1": DONE, "PS2": DONE}
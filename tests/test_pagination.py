@@ -0,0 +1,57 @@
+import pytest
+
+from dpxcc import Paginator
+from dpxcc.pagination import MAX_PAGE_SIZE, MIN_PAGE_SIZE, TARGET_PAGE_SECONDS, next_page_size
+
+
+def items_of(requests):
+    covered = []
+    for page_number, page_size in requests:
+        covered.extend(range((page_number - 1) * page_size, page_number * page_size))
+    return covered
+
+
+@pytest.mark.parametrize("total, first_size, page_size", [
+    (1000, 100, 100),
+    (1000, 100, 400),
+    (1000, 100, 1000),
+    (250, 100, 200),
+    (1001, 100, 50),
+    (1000, 100, 25),
+    (101, 100, 800),
+])
+def test_remaining_pages_cover_the_list_once(stub_engine, total, first_size, page_size):
+    paginator = Paginator(stub_engine([]), "executions")
+    paginator.total = total
+    covered = items_of(paginator.remaining_pages(first_size, page_size))
+    # Every item after the first page exactly once; the last page may run past the total
+    assert sorted(covered) == covered
+    assert len(set(covered)) == len(covered)
+    assert [item for item in covered if item < total] == list(range(first_size, total))
+
+
+def test_remaining_pages_switch_size_after_the_gap(stub_engine):
+    paginator = Paginator(stub_engine([]), "executions")
+    paginator.total = 1000
+    assert paginator.remaining_pages(100, 400) == [(2, 100), (3, 100), (4, 100), (2, 400), (3, 400)]
+    assert paginator.remaining_pages(100, 50)[0] == (3, 50)
+
+
+def test_next_page_size():
+    assert next_page_size(100, TARGET_PAGE_SECONDS / 4) == 400
+    assert next_page_size(100, TARGET_PAGE_SECONDS) == 100
+    assert next_page_size(100, 0) == MAX_PAGE_SIZE
+    assert next_page_size(300, 0) == 900  # a multiple of the first page, under the maximum
+    assert next_page_size(100, 0, max_page_size=250) == 200
+    assert next_page_size(100, 3 * TARGET_PAGE_SECONDS) == 50
+    assert next_page_size(MIN_PAGE_SIZE, 3 * TARGET_PAGE_SECONDS) == MIN_PAGE_SIZE
+    assert next_page_size(75, 3 * TARGET_PAGE_SECONDS) == 75  # odd sizes are not halved
+
+
+def test_paginator_reads_every_item_in_order(stub_engine):
+    records = [{"executionId": execution_id} for execution_id in range(1, 1235)]
+    client = stub_engine(records)
+    paginator = Paginator(client, "executions", page_size=100, workers=3)
+    assert list(paginator) == records
+    assert paginator.total == 1234
+    assert client.requests[0] == ("executions", 1, 100)
@@ -0,0 +1,44 @@
+import time
+
+from dpxcc import AdaptiveLimiter, MultipartUpload
+from dpxcc.client import body_size
+from dpxcc.throttle import LATENCY_MAX_BODY
+
+
+def limiter():
+    logged = []
+    limiter = AdaptiveLimiter(10, logged.append, initial=8)
+    for _ in range(5):
+        limiter.release(limiter.acquire() - 0.1, "POST file-uploads")
+    return limiter
+
+
+def test_a_slow_call_halves_the_limit():
+    slow = limiter()
+    slow.release(slow.acquire() - 5, "POST file-uploads")
+    assert int(slow.limit) == 4
+
+
+def test_an_untimed_call_is_not_compared_with_the_usual_latency():
+    upload = limiter()
+    upload.release(upload.acquire() - 5, "POST file-uploads", timed=False)
+    assert int(upload.limit) == 8
+    assert upload.latency["POST file-uploads"][1] < 1
+    # Overload still counts
+    upload.release(upload.acquire(), "POST file-uploads", overloaded=True, reason="503", timed=False)
+    assert int(upload.limit) == 4
+
+
+def test_body_size_of_an_upload(tmp_path):
+    lookup_file = tmp_path / "names.txt"
+    lookup_file.write_bytes(b"x" * (LATENCY_MAX_BODY + 1))
+    with MultipartUpload(str(lookup_file)) as body:
+        assert body_size({"data": body}) > LATENCY_MAX_BODY
+    assert body_size({"json": {"name": "x" * 100}}) == 0
+    assert body_size({"data": b"small"}) == 5
+
+
+def test_untimed_calls_leave_no_latency():
+    untimed = AdaptiveLimiter(4, print)
+    untimed.release(time.monotonic(), "POST file-uploads", timed=False)
+    assert "POST file-uploads" not in untimed.latency and "POST file-uploads" not in untimed.samples
@@ -0,0 +1,132 @@
+import csv
+
+from dpxcc import IncrementalReader, Watermark, load_watermark, open_writer, restore_output, save_watermark
+
+
+def executions(count, status="SUCCEEDED"):
+    return [{"executionId": execution_id, "submitTime": f"t{execution_id:05}", "status": status}
+            for execution_id in range(1, count + 1)]
+
+
+def reader(client, watermark, page_size=10):
+    return IncrementalReader(client, "executions", "executionId", "submitTime", watermark, page_size=page_size)
+
+
+def watermark(last_id, open_ids=()):
+    return Watermark("key", {"lastId": last_id, "lastTime": f"t{last_id:05}", "openIds": list(open_ids)})
+
+
+def ids(records):
+    return [record["executionId"] for record in records]
+
+
+def test_only_new_records_are_read(stub_engine):
+    client = stub_engine(executions(1000))
+    mark = watermark(950)
+    assert ids(reader(client, mark)) == list(range(951, 1001))
+    assert mark.last_id == 1000 and mark.last_time == "t01000"
+    # Page 1, the last page, a binary search over 100 pages, then pages 96-100
+    assert len(client.requests) < 20
+
+
+def test_search_finds_the_first_page_past_the_watermark(stub_engine):
+    for last_id in (0, 5, 9, 10, 11, 499, 500, 501, 989, 990, 991, 999):
+        records = reader(stub_engine(executions(1000)), watermark(last_id))
+        start = records.start_page()
+        assert start == last_id // 10 + 1
+        assert records.pages[start][-1]["executionId"] > last_id
+
+
+def test_nothing_new(stub_engine):
+    client = stub_engine(executions(1000))
+    assert list(reader(client, watermark(1000))) == []
+    assert [page_number for _, page_number, _ in client.requests] == [1, 100]
+
+
+def test_reopened_ids_lower_the_start(stub_engine):
+    records = executions(1000)
+    client = stub_engine(records)
+    mark = watermark(950, open_ids=(500, 700))
+    incremental = reader(client, mark)
+    assert incremental.start_id == 499
+    # 500 has finished since, 700 is still running
+    records[699]["status"] = "RUNNING"
+    assert ids(incremental) == [500, *range(951, 1001)]
+    assert mark.open_ids == {700}
+
+
+def test_reopened_ids_no_longer_listed_are_dropped(stub_engine):
+    mark = watermark(950, open_ids=(2000,))
+    list(reader(stub_engine(executions(1000)), mark))
+    assert mark.open_ids == set()
+
+
+def test_records_not_in_id_order_are_read_whole(stub_engine):
+    records = executions(1000)
+    client = stub_engine(records[::-1])
+    mark = watermark(950, open_ids=(500,))
+    incremental = reader(client, mark)
+    assert sorted(ids(incremental)) == [500, *range(951, 1001)]
+    assert incremental.full_scan
+
+
+def test_wanted_skips_records_without_an_id(stub_engine):
+    incremental = reader(stub_engine([]), watermark(10))
+    assert not incremental.wanted({"executionId": None})
+    assert not incremental.wanted({"executionId": "11"})
+    assert not incremental.wanted({"executionId": 10})
+    assert incremental.wanted({"executionId": 11})
+
+
+def test_restore_output_drops_what_was_written_after_the_watermark(tmp_path):
+    output_file = tmp_path / "execution.csv"
+    output_file.write_text("header\nrow 1\nrow 2\n")
+    mark = watermark(1)
+    mark.size = len("header\nrow 1\n")
+    logged = []
+    restore_output(str(output_file), mark, logged.append)
+    assert output_file.read_text() == "header\nrow 1\n"
+    assert len(logged) == 1
+
+
+def test_restore_output_leaves_the_file_alone(tmp_path):
+    output_file = tmp_path / "execution.csv"
+    output_file.write_text("header\nrow 1\n")
+    logged = []
+    mark = watermark(1)
+    restore_output(str(output_file), mark, logged.append)  # no size saved yet
+    mark.size = 100
+    restore_output(str(output_file), mark, logged.append)  # shorter than saved
+    restore_output(str(tmp_path / "missing.csv"), mark, logged.append)
+    assert output_file.read_text() == "header\nrow 1\n"
+    assert logged == []
+
+
+def export(client, output_file, watermarks):
+    # The steps of ListExporter.run() with --incremental
+    mark = load_watermark("key", watermarks)
+    restore_output(output_file, mark, print)
+    append = mark.last_id is not None
+    with open_writer(output_file, "csv", ("executionId", "status"), append=append) as writer:
+        for record in reader(client, mark):
+            writer.write(record)
+    save_watermark(mark, output_file, watermarks)
+    return writer.count
+
+
+def test_incremental_runs_append_only_the_new_rows(stub_engine, tmp_path):
+    output_file, watermarks = str(tmp_path / "execution.csv"), str(tmp_path / "watermarks.json")
+    records = executions(1000)
+    client = stub_engine(records)
+    assert export(client, output_file, watermarks) == 1000
+
+    # A run interrupted while appending, before it saved its watermark
+    with open(output_file, 'a') as output:
+        output.write("1001;SUCC")
+    records.extend(executions(1200)[1000:])
+    assert export(client, output_file, watermarks) == 200
+
+    with open(output_file, newline='') as output:
+        rows = list(csv.reader(output, delimiter=';'))
+    assert rows[0] == ["executionId", "status"]
+    assert [int(row[0]) for row in rows[1:]] == list(range(1, 1201))